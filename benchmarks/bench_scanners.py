@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: every module of the three scanners against the local portfolio stand-in
+Each module runs in a fresh process (after the modules it depends on, which
+are not measured), so its CPU time and peak RSS are its own. Requests are
+counted by the stand-in, so raw race and burst traffic is included. A last
+row per tool runs the whole scan the way the tool does.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from standin import Settings, StandInTarget
+
+TOOLS = ('advanced_vuln_scanner', 'admin_pentest', 'quick_portfolio_test')
+WHOLE_SCAN = '(whole scan)'
+
+
+def build(tool, url):
+    """(scanner, {module name: (func, args, depends)}, run whole scan) for one tool against url"""
+    if tool == 'advanced_vuln_scanner':
+        from advanced_vuln_scanner import PortfolioVulnScanner
+        scanner = PortfolioVulnScanner(url)
+    elif tool == 'admin_pentest':
+        from admin_pentest import AdminPenetrationTester
+        scanner = AdminPenetrationTester(url)
+    else:
+        from quick_portfolio_test import QuickSecurityTest
+        scanner = QuickSecurityTest(target=url)
+        modules = {test.__name__: (test, (), ()) for test in scanner.tests()}
+        return scanner, modules, scanner.run_tests
+    registry = scanner.modules()
+    modules = {module.name: (module.func, module.args, module.depends) for module in registry}
+    return scanner, modules, lambda: registry.run()
+
+
+def close(scanner):
+    if hasattr(scanner, 'close'):
+        scanner.close()
+    else:
+        scanner.transport.close()
+        scanner.console.close()
+
+
+def measure(tool, name, url, counters, conn):
+    """Child process: run one module (or the whole scan) and send back what it cost"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        scanner, modules, whole = build(tool, url)
+        done = set()
+
+        def run(module):
+            # Dependencies first, each once
+            func, args, depends = modules[module]
+            for dependency in depends:
+                if dependency not in done:
+                    run(dependency)
+            func(*args)
+            done.add(module)
+
+        if name != WHOLE_SCAN:
+            for dependency in modules[name][2]:
+                run(dependency)
+        requests, rate_limited = counters[0], counters[1]
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        if name == WHOLE_SCAN:
+            whole()
+        else:
+            func, args, _ = modules[name]
+            func(*args)
+        elapsed = time.perf_counter() - start
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        result = {
+            'tool': tool,
+            'module': name,
+            'wall': elapsed,
+            'requests': counters[0] - requests,
+            'rate_limited': counters[1] - rate_limited,
+            # User plus system time of every thread, the transport's event loop included
+            'cpu': after.ru_utime - usage.ru_utime + after.ru_stime - usage.ru_stime,
+            # High-water mark of the whole process (kB on Linux), imports and dependencies included
+            'peak_rss_mb': after.ru_maxrss / 1024,
+        }
+        close(scanner)
+    conn.send(result)
+
+
+def module_names(tool, url):
+    """The modules a tool registers, in order, without running anything"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        scanner, modules, _ = build(tool, url)
+        close(scanner)
+    return list(modules)
+
+
+def run_one(tool, name, target):
+    context = multiprocessing.get_context('spawn')
+    parent, child = context.Pipe()
+    process = context.Process(target=measure, args=(tool, name, target.url, target.counters, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = None
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tools', nargs='+', choices=TOOLS, default=list(TOOLS))
+    parser.add_argument('--modules', nargs='+', metavar='NAME', help='only these modules (default: all)')
+    parser.add_argument('--no-whole-scan', action='store_true', help='skip the whole-scan row per tool')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='stand-in seconds per answer (default: %(default)s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='stand-in extra random seconds per answer')
+    parser.add_argument('--rate-limit', type=int, default=0, metavar='RPS', help='stand-in per-client rate limit')
+    parser.add_argument('--random-429', type=float, default=0.0, metavar='FRACTION',
+                        help='fraction of requests the stand-in answers 429')
+    parser.add_argument('--large-file-mb', type=int, default=0, metavar='MB',
+                        help='serve /backup.zip and /database.sql as files of this size')
+    parser.add_argument('--json', metavar='FILE', help='also write the results to FILE as JSON')
+    args = parser.parse_args()
+
+    settings = Settings(args.latency, args.jitter, args.rate_limit, args.random_429, args.large_file_mb)
+    results = []
+    with StandInTarget(settings) as target:
+        print(f"Stand-in at {target.url}: {args.latency * 1000:.0f}ms latency"
+              + (f" + up to {args.jitter * 1000:.0f}ms" if args.jitter else '')
+              + (f", {args.rate_limit} req/s per client" if args.rate_limit else '')
+              + (f", {args.random_429:.0%} random 429s" if args.random_429 else '')
+              + (f", {args.large_file_mb} MB artifacts" if args.large_file_mb else ''))
+        print(f"{'tool':<22} {'module':<36} {'wall s':>7} {'requests':>9} {'req/s':>7} {'429s':>5} "
+              f"{'CPU s':>6} {'peak RSS MB':>12}")
+        for tool in args.tools:
+            names = [name for name in module_names(tool, target.url) if not args.modules or name in args.modules]
+            if not args.no_whole_scan:
+                names.append(WHOLE_SCAN)
+            for name in names:
+                result = run_one(tool, name, target)
+                if result is None:
+                    print(f"{tool:<22} {name:<36} failed")
+                    continue
+                results.append(result)
+                rate = result['requests'] / result['wall'] if result['wall'] else 0.0
+                print(f"{tool:<22} {name:<36} {result['wall']:>7.2f} {result['requests']:>9} {rate:>7.0f} "
+                      f"{result['rate_limited']:>5} {result['cpu']:>6.2f} {result['peak_rss_mb']:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(settings), 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the deployed portfolio, for benchmarking the scanners offline
+Answers the way the Vercel deployment does: files under public/ are served as
+they are, and every other GET falls through to index.html (the /* rewrite in
+public/_redirects and vercel.json). On top of that it has a JSON /api/contact,
+a POST /admin/login that refuses every credential, and upload endpoints that
+demand auth. Latency, a per-client rate limit, random 429s and large
+downloadable artifacts can be turned on to reproduce a slow or defended host.
+Run it on its own or start it from a benchmark with StandInTarget.
+"""
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import multiprocessing
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PUBLIC = os.path.join(ROOT, 'public')
+CHUNK = 64 * 1024
+# Endpoints that take multipart uploads once signed in
+UPLOAD_PATHS = ('/api/upload', '/api/media', '/api/admin/upload', '/api/admin/media')
+
+
+class Settings:
+    """How the stand-in behaves; plain attributes so it pickles into the server process"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=0, random_429=0.0, large_file_mb=0):
+        self.latency = latency
+        self.jitter = jitter
+        # Requests per second each client IP may make before getting 429s; 0 turns the limit off
+        self.rate_limit = rate_limit
+        # Fraction of requests answered 429 regardless of rate, like a WAF that sheds load
+        self.random_429 = random_429
+        # Size of the /backup.zip and /database.sql artifacts; 0 leaves them to the SPA fallback
+        self.large_file_mb = large_file_mb
+
+
+class TokenBucket:
+    """Per-client request budget that refills at rate per second, up to one second's worth"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = {}
+        self._lock = threading.Lock()
+
+    def take(self, client):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self.tokens.get(client, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self.tokens[client] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+
+def large_file(path):
+    """(content type, read(start, end) chunk generator) for the generated artifact at path"""
+    if path.endswith('.zip'):
+        head, fill, ctype = b'PK\x03\x04\x14\x00\x00\x00\x08\x00', b'\x00', 'application/zip'
+    else:
+        head, fill, ctype = b'-- PostgreSQL database dump\n', b"INSERT INTO contact_messages VALUES ('x');\n", \
+            'application/sql'
+
+    def read(start, end):
+        # Bytes start..end (inclusive) of head followed by fill repeated, without building the whole file
+        position = start
+        while position <= end:
+            if position < len(head):
+                piece = head[position:end + 1]
+            else:
+                offset = (position - len(head)) % len(fill)
+                count = min(CHUNK, end + 1 - position)
+                piece = (fill * (count // len(fill) + 2))[offset:offset + count]
+            yield piece
+            position += len(piece)
+    return ctype, read
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Routes one request the way the deployed portfolio would"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server_version = 'Vercel'
+
+    def version_string(self):
+        return self.server_version
+
+    def log_message(self, *args):
+        pass
+
+    def handle_one_request(self):
+        # Python's handler answers unknown methods with 501 before reaching us; route every method instead
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+            if not self.raw_requestline:
+                self.close_connection = True
+                return
+            if not self.parse_request():
+                return
+            self.respond()
+            self.wfile.flush()
+        except (ConnectionError, TimeoutError):
+            self.close_connection = True
+
+    def respond(self):
+        settings = self.server.settings
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        self.server.count('requests')
+        if settings.latency or settings.jitter:
+            time.sleep(settings.latency + random.uniform(0, settings.jitter))
+
+        limited = self.server.bucket is not None and not self.server.bucket.take(self.client_address[0])
+        if limited or (settings.random_429 and random.random() < settings.random_429):
+            self.server.count('rate_limited')
+            return self.send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': '1'})
+
+        path = self.path.split('?', 1)[0]
+        if path == '/api/contact':
+            return self.contact(body)
+        if path in UPLOAD_PATHS or path.startswith('/api/'):
+            if self.command == 'OPTIONS':
+                return self.send_empty(204, {'Allow': 'POST, OPTIONS'})
+            if path in UPLOAD_PATHS and self.command == 'POST':
+                return self.send_json(401, {'error': 'Authentication required'})
+            # No serverless function is deployed for any other /api route
+            return self.send_json(404, {'error': 'NOT_FOUND'})
+        if path == '/admin/login' and self.command == 'POST':
+            return self.send_json(401, {'error': 'Invalid login credentials'})
+        if self.command not in ('GET', 'HEAD'):
+            # Static hosting accepts nothing but reads
+            return self.send_json(405, {'error': 'Method Not Allowed'}, {'Allow': 'GET, HEAD'})
+        if settings.large_file_mb and path in ('/backup.zip', '/database.sql'):
+            ctype, read = large_file(path)
+            return self.send_ranged(ctype, settings.large_file_mb * 2 ** 20, read)
+        return self.send_static(path)
+
+    def contact(self, body):
+        if self.command == 'OPTIONS':
+            return self.send_empty(204, {'Allow': 'POST, OPTIONS'})
+        if self.command != 'POST':
+            return self.send_json(405, {'error': 'Method Not Allowed'}, {'Allow': 'POST, OPTIONS'})
+        try:
+            message = json.loads(body or b'{}')
+        except ValueError:
+            return self.send_json(400, {'error': 'Invalid JSON'})
+        if not isinstance(message, dict) or not all(message.get(field) for field in ('name', 'email', 'message')):
+            return self.send_json(400, {'error': 'name, email and message are required'})
+        return self.send_json(200, {'success': True})
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    def send_static(self, path):
+        status, content, ctype = self.server.static(path)
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        headers = {'Content-Type': ctype, 'ETag': etag, 'Cache-Control': 'public, max-age=0, must-revalidate'}
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_empty(304, headers)
+        self.send(status, content, headers)
+
+    def send_ranged(self, ctype, size, read):
+        start, end = 0, size - 1
+        status = 200
+        headers = {'Content-Type': ctype, 'Accept-Ranges': 'bytes'}
+        requested = self.headers.get('Range', '')
+        if requested.startswith('bytes=') and '-' in requested:
+            first, _, last = requested[6:].split(',')[0].partition('-')
+            if first.isdigit():
+                start, end = int(first), min(int(last) if last.isdigit() else size - 1, size - 1)
+                status = 206
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if self.command != 'HEAD':
+            for piece in read(start, end):
+                self.wfile.write(piece)
+
+    def send_json(self, status, payload, headers=None):
+        self.send(status, json.dumps(payload).encode(), dict(headers or {}, **{'Content-Type': 'application/json'}))
+
+    def send_empty(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send(self, status, content, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Strict-Transport-Security', 'max-age=63072000')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stand-in's settings, counters and static files"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, settings, counters=None):
+        super().__init__(address, StandInHandler)
+        self.settings = settings
+        self.bucket = TokenBucket(settings.rate_limit) if settings.rate_limit else None
+        self.counters = counters
+        self._files = {}
+        with open(os.path.join(ROOT, 'index.html'), 'rb') as f:
+            self.shell = f.read()
+
+    def count(self, name):
+        if self.counters is not None:
+            with self.counters.get_lock():
+                self.counters[0 if name == 'requests' else 1] += 1
+
+    def static(self, path):
+        """(status, content, content type) for a GET: a file from public/, else the SPA shell"""
+        if path not in self._files:
+            local = os.path.realpath(os.path.join(PUBLIC, path.lstrip('/')))
+            if local.startswith(os.path.realpath(PUBLIC) + os.sep) and os.path.isfile(local):
+                with open(local, 'rb') as f:
+                    self._files[path] = (200, f.read(), mimetypes.guess_type(local)[0] or 'application/octet-stream')
+            else:
+                # The /* rewrite: routes the React router owns, and everything that does not exist
+                self._files[path] = None
+        return self._files[path] or (200, self.shell, 'text/html; charset=utf-8')
+
+
+class StandInTarget:
+    """The stand-in running in its own process, so it does not compete with a scanner for the interpreter"""
+
+    def __init__(self, settings=None, host='127.0.0.1', port=0):
+        self.settings = settings or Settings()
+        self.host = host
+        self.port = port
+        # Spawned, like the scanners' own worker processes, so the counters can be handed on to those too
+        self._context = multiprocessing.get_context('spawn')
+        # Requests answered and requests turned away with 429, shared with the server process
+        self.counters = self._context.Array('l', 2)
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def requests(self):
+        return self.counters[0]
+
+    @property
+    def rate_limited(self):
+        return self.counters[1]
+
+    def start(self, timeout=30):
+        """Start the server process and wait for its port; raises RuntimeError if it never reports one"""
+        parent, child = self._context.Pipe()
+        self.process = self._context.Process(target=serve, args=(self.host, self.port, self.settings,
+                                                                   self.counters, child), daemon=True)
+        self.process.start()
+        # Only the child holds the sending end now, so its exit shows up as EOF here
+        child.close()
+        deadline = time.monotonic() + timeout
+        port = None
+        # A child that dies first (e.g. it cannot re-import the main module under spawn) never sends the port
+        while port is None and self.process.is_alive() and time.monotonic() < deadline:
+            if parent.poll(0.1):
+                try:
+                    port = parent.recv()
+                except EOFError:
+                    break
+        parent.close()
+        if port is None:
+            self.process.join(1)
+            code = self.process.exitcode
+            self.stop()
+            if code is None:
+                raise RuntimeError(f"Stand-in server did not report its port within {timeout}s")
+            raise RuntimeError(f"Stand-in server exited with code {code} before reporting its port")
+        self.port = port
+        return self
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def serve(host, port, settings, counters=None, ready=None):
+    server = StandInServer((host, port), settings, counters)
+    if ready is not None:
+        ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every answer')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds at random')
+    parser.add_argument('--rate-limit', type=int, default=0, metavar='RPS',
+                        help='requests per second per client before answering 429 (default: no limit)')
+    parser.add_argument('--random-429', type=float, default=0.0, metavar='FRACTION',
+                        help='answer this fraction of requests 429 regardless of rate')
+    parser.add_argument('--large-file-mb', type=int, default=0, metavar='MB',
+                        help='serve /backup.zip and /database.sql as files of this size, with Range support')
+    args = parser.parse_args()
+
+    settings = Settings(args.latency, args.jitter, args.rate_limit, args.random_429, args.large_file_mb)
+    print(f"🎭 Portfolio stand-in on http://{args.host}:{args.port} (Ctrl-C to stop)")
+    try:
+        serve(args.host, args.port, settings)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
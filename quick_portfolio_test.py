@@ -5,18 +5,49 @@ Quick Security Test for: https://my-digital-portfolio-git-main-sajal-basnets-pro
 Run this script from Kali Linux to perform rapid security assessment
 """
 
-import requests
+import argparse
 import json
 import time
 import sys
 from urllib.parse import urljoin
 
+from scanner_core import (AsyncTransport, Checkpoint, Console, FindingsStore, HTTP2_AVAILABLE, IndicatorMatcher,
+                          ModuleProfiler, ProbeMetrics, RescanStore, ResponseCache, TargetBatch, export_metrics,
+                          module_scope, read_targets, serve_metrics)
+
 TARGET_URL = "https://my-digital-portfolio-git-main-sajal-basnets-projects.vercel.app"
 
+# Keyword sets compiled once; each response body is scanned once
+INDICATORS = IndicatorMatcher({
+    'admin': ['admin', 'dashboard', 'control panel', 'management'],
+    'login': ['login', 'sign in', 'authenticate'],
+    'auth_success': ['welcome', 'dashboard', 'token', 'success'],
+    'sql_error': ['sql', 'syntax', 'database', 'query'],
+    'sensitive': ['password', 'secret', 'key', 'token', 'api_key']
+})
+
 class QuickSecurityTest:
-    def __init__(self):
-        self.session = requests.Session()
-        self.findings = []
+    def __init__(self, transport=None, checkpoint=None, rescan=None, findings_store=None, console=None,
+                 target=TARGET_URL, http2=False, metrics=None, profile_dir=None):
+        self.target = target.rstrip('/')
+        # Pass a transport to share its connection pool and response cache with other tools
+        self.transport = transport or AsyncTransport(cache=ResponseCache(), http2=http2, metrics=metrics)
+        # Output goes through a background sink so tests never wait on the terminal
+        self.console = console or Console()
+        self.console.watch(self.transport)
+        # Completed tests are journalled here; a resumed checkpoint brings its findings back
+        self.checkpoint = checkpoint or Checkpoint()
+        # Findings go straight to the store; self.findings is a query over this run's rows
+        self.findings_store = findings_store or FindingsStore(tool='quick_portfolio_test', target=self.target)
+        self.findings = self.findings_store.view()
+        for finding in self.checkpoint.findings:
+            self.findings_store.add(finding['severity'], finding)
+        # Validators from the last run turn repeat GETs into conditional requests
+        self.rescan = rescan
+        if rescan is not None:
+            self.transport.rescan = rescan
+        # With a profile directory every test is profiled, one at a time, and its raw profiles kept there
+        self.profiler = ModuleProfiler(profile_dir, self.transport) if profile_dir else None
         
     def log_finding(self, severity, title, details):
         finding = {
@@ -25,7 +56,11 @@ class QuickSecurityTest:
             'details': details,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         }
-        self.findings.append(finding)
+        is_new = self.findings_store.add(severity, finding)
+        self.checkpoint.record(finding)
+        # A repeat of an earlier finding only bumps its count; it is not printed again
+        if not is_new:
+            return
         
         # Color coding
         colors = {
@@ -38,13 +73,12 @@ class QuickSecurityTest:
         reset = '\033[0m'
         
         color = colors.get(severity, reset)
-        print(f"{color}[{severity}] {title}{reset}")
-        print(f"    {details}")
+        self.console.finding(f"{color}[{severity}] {title}{reset}", f"    {details}")
         
     def test_security_headers(self):
-        print("\n🔒 Testing Security Headers...")
+        self.console.info("\n🔒 Testing Security Headers...")
         try:
-            response = self.session.get(TARGET_URL, timeout=10)
+            response = self.transport.get(self.target, timeout=10)
             headers = response.headers
             
             # Critical security headers
@@ -70,7 +104,7 @@ class QuickSecurityTest:
             self.log_finding('MEDIUM', 'Header Check Failed', f'Could not retrieve headers: {e}')
             
     def test_admin_endpoints(self):
-        print("\n🔐 Testing Admin Endpoints...")
+        self.console.info("\n🔐 Testing Admin Endpoints...")
         
         admin_endpoints = [
             '/admin',
@@ -89,18 +123,14 @@ class QuickSecurityTest:
         
         for endpoint in admin_endpoints:
             try:
-                url = urljoin(TARGET_URL, endpoint)
-                response = self.session.get(url, timeout=5)
+                url = urljoin(self.target, endpoint)
+                response = self.transport.get(url, timeout=5)
                 
                 if response.status_code == 200:
                     # Check if it contains admin content without login
-                    admin_indicators = ['admin', 'dashboard', 'control panel', 'management']
-                    login_indicators = ['login', 'sign in', 'authenticate']
-                    
-                    response_text = response.text.lower()
-                    
-                    has_admin_content = any(indicator in response_text for indicator in admin_indicators)
-                    has_login_prompt = any(indicator in response_text for indicator in login_indicators)
+                    hits = INDICATORS.scan(response)
+                    has_admin_content = hits.hit('admin')
+                    has_login_prompt = hits.hit('login')
                     
                     if has_admin_content and not has_login_prompt:
                         accessible_admin.append(endpoint)
@@ -115,7 +145,7 @@ class QuickSecurityTest:
             self.log_finding('INFO', 'Admin Security Check', 'No admin panels accessible without authentication')
             
     def test_contact_form_xss(self):
-        print("\n📝 Testing Contact Form for XSS...")
+        self.console.info("\n📝 Testing Contact Form for XSS...")
         
         xss_payloads = [
             '<script>alert("XSS")</script>',
@@ -129,14 +159,14 @@ class QuickSecurityTest:
         for payload in xss_payloads[:2]:  # Test first 2 payloads
             for endpoint in contact_endpoints:
                 try:
-                    url = urljoin(TARGET_URL, endpoint)
+                    url = urljoin(self.target, endpoint)
                     data = {
                         'name': payload,
                         'email': 'test@test.com',
                         'message': 'XSS test'
                     }
                     
-                    response = self.session.post(
+                    response = self.transport.post(
                         url,
                         json=data,
                         headers={'Content-Type': 'application/json'},
@@ -153,7 +183,7 @@ class QuickSecurityTest:
                     continue
                     
     def test_authentication_bypass(self):
-        print("\n🔓 Testing Authentication Bypass...")
+        self.console.info("\n🔓 Testing Authentication Bypass...")
         
         login_endpoints = ['/admin/login', '/api/auth/login']
         
@@ -166,13 +196,13 @@ class QuickSecurityTest:
         for endpoint in login_endpoints:
             for payload in sql_payloads:
                 try:
-                    url = urljoin(TARGET_URL, endpoint)
+                    url = urljoin(self.target, endpoint)
                     data = {
                         'email': payload,
                         'password': 'test123'
                     }
                     
-                    response = self.session.post(
+                    response = self.transport.post(
                         url,
                         json=data,
                         headers={'Content-Type': 'application/json'},
@@ -180,21 +210,17 @@ class QuickSecurityTest:
                     )
                     
                     # Check for successful login or database errors
-                    response_text = response.text.lower()
-                    
-                    success_indicators = ['welcome', 'dashboard', 'token', 'success']
-                    error_indicators = ['sql', 'syntax', 'database', 'query']
-                    
-                    if any(indicator in response_text for indicator in success_indicators):
+                    hits = INDICATORS.scan(response)
+                    if hits.hit('auth_success'):
                         self.log_finding('CRITICAL', 'Authentication Bypass', f'SQL injection may have bypassed login at {endpoint}')
-                    elif any(indicator in response_text for indicator in error_indicators):
+                    elif hits.hit('sql_error'):
                         self.log_finding('HIGH', 'SQL Error Disclosure', f'Database error exposed at {endpoint}')
                         
                 except Exception:
                     continue
                     
     def test_information_disclosure(self):
-        print("\n🔍 Testing Information Disclosure...")
+        self.console.info("\n🔍 Testing Information Disclosure...")
         
         sensitive_files = [
             '/.env',
@@ -206,15 +232,14 @@ class QuickSecurityTest:
         
         for file_path in sensitive_files:
             try:
-                url = urljoin(TARGET_URL, file_path)
-                response = self.session.get(url, timeout=5)
+                url = urljoin(self.target, file_path)
+                # Stream the file and stop reading at the first sensitive keyword
+                stream = INDICATORS.stream(until=lambda stream: stream.hit('sensitive'))
+                response = self.transport.get(url, timeout=5, max_bytes=2 ** 20, on_chunk=stream)
                 
-                if response.status_code == 200 and len(response.text) > 10:
+                if response.status_code == 200 and stream.chars > 10:
                     # Check for sensitive information
-                    sensitive_patterns = ['password', 'secret', 'key', 'token', 'api_key']
-                    content_lower = response.text.lower()
-                    
-                    if any(pattern in content_lower for pattern in sensitive_patterns):
+                    if stream.hit('sensitive'):
                         self.log_finding('HIGH', 'Sensitive File Exposed', f'{file_path} contains sensitive information')
                     else:
                         self.log_finding('MEDIUM', 'Configuration File Exposed', f'{file_path} is accessible')
@@ -223,12 +248,12 @@ class QuickSecurityTest:
                 continue
                 
     def test_basic_ssl(self):
-        print("\n🔐 Testing Basic SSL/HTTPS...")
+        self.console.info("\n🔐 Testing Basic SSL/HTTPS...")
         
         try:
             # Test HTTP redirect
-            http_url = TARGET_URL.replace('https://', 'http://')
-            response = self.session.get(http_url, timeout=5, allow_redirects=False)
+            http_url = self.target.replace('https://', 'http://')
+            response = self.transport.get(http_url, timeout=5, allow_redirects=False)
             
             if response.status_code in [301, 302, 308]:
                 if 'https' in response.headers.get('Location', ''):
@@ -242,19 +267,18 @@ class QuickSecurityTest:
             self.log_finding('INFO', 'HTTPS Only', 'Site appears to be HTTPS only')
             
     def generate_report(self):
+        # Everything the tests logged is on screen before the summary
+        self.console.close()
         print("\n" + "="*60)
         print("📊 SECURITY ASSESSMENT SUMMARY")
         print("="*60)
         
         # Count findings by severity
-        severity_counts = {}
-        for finding in self.findings:
-            severity = finding['severity']
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        severity_counts = self.findings_store.severity_counts()
             
-        print(f"Target: {TARGET_URL}")
+        print(f"Target: {self.target}")
         print(f"Assessment Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Total Findings: {len(self.findings)}")
+        print(f"Total Findings: {sum(severity_counts.values())}")
         print()
         
         for severity in ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO']:
@@ -263,49 +287,213 @@ class QuickSecurityTest:
                 print(f"{severity}: {count} findings")
                 
         # Show critical and high findings
-        critical_high = [f for f in self.findings if f['severity'] in ['CRITICAL', 'HIGH']]
-        
-        if critical_high:
+        if self.findings_store.exists(severity=('CRITICAL', 'HIGH')):
             print("\n🚨 PRIORITY ISSUES:")
-            for finding in critical_high:
+            for finding in self.findings_store.query(severity=('CRITICAL', 'HIGH')):
                 print(f"- [{finding['severity']}] {finding['title']}")
                 
         print("\n📋 RECOMMENDATIONS:")
-        if any(f['severity'] == 'CRITICAL' for f in self.findings):
+        if severity_counts.get('CRITICAL'):
             print("- IMMEDIATE: Address critical security issues")
-        if any('Missing' in f['title'] for f in self.findings):
+        if self.findings_store.exists(title_contains='Missing'):
             print("- Add missing security headers")
-        if any('XSS' in f['title'] for f in self.findings):
+        if self.findings_store.exists(title_contains='XSS'):
             print("- Implement input validation and output encoding")
-        if any('Authentication' in f['title'] for f in self.findings):
+        if self.findings_store.exists(title_contains='Authentication'):
             print("- Review authentication and authorization controls")
             
+        if self.transport.cache is not None:
+            print(f"♻️  {self.transport.cache.summary()}")
+        if self.transport.throttle_summary():
+            print(f"🚦 {self.transport.throttle_summary()}")
+        if self.transport.http2_summary():
+            print(f"🔀 {self.transport.http2_summary()}")
+        if self.transport.metrics is not None:
+            print(f"📈 {self.transport.metrics.summary()}")
+        if self.profiler is not None:
+            # There is no report file, so the hot spots and allocators get one of their own
+            print(f"🔬 {self.profiler.summary()}")
+            for function, calls, own, _ in self.profiler.hot_spots(5):
+                print(f"   {own:.3f}s  {function} ({calls} calls)")
+            print(f"   Top hot spots and allocators: {self.profiler.write_markdown()}")
+        if self.rescan is not None:
+            print(f"🔁 {self.rescan.summary()}")
+        if self.findings_store.path:
+            print(f"🗃️  Findings stored in {self.findings_store.path} (run {self.findings_store.run_id})")
+            
         print("\n✅ Assessment Complete!")
         
+    def tests(self):
+        """Every test, in the order they run"""
+        return (self.test_security_headers, self.test_admin_endpoints, self.test_contact_form_xss,
+                self.test_authentication_bypass, self.test_information_disclosure, self.test_basic_ssl)
+
+    def run_tests(self):
+        """Run every test in order; tests a resumed checkpoint already completed are skipped"""
+        tests = self.tests()
+        self.console.add_total(len(tests))
+        step = self.checkpoint.step if self.profiler is None else self.profiler.wrap(self.checkpoint.step)
+        try:
+            for test in tests:
+                with module_scope(test.__name__):
+                    step(test.__name__, test)
+                self.console.advance(test.__name__)
+        finally:
+            if self.profiler is not None:
+                self.profiler.close()
+
     def run_all_tests(self):
         print(f"🚀 Starting Quick Security Assessment")
-        print(f"Target: {TARGET_URL}")
+        print(f"Target: {self.target}")
         print("="*60)
         
         try:
-            self.test_security_headers()
-            self.test_admin_endpoints()
-            self.test_contact_form_xss()
-            self.test_authentication_bypass()
-            self.test_information_disclosure()
-            self.test_basic_ssl()
-            
+            self.run_tests()
             self.generate_report()
             
         except KeyboardInterrupt:
+            self.console.close()
             print("\n⏹️  Assessment interrupted by user")
+            if self.checkpoint.path:
+                print(f"💾 Progress saved to {self.checkpoint.path}; rerun with --resume to continue")
         except Exception as e:
+            self.console.close()
             print(f"\n❌ Assessment failed: {e}")
+        finally:
+            self.transport.close()
+            self.checkpoint.close()
+            self.findings_store.close()
+            self.console.close()
+            if self.rescan is not None:
+                self.rescan.save()
+
+def run_batch(args, console):
+    """Run the quick tests against every target in args.targets through one shared transport and findings store"""
+    targets = read_targets(args.targets)
+    print(f"🚀 Starting Quick Security Assessment of {len(targets)} targets ({args.max_targets} at a time)")
+    print(f"Concurrency: {args.global_concurrency} in flight overall, adaptive up to {args.per_host} per host")
+    print("="*60)
+
+    # One transport for the whole batch: its global semaphore is the shared budget, per-host ones keep it fair
+    metrics = ProbeMetrics()
+    metrics_server = serve_metrics(metrics, args.metrics_port)
+    transport = AsyncTransport(max_concurrency=args.global_concurrency, per_host_limit=args.per_host,
+                               cache=ResponseCache(), http2=args.http2, metrics=metrics)
+    findings_store = FindingsStore(args.findings_db, 'quick_portfolio_test', 'batch')
+    console.watch(transport)
+
+    def scan(target):
+        tester = QuickSecurityTest(transport=transport, findings_store=findings_store.scoped(target), console=console,
+                                   target=target)
+        tester.run_tests()
+
+    def target_done(target, error):
+        console.info(f"❌ {target}: {error}" if error else f"✅ {target} done")
+
+    batch = TargetBatch(targets, args.max_targets)
+    try:
+        batch.run(scan, on_done=target_done)
+        console.close()
+
+        print("\n" + "="*60)
+        print("📊 BATCH ASSESSMENT SUMMARY")
+        print("="*60)
+        for target in targets:
+            if target in batch.errors:
+                print(f"\n{target}: failed ({batch.errors[target]})")
+                continue
+            counts = findings_store.severity_counts(target=target)
+            print(f"\n{target}: {sum(counts.values())} findings")
+            for severity in ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO']:
+                if counts.get(severity):
+                    print(f"  {severity}: {counts[severity]} findings")
+            for finding in findings_store.scoped(target).query(severity=('CRITICAL', 'HIGH')):
+                print(f"  - [{finding['severity']}] {finding['title']}")
+        if transport.cache is not None:
+            print(f"\n♻️  {transport.cache.summary()}")
+        if transport.throttle_summary():
+            print(f"🚦 {transport.throttle_summary()}")
+        if transport.http2_summary():
+            print(f"🔀 {transport.http2_summary()}")
+        print(f"📈 {metrics.summary()}")
+        print(f"🗃️  Findings stored in {args.findings_db} (run {findings_store.run_id})")
+        print("\n✅ Assessment Complete!")
+    except KeyboardInterrupt:
+        console.close()
+        print("\n⏹️  Assessment interrupted by user")
+    finally:
+        transport.close()
+        findings_store.close()
+        console.close()
+        export_metrics(metrics, metrics_server, args.metrics_json)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Quick Security Test for the portfolio')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run, skipping every test it already completed')
+    parser.add_argument('--checkpoint', default='quick_portfolio_test.checkpoint.jsonl',
+                        help='file that records test progress (default: %(default)s)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='revalidate responses from the last run instead of downloading them again')
+    parser.add_argument('--fingerprints', default='quick_portfolio_test.fingerprints.json',
+                        help='file that keeps response fingerprints between runs (default: %(default)s)')
+    parser.add_argument('--findings-db', default='portfolio_findings.db',
+                        help='SQLite database findings are appended to (default: %(default)s)')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('-q', '--quiet', action='store_true',
+                        help='show only a progress bar while testing; findings go to the summary')
+    output.add_argument('-v', '--verbose', action='store_true',
+                        help='also print every completed test')
+    parser.add_argument('--metrics-json', default='quick_portfolio_test.metrics.json',
+                        help='JSON file for per-module and per-endpoint request timings (default: %(default)s)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='serve live Prometheus metrics at http://127.0.0.1:PORT/metrics while testing')
+    parser.add_argument('--http2', action='store_true',
+                        help='multiplex requests over one HTTP/2 connection per host (needs the h2 package); '
+                             'hosts without HTTP/2 stay on HTTP/1.1')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile CPU time and allocations of each test and write the hot spots and top '
+                             'allocators next to the raw profiles')
+    parser.add_argument('--profile-dir', default='quick_portfolio_test.profile',
+                        help='directory for the raw .prof and tracemalloc files (default: %(default)s)')
+    batch = parser.add_argument_group('batch mode')
+    batch.add_argument('--targets', metavar='FILE',
+                       help='test every target URL listed in FILE (one per line) instead of the portfolio')
+    batch.add_argument('--max-targets', type=int, default=8,
+                       help='targets tested at the same time (default: %(default)s)')
+    batch.add_argument('--global-concurrency', type=int, default=64,
+                       help='requests in flight across all targets (default: %(default)s)')
+    batch.add_argument('--per-host', type=int, default=16,
+                       help='ceiling for the adaptive per-host limit (default: %(default)s)')
+    args = parser.parse_args()
+    if args.http2 and not HTTP2_AVAILABLE:
+        parser.error('--http2 needs the h2 package (pip install h2)')
+    
+    console = Console('quiet' if args.quiet else 'verbose' if args.verbose else 'normal', unit='tests')
+    if args.targets:
+        # Checkpoints and fingerprints describe a single target, so batch runs start fresh
+        if args.resume or args.incremental:
+            parser.error('--resume and --incremental apply to single-target runs only')
+        # Profiles are per test of one run in this process
+        if args.profile:
+            parser.error('--profile applies to single-target runs only')
+        run_batch(args, console)
+        sys.exit(0)
+    
     print("Portfolio Security Quick Test")
     print("Target: https://my-digital-portfolio-git-main-sajal-basnets-projects.vercel.app/")
     print()
     
-    tester = QuickSecurityTest()
-    tester.run_all_tests()
\ No newline at end of file
+    checkpoint = Checkpoint(args.checkpoint, 'quick_portfolio_test', TARGET_URL, resume=args.resume)
+    if checkpoint.resumed:
+        print(f"⏯️  Resuming: {len(checkpoint.completed)} completed tests, "
+              f"{len(checkpoint.findings)} findings restored")
+    rescan = RescanStore(args.fingerprints, TARGET_URL) if args.incremental else None
+    findings_store = FindingsStore(args.findings_db, 'quick_portfolio_test', TARGET_URL)
+    metrics = ProbeMetrics()
+    metrics_server = serve_metrics(metrics, args.metrics_port)
+    tester = QuickSecurityTest(checkpoint=checkpoint, rescan=rescan, findings_store=findings_store, console=console,
+                               http2=args.http2, metrics=metrics,
+                               profile_dir=args.profile_dir if args.profile else None)
+    tester.run_all_tests()
+    export_metrics(metrics, metrics_server, args.metrics_json)
\ No newline at end of file
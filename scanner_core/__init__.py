@@ -0,0 +1,81 @@
+"""
+Shared probe infrastructure for the portfolio security scanners
+"""
+
+from .baseline import SpaBaseline
+from .batch import TargetBatch, read_targets, target_slug
+from .breaker import CircuitBreaker, CircuitOpen
+from .cache import ResponseCache
+from .checkpoint import Checkpoint
+from .console import Console
+from .findings import FindingsStore, FindingsView
+from .http2 import HTTP2_AVAILABLE
+from .load import BurstResult, OpenLoopBurst
+from .matcher import IndicatorHits, IndicatorMatcher, IndicatorStream
+from .metrics import MetricsServer, ProbeMetrics, RequestTiming, export_metrics, module_scope, serve_metrics
+from .modules import ExclusiveGate, ModuleRegistry, ScanModule
+from .plan import PlanExecutor, Probe, ProbePlan
+from .profiling import ModuleProfiler
+from .race import RaceEngine, RaceResult
+from .report import ReportWriter
+from .rescan import RescanStore
+from .shard import Coordinator, Shard, WorkerStats, make_shards, parse_address, run_worker
+from .sniff import SNIFF_BYTES, range_headers, sniff_artifact, total_size
+from .throttle import HostThrottle
+from .transport import AsyncTransport, Response
+from .wordlist import BloomFilter, PathDiscovery, PrefixTrie, estimate_entries, stream_wordlist
+
+__all__ = [
+    'AsyncTransport',
+    'BloomFilter',
+    'BurstResult',
+    'Checkpoint',
+    'CircuitBreaker',
+    'CircuitOpen',
+    'Console',
+    'Coordinator',
+    'ExclusiveGate',
+    'FindingsStore',
+    'FindingsView',
+    'HTTP2_AVAILABLE',
+    'HostThrottle',
+    'IndicatorHits',
+    'IndicatorMatcher',
+    'IndicatorStream',
+    'MetricsServer',
+    'ModuleProfiler',
+    'ModuleRegistry',
+    'OpenLoopBurst',
+    'PathDiscovery',
+    'PlanExecutor',
+    'PrefixTrie',
+    'Probe',
+    'ProbeMetrics',
+    'ProbePlan',
+    'RaceEngine',
+    'RaceResult',
+    'ReportWriter',
+    'RequestTiming',
+    'RescanStore',
+    'Response',
+    'ResponseCache',
+    'SNIFF_BYTES',
+    'ScanModule',
+    'Shard',
+    'SpaBaseline',
+    'TargetBatch',
+    'WorkerStats',
+    'estimate_entries',
+    'export_metrics',
+    'make_shards',
+    'module_scope',
+    'parse_address',
+    'range_headers',
+    'read_targets',
+    'run_worker',
+    'serve_metrics',
+    'sniff_artifact',
+    'stream_wordlist',
+    'target_slug',
+    'total_size'
+]
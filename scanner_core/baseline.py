@@ -0,0 +1,111 @@
+"""
+SPA catch-all baseline fingerprinting
+The deployment rewrites every unknown path to /index.html with a 200, so most
+discovery probes come back as the same shell. Fingerprinting that shell once
+per host lets probes recognise it by length and hash and skip keyword analysis.
+"""
+
+import asyncio
+import hashlib
+import secrets
+from urllib.parse import urlsplit
+
+
+class SpaBaseline:
+    """Per-host fingerprint of the page served for paths the application does not know"""
+
+    # Enough of the shell to recognise a ranged or capped read of it
+    HEAD_BYTES = 4096
+
+    def __init__(self, transport, samples=2, timeout=10):
+        self.transport = transport
+        self.samples = samples
+        self.timeout = timeout
+        self.stats = {'matches': 0, 'misses': 0}
+        self._fingerprints = {}
+        self._heads = {}
+
+    @staticmethod
+    def origin(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    @staticmethod
+    def fingerprint(response):
+        return response.status_code, len(response.content), hashlib.sha256(response.content).digest()
+
+    def learn(self, target):
+        """Fetch the catch-all baseline for a target's host once; returns None if it is not stable"""
+        origin = self.origin(target)
+        if origin not in self._fingerprints:
+            self.transport.run(self._sample(origin))
+        return self._fingerprints[origin]
+
+    async def alearn(self, target):
+        origin = self.origin(target)
+        if origin not in self._fingerprints:
+            await self._sample(origin)
+        return self._fingerprints[origin]
+
+    async def _sample(self, origin):
+        paths = [f"/{secrets.token_hex(8)}/{secrets.token_hex(6)}" for _ in range(self.samples)]
+        responses = await asyncio.gather(
+            *(self.transport.arequest('GET', f"{origin}{path}", timeout=self.timeout, cache=False)
+              for path in paths),
+            return_exceptions=True)
+
+        fingerprints = set()
+        for response in responses:
+            if isinstance(response, BaseException) or response.truncated:
+                self._fingerprints[origin] = None
+                return
+            fingerprints.add(self.fingerprint(response))
+
+        # A catch-all that varies per request (nonces, timestamps) cannot be short-circuited safely
+        if len(fingerprints) != 1:
+            self._fingerprints[origin] = None
+            return
+        self._fingerprints[origin] = fingerprints.pop()
+        self._heads[origin] = responses[0].content[:self.HEAD_BYTES]
+
+    def excludes(self, response):
+        """True when the status line and headers alone prove a response is not the catch-all"""
+        expected = self._fingerprints.get(self.origin(response.url))
+        if expected is None or response.status_code != expected[0]:
+            return True
+        # Content-Length is the encoded size, so it only says something about identity bodies
+        length = response.headers.get('Content-Length')
+        if length is None or response.headers.get('Content-Encoding'):
+            return False
+        return length.strip().isdigit() and int(length) != expected[1]
+
+    def matches(self, response):
+        """True when a response is byte-for-byte the host's catch-all page"""
+        expected = self._fingerprints.get(self.origin(response.url))
+        if expected is None or response.truncated or response.status_code != expected[0] \
+                or len(response.content) != expected[1]:
+            self.stats['misses'] += 1
+            return False
+        if hashlib.sha256(response.content).digest() != expected[2]:
+            self.stats['misses'] += 1
+            return False
+        self.stats['matches'] += 1
+        return True
+
+    def matches_head(self, response):
+        """True when a ranged (206) or capped read is a prefix of the host's catch-all page"""
+        origin = self.origin(response.url)
+        expected = self._fingerprints.get(origin)
+        head = self._heads.get(origin)
+        content = response.content
+        # An empty catch-all body is a prefix of everything, so it cannot vouch for any read
+        if expected is None or not head or not content or response.status_code not in (expected[0], 206) \
+                or not head.startswith(content[:len(head)]):
+            self.stats['misses'] += 1
+            return False
+        self.stats['matches'] += 1
+        return True
+
+    def summary(self):
+        return (f"SPA fallback baseline: {self.stats['matches']} responses matched the catch-all "
+                f"and skipped content analysis, {self.stats['misses']} analysed")
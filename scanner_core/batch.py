@@ -0,0 +1,66 @@
+"""
+Multi-target batch runs
+Many deployments are scanned at once by running one tool instance per target
+on a small pool of threads, all sharing a single AsyncTransport. The
+transport's global semaphore is the batch-wide concurrency budget and its
+per-host semaphores cap what any one deployment receives, so throughput grows
+with the number of hosts while no single host is hammered.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+
+def read_targets(path):
+    """Target URLs from a file, one per line; blank lines and # comments are skipped, repeats dropped"""
+    targets = []
+    seen = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            target = line.split('#', 1)[0].strip().rstrip('/')
+            if not target or target in seen:
+                continue
+            if not urlsplit(target).scheme:
+                target = f"https://{target}"
+            seen.add(target)
+            targets.append(target)
+    return targets
+
+
+def target_slug(target):
+    """Filesystem-safe name for a target, used to keep per-target report files apart"""
+    parts = urlsplit(target)
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', f"{parts.netloc}{parts.path}").strip('_') or 'target'
+
+
+class TargetBatch:
+    """Run a scan function for every target, a bounded number of targets at a time"""
+
+    def __init__(self, targets, max_targets=8):
+        self.targets = list(targets)
+        self.max_targets = max_targets
+        self.errors = {}
+
+    def run(self, scan, on_done=None):
+        """Call scan(target) for each target; a failing target is recorded and the batch carries on
+
+        Returns {target: result}. on_done(target, error) is called as each target finishes.
+        """
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=self.max_targets, thread_name_prefix='target')
+        futures = {pool.submit(scan, target): target for target in self.targets}
+        try:
+            for future in as_completed(futures):
+                target = futures[future]
+                error = None
+                try:
+                    results[target] = future.result()
+                except Exception as exc:
+                    error = self.errors[target] = exc
+                if on_done is not None:
+                    on_done(target, error)
+        finally:
+            # On Ctrl-C targets that have not started are dropped; closing the transport ends the rest
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
@@ -0,0 +1,188 @@
+"""
+Endpoint liveness checks and per-endpoint circuit breaking
+Before a payload matrix fans out, every endpoint it targets gets one cheap
+OPTIONS request (HEAD if that goes unanswered); an endpoint that answers
+neither is not sent any payloads. Answers seen earlier in the scan, such as
+the HTTP method sweep, count too, so those endpoints are not asked again.
+During the matrix, a method that fails on an endpoint a number of times in a
+row (no answer, timeout, 502/504) trips the breaker for that endpoint and
+method only, so an edge that drops PUT does not cut off GET and POST. Only
+failures sent after the previous one was seen are in a row: a concurrent batch
+that fails all at once counts once. An open breaker lets one trial probe
+through after a cool-down, and any answer closes it again. Probes using a
+method the endpoint answered with 405 are skipped too.
+"""
+
+import asyncio
+import threading
+import time
+
+# Gateway errors mean the endpoint itself did not answer in time
+FAILURE_STATUSES = (502, 504)
+# Methods that may be sent bare to find out whether an endpoint takes them; the rest can change server state
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+# Breaker key for the whole endpoint, as opposed to one method on it
+ANY_METHOD = None
+
+
+class CircuitOpen(Exception):
+    """Raised in place of sending a probe its endpoint's breaker blocks"""
+
+
+class CircuitBreaker:
+    """Per-endpoint and method failure counts, refused methods and the probes skipped because of them"""
+
+    def __init__(self, threshold=3, cooldown=10.0):
+        self.threshold = threshold
+        # Seconds an open breaker waits before letting one trial probe through (half-open)
+        self.cooldown = cooldown
+        # (endpoint, method or ANY_METHOD) -> why its breaker is open
+        self.tripped = {}
+        self.allow = {}
+        self.refused = {}
+        self.accepted = {}
+        # (endpoint, reason) -> probes not sent
+        self.skipped = {}
+        self._unreported = {}
+        # (endpoint, method) -> (failures in a row, when the last one was seen)
+        self._failures = {}
+        # Breaker key -> when it opened or last let a trial through
+        self._opened = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, method, response, sent=None):
+        """Record one request's outcome for endpoint; response None means it got no answer
+
+        sent is when the request went out (time.monotonic()). A failure only
+        adds to the run of failures if it was sent after the last one was
+        seen; leave it out for a request that waited on nothing else.
+        """
+        key = (endpoint, method)
+        with self._lock:
+            self._seen.add(endpoint)
+            if response is None or response.status_code in FAILURE_STATUSES:
+                failures, last = self._failures.get(key, (0, None))
+                if last is None or sent is None or sent >= last:
+                    failures += 1
+                self._failures[key] = (failures, time.monotonic())
+                if failures >= self.threshold:
+                    # A failed trial opens the breaker for another cool-down
+                    self.tripped[key] = f"{method} failed {self.threshold} times in a row"
+                    self._opened[key] = time.monotonic()
+                return
+            # Any answer closes the breaker on this method and shows the endpoint itself is up
+            self._failures.pop(key, None)
+            for closed in (key, (endpoint, ANY_METHOD)):
+                self.tripped.pop(closed, None)
+                self._opened.pop(closed, None)
+            if response.status_code == 405:
+                self.refused.setdefault(endpoint, set()).add(method)
+            else:
+                self.accepted.setdefault(endpoint, set()).add(method)
+            allow = response.headers.get('Allow')
+            if allow and (response.status_code == 405 or method == 'OPTIONS'):
+                self.allow[endpoint] = {m.strip().upper() for m in allow.split(',') if m.strip()}
+
+    def trip(self, endpoint, reason):
+        """Open the breaker for every method on endpoint"""
+        with self._lock:
+            self._seen.add(endpoint)
+            key = (endpoint, ANY_METHOD)
+            self.tripped.setdefault(key, reason)
+            self._opened.setdefault(key, time.monotonic())
+
+    def is_open(self, endpoint, method=ANY_METHOD):
+        with self._lock:
+            return (endpoint, method) in self.tripped
+
+    def blocked(self, endpoint, method):
+        """Why a probe sending method to endpoint should not go out, or None"""
+        now = time.monotonic()
+        with self._lock:
+            for key in ((endpoint, ANY_METHOD), (endpoint, method)):
+                if key not in self.tripped:
+                    continue
+                if now - self._opened[key] < self.cooldown:
+                    return f"circuit open: {self.tripped[key]}"
+                # Half-open: this probe is the trial, and the next one waits another cool-down
+                self._opened[key] = now
+            if method in self.refused.get(endpoint, ()) and method not in self.accepted.get(endpoint, ()):
+                return f"{method} answered 405"
+        return None
+
+    def gate(self, endpoint, method):
+        """A transport gate that raises CircuitOpen if the probe is blocked by the time it would be sent"""
+        def check():
+            reason = self.blocked(endpoint, method)
+            if reason is not None:
+                raise CircuitOpen(reason)
+        return check
+
+    def skip(self, endpoint, reason, count=1):
+        with self._lock:
+            key = (endpoint, reason)
+            self.skipped[key] = self.skipped.get(key, 0) + count
+            self._unreported[key] = self._unreported.get(key, 0) + count
+
+    def take_unreported(self):
+        """Skips recorded since the last call, for passing on to another process's breaker"""
+        with self._lock:
+            unreported, self._unreported = self._unreported, {}
+        return unreported
+
+    # ------------------------------------------------------------------
+    # Liveness and method check
+    # ------------------------------------------------------------------
+
+    def check(self, transport, target, endpoints, timeout=5):
+        return transport.run(self.acheck(transport, target, endpoints, timeout))
+
+    async def acheck(self, transport, target, endpoints, timeout=5):
+        """Check each endpoint a plan targets before its payloads go out
+
+        endpoints maps endpoint -> methods the plan sends to it. An endpoint
+        already seen this scan is not asked again. A safe method left out of
+        the endpoint's Allow header is tried once without a payload, since
+        Allow headers are often wrong; only a 405 to that request prunes the
+        method. Unsafe methods are never sent bare, as a POST, PUT or DELETE
+        can change server state; their probes go out, and a 405 to the first
+        one prunes the rest.
+        """
+        async def send(endpoint, method):
+            sent = time.monotonic()
+            try:
+                response = await transport.arequest(method, f"{target}{endpoint}", timeout=timeout, cache=False)
+            except Exception:
+                response = None
+            self.observe(endpoint, method, response, sent)
+            return response
+
+        async def check(endpoint, methods):
+            if endpoint not in self._seen:
+                if await send(endpoint, 'OPTIONS') is None and await send(endpoint, 'HEAD') is None:
+                    self.trip(endpoint, 'no answer to OPTIONS or HEAD')
+                    return
+            allow = self.allow.get(endpoint)
+            if allow is None or self.is_open(endpoint):
+                return
+            for method in sorted(methods):
+                known = method in self.refused.get(endpoint, ()) or method in self.accepted.get(endpoint, ())
+                if method in SAFE_METHODS and method not in allow and not known:
+                    await send(endpoint, method)
+
+        await asyncio.gather(*(check(endpoint, methods) for endpoint, methods in endpoints.items()))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def skipped_total(self):
+        return sum(self.skipped.values())
+
+    def summary(self):
+        total = self.skipped_total()
+        if not total:
+            return f"Circuit breaker: no probes skipped ({len(self._seen)} endpoints checked)"
+        endpoints = len({endpoint for endpoint, _ in self.skipped})
+        return f"Circuit breaker: {total} probes skipped on {endpoints} endpoints"
@@ -0,0 +1,135 @@
+"""
+Request-level response cache shared by every module and tool using the transport
+Only side-effect free methods are cached; unsafe requests to a URL invalidate it
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU + TTL cache keyed by method, URL, headers and body hash"""
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, max_entries=2048, ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'expired': 0,
+            'invalidations': 0
+        }
+
+        self._entries = OrderedDict()
+        self._by_url = {}
+        self._inflight = {}
+        self._generation = {}
+
+    @staticmethod
+    def make_key(method, url, headers, body):
+        header_items = tuple(sorted((k.lower(), str(v)) for k, v in (headers or {}).items()))
+        body_hash = hashlib.sha256(body or b'').hexdigest()
+        return (method.upper(), url, header_items, body_hash)
+
+    def is_cacheable(self, method):
+        return method.upper() in self.SAFE_METHODS
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if self.clock() - stored_at > self.ttl:
+            self._remove(key)
+            self.stats['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key, response):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (self.clock(), response)
+        self._by_url.setdefault(key[1], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, url):
+        """Drop cached responses for a URL after a request that may have changed it"""
+        self._generation[url] = self._generation.get(url, 0) + 1
+        for key in list(self._by_url.get(url, ())):
+            self._remove(key)
+            self.stats['invalidations'] += 1
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_url.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_url[key[1]]
+
+    async def fetch(self, key, fetcher):
+        """Return a cached response, join an identical in-flight request, or call fetcher()"""
+        response = self.get(key)
+        if response is not None:
+            self.stats['hits'] += 1
+            return response
+
+        url = key[1]
+        flight_key = (key, self._generation.get(url, 0))
+        pending = self._inflight.get(flight_key)
+        if pending is not None:
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    raise ConnectionError('Coalesced request was cancelled')
+                raise
+
+        self.stats['misses'] += 1
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = pending
+        try:
+            response = await fetcher()
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except BaseException as e:
+            pending.set_exception(e)
+            # Mark retrieved so a failed flight nobody joined does not log a warning
+            pending.exception()
+            raise
+        finally:
+            self._inflight.pop(flight_key, None)
+
+        pending.set_result(response)
+        # Do not store transient failures, nor anything fetched before an invalidation
+        if response.status_code != 429 and response.status_code < 500 \
+                and self._generation.get(url, 0) == flight_key[1]:
+            self.put(key, response)
+        return response
+
+    @property
+    def saved_round_trips(self):
+        return self.stats['hits'] + self.stats['coalesced']
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['coalesced'] + self.stats['misses']
+        ratio = (self.saved_round_trips / lookups * 100) if lookups else 0.0
+        return (f"Response cache: {self.stats['hits']} hits, {self.stats['coalesced']} coalesced, "
+                f"{self.stats['misses']} misses ({ratio:.1f}% of cacheable requests, "
+                f"{self.saved_round_trips} round trips saved)")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,130 @@
+"""
+Resumable scan checkpoints
+Progress is journalled to an append-only JSONL file as the scan runs: a
+header naming the tool and target, one line per completed step or probe,
+and one line per finding tagged with the step that produced it. Resuming
+replays the journal, keeps findings from completed work and skips it; a
+step that was cut off part-way is run again from the start.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class Checkpoint:
+    """Journal of completed step/probe IDs and the findings they produced"""
+
+    def __init__(self, path=None, tool=None, target=None, resume=False):
+        self.path = path
+        self.tool = tool
+        self.target = target
+        self.completed = set()
+        self.findings = []
+        self.resumed = False
+        self.skipped = 0
+        # Modules may run on several threads at once, so each thread nests its own steps
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+        self._torn = False
+
+        if path is None:
+            return
+        if resume and os.path.exists(path):
+            self.resumed = self._load()
+        self._file = open(path, 'a' if self.resumed else 'w', encoding='utf-8')
+        if self.resumed and self._torn:
+            # End the half-written line, or the next entry would be glued onto it and lost too
+            self._file.write('\n')
+        if not self.resumed:
+            self._append({'tool': tool, 'target': target, 'started': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            content = f.read()
+        self._torn = bool(content) and not content.endswith('\n')
+        lines = content.splitlines()
+        if not lines:
+            return False
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return False
+        # A checkpoint from another tool or target is not ours to resume
+        if header.get('tool') != self.tool or header.get('target') != self.target:
+            return False
+
+        findings = []
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line may be half-written if the process was killed mid-write
+                continue
+            if 'done' in entry:
+                self.completed.add(entry['done'])
+            elif 'finding' in entry:
+                findings.append((entry.get('scope'), entry['finding']))
+
+        self.findings = [finding for scope, finding in findings if scope is None or scope in self.completed]
+        return True
+
+    def _append(self, entry):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.write(json.dumps(entry, default=str) + '\n')
+            self._file.flush()
+
+    @property
+    def _scopes(self):
+        scopes = getattr(self._local, 'scopes', None)
+        if scopes is None:
+            scopes = self._local.scopes = []
+        return scopes
+
+    @property
+    def scope(self):
+        return self._scopes[-1] if self._scopes else None
+
+    def is_done(self, step_id):
+        return step_id in self.completed
+
+    def push(self, step_id):
+        self._scopes.append(step_id)
+
+    def pop(self):
+        self._scopes.pop()
+
+    def complete(self, step_id):
+        self.completed.add(step_id)
+        self._append({'done': step_id})
+
+    def record(self, finding):
+        """Journal a finding against the innermost running step"""
+        self._append({'finding': finding, 'scope': self.scope})
+
+    def step(self, step_id, func, *args, **kwargs):
+        """Run func unless a resumed run already completed step_id; steps may nest"""
+        if step_id in self.completed:
+            self.skipped += 1
+            return None
+        self.push(step_id)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            self.pop()
+        self.complete(step_id)
+        return result
+
+    def summary(self):
+        return (f"Checkpoint {self.path}: {len(self.completed)} steps/probes completed, "
+                f"{self.skipped} skipped on resume, {len(self.findings)} findings restored")
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+            self._file = None
@@ -0,0 +1,165 @@
+"""
+Buffered console output
+Findings, banners and progress are queued and written by a background thread
+in batches, so the threads issuing requests never wait on the terminal.
+Three modes: quiet shows only a live progress bar (probes done, req/s, ETA),
+normal prints findings and section banners as before, and verbose adds a
+line per completed probe.
+"""
+
+import queue
+import sys
+import threading
+import time
+
+
+class Console:
+    """Non-blocking output sink shared by a tool's tests and its plan executor"""
+
+    MODES = ('quiet', 'normal', 'verbose')
+    BAR_WIDTH = 30
+
+    def __init__(self, mode='normal', stream=None, interval=0.1, unit='probes'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown console mode: {mode}")
+        self.mode = mode
+        # None means whatever sys.stdout is at write time, so redirection still works
+        self.stream = stream
+        self.interval = interval
+        # What the progress bar counts: plan probes, or whole tests for tools without plans
+        self.unit = unit
+        self.total = 0
+        self.done = 0
+        self.findings = 0
+        self._transport = None
+        self._started = time.perf_counter()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='console', daemon=True)
+        self._thread.start()
+
+    @property
+    def quiet(self):
+        return self.mode == 'quiet'
+
+    @property
+    def verbose(self):
+        return self.mode == 'verbose'
+
+    def watch(self, transport):
+        """Take the request rate shown on the progress bar from this transport's stats"""
+        if self._transport is None:
+            self._transport = transport
+
+    # ------------------------------------------------------------------
+    # Producers: every call only enqueues
+    # ------------------------------------------------------------------
+
+    def info(self, text=''):
+        """Banners and status lines; hidden in quiet mode"""
+        if not self.quiet:
+            self._put(f"{text}\n")
+
+    def debug(self, text):
+        if self.verbose:
+            self._put(f"{text}\n")
+
+    def finding(self, headline, details=None):
+        """A finding's headline and optional details line; counted on the bar in quiet mode"""
+        self.findings += 1
+        if self.quiet:
+            return
+        self._put(f"{headline}\n" if details is None else f"{headline}\n{details}\n")
+
+    def add_total(self, count):
+        self.total += count
+
+    def advance(self, label=None):
+        """Mark one probe or test complete"""
+        self.done += 1
+        if label is not None:
+            self.debug(f"  ✓ {label}")
+
+    def __call__(self, text=''):
+        # Lets the console stand in for print() as a plan executor's announce callback
+        self.info(text)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _out(self):
+        return self.stream or sys.stdout
+
+    def _put(self, text):
+        if self._thread.is_alive():
+            self._queue.put(text)
+        else:
+            # Once closed (e.g. while the final report is printed) output goes straight through
+            self._out().write(text)
+
+    def _bar(self):
+        elapsed = max(time.perf_counter() - self._started, 1e-6)
+        requests = self._transport.stats['requests'] if self._transport is not None else 0
+        total = max(self.total, self.done)
+        filled = int(self.BAR_WIDTH * self.done / total) if total else 0
+        eta = '--:--'
+        if self.done and total > self.done:
+            remaining = int(elapsed / self.done * (total - self.done))
+            eta = f"{remaining // 60:d}:{remaining % 60:02d}"
+        return (f"\r[{'#' * filled}{'.' * (self.BAR_WIDTH - filled)}] {self.done}/{total} {self.unit}  "
+                f"{requests / elapsed:6.1f} req/s  ETA {eta}  findings {self.findings} ")
+
+    def _run(self):
+        while True:
+            try:
+                items = [self._queue.get(timeout=self.interval)]
+            except queue.Empty:
+                items = []
+            # Drain whatever else is waiting so it goes out in one write
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            waiters = []
+            text = []
+            for item in items:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    text.append(item)
+
+            out = self._out()
+            try:
+                if text:
+                    out.write(''.join(text))
+                if self.quiet:
+                    out.write(self._bar() + ('\n' if stop else ''))
+                if text or self.quiet:
+                    out.flush()
+            except (OSError, ValueError):
+                # The stream went away (closed pipe, torn-down redirect); output is best effort
+                pass
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far has been written"""
+        if not self._thread.is_alive():
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait(timeout)
+
+    def close(self, timeout=5):
+        """Write what is queued, end the progress bar line and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
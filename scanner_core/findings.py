@@ -0,0 +1,264 @@
+"""
+Indexed on-disk findings store
+Findings are appended to a SQLite table as they are logged instead of piling
+up in per-tool lists. Each row keeps the finding exactly as the tool built it,
+alongside the columns reports filter on (run, severity, category, endpoint),
+so severity counts and per-severity listings are index lookups and a
+multi-target run holds no findings in memory.
+
+Repeats of the same weakness (same title, endpoint and matched signal, only
+the payload differs) are folded into the first row as an occurrence count
+plus a few sample payloads rather than stored again. The row to fold into
+is found through an index and updated in place with json_set, so folding
+keeps nothing in memory either.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# A path in a finding title ("... detected: /api/contact", "PUT /api") or its details
+ENDPOINT = re.compile(r"(?:^|\s)(/[^\s'\",;]*)")
+
+# Detail keys that hold what was sent rather than what was observed; they vary within a group
+SAMPLE_KEYS = ('payload', 'filename')
+MAX_SAMPLES = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    tool TEXT,
+    target TEXT,
+    severity TEXT NOT NULL,
+    category TEXT,
+    endpoint TEXT,
+    title TEXT,
+    signal TEXT,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    finding TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id, id);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (run_id, severity, id);
+CREATE INDEX IF NOT EXISTS findings_category ON findings (run_id, category);
+CREATE INDEX IF NOT EXISTS findings_endpoint ON findings (run_id, endpoint);
+CREATE INDEX IF NOT EXISTS findings_target ON findings (run_id, target, severity);
+CREATE INDEX IF NOT EXISTS findings_fold ON findings (run_id, target, severity, title, endpoint, signal);
+"""
+
+# The group a repeat folds into; json_array keeps details' JSON type whether it is an object or a string
+FOLD_GROUP = """
+SELECT id, occurrences, json_extract(finding, '$.samples'), json_array(json_extract(finding, '$.details'))
+FROM findings
+WHERE run_id = ? AND target IS ? AND severity = ? AND title = ? AND endpoint IS ? AND signal = ?
+ORDER BY id LIMIT 1
+"""
+
+
+def classify(title, details=None):
+    """(category, endpoint) of a finding: the title before ': ' and the first path it names"""
+    category, sep, rest = title.partition(': ')
+    if not sep:
+        category, rest = title, ''
+    match = ENDPOINT.search(rest)
+    if match is None and isinstance(details, str):
+        match = ENDPOINT.search(details)
+    return category.strip(), match.group(1) if match else None
+
+
+def signal_and_sample(details):
+    """Split details into the observed signal (grouping key) and the payload that triggered it"""
+    if isinstance(details, dict):
+        sample = {k: details[k] for k in SAMPLE_KEYS if k in details}
+        signal = {k: v for k, v in details.items() if k not in SAMPLE_KEYS}
+        return json.dumps(signal, sort_keys=True, default=str), sample or details
+    # Free-text details are the evidence itself, so they are the sample
+    return '', details
+
+
+class FindingsView:
+    """Live, query-backed stand-in for a findings list: iterable, sized and truthy"""
+
+    def __init__(self, store, **filters):
+        self.store = store
+        self.filters = filters
+
+    def __iter__(self):
+        return self.store.query(**self.filters)
+
+    def __len__(self):
+        return self.store.count(**self.filters)
+
+    def __bool__(self):
+        return self.store.exists(**self.filters)
+
+
+class FindingsStore:
+    """Append-only SQLite table of findings, one run ID per scan"""
+
+    # Rows are written immediately but committed in batches to keep fsyncs off the hot path
+    COMMIT_EVERY = 200
+
+    def __init__(self, path=None, tool=None, target=None, run_id=None, aggregate=True):
+        self.path = path
+        self.tool = tool
+        self.target = target
+        self.run_id = run_id or f"{tool or 'scan'}-{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}"
+        self.aggregate = aggregate
+        self.folded = 0
+        # Set on stores handed out by scoped(): they filter on their target and share the connection
+        self._scope = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Findings arrive from the transport's loop thread as well as the main thread
+        self._db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        if path:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def add(self, severity, finding):
+        """Record one finding dict (with a 'title' or 'message') under this run
+
+        Returns True for a new finding and False when it was folded into an
+        earlier one with the same title, endpoint and signal.
+        """
+        title = finding.get('title') or finding.get('message') or ''
+        category, endpoint = classify(title, finding.get('details'))
+        signal, sample = signal_and_sample(finding.get('details'))
+
+        with self._lock:
+            group = None
+            if self.aggregate:
+                group = self._db.execute(FOLD_GROUP, (self.run_id, self.target, severity, title, endpoint,
+                                                      signal)).fetchone()
+            if group is not None:
+                self._fold(group, sample)
+            else:
+                self._db.execute(
+                    'INSERT INTO findings (run_id, tool, target, severity, category, endpoint, title, signal, '
+                    'finding) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (self.run_id, self.tool, self.target, severity, category, endpoint, title, signal,
+                     json.dumps(finding, default=str)))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+        return group is None
+
+    def _fold(self, group, sample):
+        row_id, occurrences, stored, details = group
+        # The first repeat starts the sample list with the payload of the finding it folds into
+        samples = json.loads(stored) if stored else [signal_and_sample(json.loads(details)[0])[1]]
+        # Compared the way it would be stored, since the stored samples have been through JSON
+        sample = json.loads(json.dumps(sample, default=str))
+        added = len(samples) < MAX_SAMPLES and sample not in samples
+        if added:
+            samples.append(sample)
+        if added or not stored:
+            self._db.execute("UPDATE findings SET occurrences = ?, finding = json_set(finding, '$.occurrences', ?, "
+                             "'$.samples', json(?)) WHERE id = ?",
+                             (occurrences + 1, occurrences + 1, json.dumps(samples), row_id))
+        else:
+            self._db.execute("UPDATE findings SET occurrences = ?, finding = json_set(finding, '$.occurrences', ?) "
+                             "WHERE id = ?", (occurrences + 1, occurrences + 1, row_id))
+        self.folded += 1
+
+    def scoped(self, target):
+        """A view of this store for one target of a batch: same database and run, rows tagged with target"""
+        child = FindingsStore.__new__(FindingsStore)
+        child.__dict__.update(self.__dict__)
+        child.target = target.rstrip('/')
+        child.folded = 0
+        child._scope = child.target
+        return child
+
+    def _where(self, run_id=None, severity=None, category=None, endpoint=None, title_contains=None, target=None):
+        clauses, params = ['run_id = ?'], [run_id or self.run_id]
+        target = target or self._scope
+        if target is not None:
+            clauses.append('target = ?')
+            params.append(target)
+        if severity is not None:
+            if isinstance(severity, str):
+                clauses.append('severity = ?')
+                params.append(severity)
+            else:
+                clauses.append(f"severity IN ({', '.join('?' * len(severity))})")
+                params.extend(severity)
+        if category is not None:
+            clauses.append('category = ?')
+            params.append(category)
+        if endpoint is not None:
+            clauses.append('endpoint = ?')
+            params.append(endpoint)
+        if title_contains is not None:
+            # instr() is case-sensitive, like Python's "in"
+            clauses.append('instr(title, ?) > 0')
+            params.append(title_contains)
+        return ' AND '.join(clauses), params
+
+    def query(self, limit=None, **filters):
+        """Yield matching finding dicts in the order they were logged"""
+        where, params = self._where(**filters)
+        sql = f'SELECT finding FROM findings WHERE {where} ORDER BY id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        # The lock is only held while fetching, so callers may log findings while iterating
+        with self._lock:
+            rows = self._db.execute(sql, params)
+            batch = rows.fetchmany(500)
+        while batch:
+            for (finding,) in batch:
+                yield json.loads(finding)
+            with self._lock:
+                batch = rows.fetchmany(500)
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(*) FROM findings WHERE {where}', params).fetchone()[0]
+
+    def exists(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._db.execute(f'SELECT 1 FROM findings WHERE {where} LIMIT 1', params).fetchone() is not None
+
+    def severity_counts(self, run_id=None, target=None):
+        """{severity: count} for one run (and one target of a batch)"""
+        where, params = self._where(run_id=run_id, target=target)
+        with self._lock:
+            rows = self._db.execute(f'SELECT severity, COUNT(*) FROM findings WHERE {where} GROUP BY severity',
+                                    params).fetchall()
+        return dict(rows)
+
+    def targets(self, run_id=None):
+        """Targets with findings in one run, in the order their first finding was logged"""
+        with self._lock:
+            rows = self._db.execute('SELECT target FROM findings WHERE run_id = ? GROUP BY target ORDER BY MIN(id)',
+                                    (run_id or self.run_id,)).fetchall()
+        return [target for (target,) in rows]
+
+    def view(self, **filters):
+        return FindingsView(self, **filters)
+
+    def flush(self):
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self):
+        if self._db is None:
+            return
+        self.flush()
+        if self._scope is not None:
+            # The connection belongs to the batch's store, which closes it
+            self._db = None
+            return
+        with self._lock:
+            self._db.close()
+        self._db = None
@@ -0,0 +1,310 @@
+"""
+Optional HTTP/2 sessions for AsyncTransport
+With the h2 package installed, the transport can carry every request to a
+host as a stream on one multiplexed connection, instead of holding one
+HTTP/1.1 connection per request in flight. HTTPS hosts are offered h2 via
+ALPN. Plain-HTTP hosts are tried with prior knowledge (h2c). A host that
+does not speak HTTP/2 is remembered and stays on the HTTP/1.1 pool. Response
+bodies are acknowledged to the server only as they are consumed, so flow
+control rather than buffering limits what a slow reader holds. A read stopped
+early resets just its own stream, and the connection stays usable.
+"""
+
+import asyncio
+from http import HTTPStatus
+from http.client import HTTPMessage
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:
+    h2 = None
+
+HTTP2_AVAILABLE = h2 is not None
+READ_SIZE = 64 * 1024
+# Per-connection headers that HTTP/2 forbids on the wire
+HOP_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade', 'host', 'te')
+# Frame type of the SETTINGS frame an h2c server must open with
+SETTINGS_FRAME = 0x4
+# Receive windows: enough for many small bodies in flight at once without waiting on window updates
+STREAM_WINDOW = 2 ** 20
+CONNECTION_WINDOW = 16 * 2 ** 20
+
+
+class H2Stream:
+    """One request/response exchange on a session"""
+
+    def __init__(self, session, stream_id):
+        self.session = session
+        self.stream_id = stream_id
+        self.ended = False
+        self._head = asyncio.get_running_loop().create_future()
+        self._pieces = asyncio.Queue()
+
+    async def head(self):
+        """(status, reason, headers) once the response headers arrive"""
+        return await self._head
+
+    async def pieces(self):
+        """Yield the response body as it arrives"""
+        while True:
+            item = await self._pieces.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            data, flow_controlled = item
+            # Credit goes back to the server as the body is consumed, not as it is buffered
+            self.session.acknowledge(self.stream_id, flow_controlled)
+            yield data
+
+    def _headers(self, raw):
+        message = HTTPMessage()
+        status = 0
+        for name, value in raw:
+            name = name.decode('latin-1')
+            if name == ':status':
+                status = int(value)
+            elif not name.startswith(':'):
+                message[name] = value.decode('latin-1')
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+        if not self._head.done():
+            self._head.set_result((status, reason, message))
+
+    def _fail(self, error):
+        if not self._head.done():
+            self._head.set_exception(error)
+            # Nobody may be awaiting the head if the request was already abandoned
+            self._head.exception()
+        self._pieces.put_nowait(error)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.session._close_stream(self)
+
+
+class H2Session:
+    """One multiplexed HTTP/2 connection to a host, shared by every request in flight to it"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        self.streams = {}
+        # Streams sent and not yet ended or reset; h2's own count walks every stream on each call
+        self.in_flight = 0
+        self.opened = 0
+        self.peak = 0
+        # No header validation either way: probes send odd headers on purpose, and the HTTP/1.1 path
+        # is just as lenient with what servers send back
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(
+            client_side=True, header_encoding=None, validate_outbound_headers=False,
+            validate_inbound_headers=False))
+        self._wakeup = asyncio.Event()
+        self._settled = asyncio.Event()
+        self._write_scheduled = False
+        self._reader_task = None
+
+    @classmethod
+    async def start(cls, reader, writer, prior_knowledge=False, timeout=10):
+        """A session over an open connection, or None if the server turns out not to speak HTTP/2
+
+        With prior_knowledge (cleartext h2c) there is no ALPN answer to go on,
+        so the server's first frame must be SETTINGS. Either way no stream is
+        opened before the server's settings are in, so its stream limit holds
+        from the first request.
+        """
+        session = cls(reader, writer)
+        session.conn.initiate_connection()
+        session.conn.update_settings({h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: STREAM_WINDOW})
+        session.conn.increment_flow_control_window(CONNECTION_WINDOW - session.conn.inbound_flow_control_window)
+        writer.write(session.conn.data_to_send())
+        await writer.drain()
+        first = b''
+        if prior_knowledge:
+            try:
+                first = await asyncio.wait_for(reader.readexactly(9), timeout)
+            except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+                return None
+            if first[3] != SETTINGS_FRAME:
+                return None
+        session._reader_task = asyncio.ensure_future(session._read_loop(first))
+        try:
+            await asyncio.wait_for(session._settled.wait(), timeout)
+        except asyncio.TimeoutError:
+            session.close()
+            return None
+        if session.closed:
+            return None
+        return session
+
+    async def open_stream(self, method, scheme, authority, path, headers, body):
+        """Start a request; use the returned stream as `async with stream:` so it is always cleaned up"""
+        # Respect the server's stream limit: wait for a slot rather than have the request refused
+        while not self.closed and self.in_flight >= self.conn.remote_settings.max_concurrent_streams:
+            await self._wait()
+        if self.closed:
+            raise ConnectionError('HTTP/2 connection closed')
+
+        try:
+            stream_id = self.conn.get_next_available_stream_id()
+        except h2.exceptions.NoAvailableStreamIDError:
+            # Stream IDs are spent; finish what is in flight and let the next request open a new session
+            self.closed = True
+            raise ConnectionError('HTTP/2 connection out of stream IDs')
+        stream = self.streams[stream_id] = H2Stream(self, stream_id)
+        self.opened += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+
+        wire = [(':method', method), (':scheme', scheme), (':authority', authority), (':path', path)]
+        wire += [(name.lower(), str(value)) for name, value in headers.items() if name.lower() not in HOP_HEADERS]
+        try:
+            self.conn.send_headers(stream_id, wire, end_stream=not body)
+            # Requests started in the same loop turn go out together in one write
+            self._schedule_write()
+            if body:
+                await self._send_body(stream_id, body)
+        except BaseException:
+            self._close_stream(stream)
+            raise
+        return stream
+
+    async def _send_body(self, stream_id, body):
+        offset = 0
+        while offset < len(body):
+            if self.closed:
+                raise ConnectionError('HTTP/2 connection closed')
+            window = self.conn.local_flow_control_window(stream_id)
+            if window <= 0:
+                await self._wait()
+                continue
+            size = min(window, self.conn.max_outbound_frame_size, len(body) - offset)
+            self.conn.send_data(stream_id, body[offset:offset + size], end_stream=offset + size == len(body))
+            offset += size
+            await self._flush()
+
+    def acknowledge(self, stream_id, size):
+        if size and not self.closed:
+            self.conn.acknowledge_received_data(size, stream_id)
+            self._schedule_write()
+
+    def close(self):
+        self.closed = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self._fail_streams(ConnectionError('HTTP/2 connection closed'))
+        self.writer.close()
+
+    # ------------------------------------------------------------------
+    # Connection plumbing
+    # ------------------------------------------------------------------
+
+    def _close_stream(self, stream):
+        if self.streams.pop(stream.stream_id, None) is None:
+            return
+        # A body read that stopped early (byte cap, streaming verdict, timeout) cancels only its own stream
+        if not stream.ended and not self.closed:
+            try:
+                self.conn.reset_stream(stream.stream_id, h2.errors.ErrorCodes.CANCEL)
+            except h2.exceptions.StreamClosedError:
+                pass
+            self._send_pending()
+        self._finish(stream)
+
+    def _finish(self, stream):
+        if not stream.ended:
+            stream.ended = True
+            self.in_flight -= 1
+            self._wake()
+
+    async def _flush(self):
+        self._send_pending()
+        await self.writer.drain()
+
+    def _send_pending(self):
+        self._write_scheduled = False
+        data = self.conn.data_to_send()
+        if data and not self.writer.is_closing():
+            self.writer.write(data)
+
+    def _schedule_write(self):
+        if not self._write_scheduled:
+            self._write_scheduled = True
+            asyncio.get_running_loop().call_soon(self._send_pending)
+
+    async def _wait(self):
+        await self._wakeup.wait()
+
+    def _wake(self):
+        # Everyone waiting for a slot or flow-control window looks again
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def _read_loop(self, first):
+        try:
+            data = first
+            while True:
+                if data:
+                    for event in self.conn.receive_data(data):
+                        self._dispatch(event)
+                    self._send_pending()
+                data = await self.reader.read(READ_SIZE)
+                if not data:
+                    raise ConnectionError('HTTP/2 connection closed by server')
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.closed = True
+            self._fail_streams(exc if isinstance(exc, ConnectionError) else ConnectionError(f"HTTP/2 error: {exc}"))
+            self._settled.set()
+            self.writer.close()
+
+    def _dispatch(self, event):
+        stream = self.streams.get(getattr(event, 'stream_id', None))
+        if isinstance(event, h2.events.ResponseReceived):
+            if stream is not None:
+                stream._headers(event.headers)
+        elif isinstance(event, h2.events.DataReceived):
+            if stream is not None:
+                stream._pieces.put_nowait((event.data, event.flow_controlled_length))
+            else:
+                # Data for a stream we already let go of still counts against the connection window
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            if stream is not None:
+                self._finish(stream)
+                stream._pieces.put_nowait(None)
+        elif isinstance(event, h2.events.StreamReset):
+            if stream is not None:
+                self._finish(stream)
+                stream._fail(ConnectionError(f"HTTP/2 stream reset by server (error {event.error_code})"))
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            # GOAWAY: streams the server never started are failed so their requests can be retried
+            self.closed = True
+            last = event.last_stream_id if event.last_stream_id is not None else 0
+            for stream_id, stream in list(self.streams.items()):
+                if stream_id > last:
+                    self._finish(stream)
+                    stream._fail(ConnectionError('HTTP/2 stream refused by GOAWAY'))
+        elif isinstance(event, h2.events.RemoteSettingsChanged):
+            self._settled.set()
+            self._wake()
+        elif isinstance(event, h2.events.WindowUpdated):
+            self._wake()
+
+    def _fail_streams(self, error):
+        for stream in list(self.streams.values()):
+            if not stream.ended:
+                self._finish(stream)
+                stream._fail(error)
+        self._wake()
@@ -0,0 +1,168 @@
+"""
+Open-loop burst generator for rate-limit measurement
+Requests are launched on a fixed schedule (i / rps seconds after the start)
+whether or not earlier ones have answered, so the result describes the
+server's limiter rather than the client's round-trip time. Latency is
+measured from each request's scheduled send time, which keeps queueing
+delay in the numbers instead of silently dropping it.
+"""
+
+import asyncio
+import email.utils
+import time
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def parse_retry_after(value):
+    """Retry-After as seconds, from either a delay or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, round(when.timestamp() - time.time()))
+
+
+class BurstResult:
+    """What one burst against one URL observed"""
+
+    def __init__(self, url, rps, planned):
+        self.url = url
+        self.rps = rps
+        self.planned = planned
+        self.sent = 0
+        self.errors = 0
+        self.statuses = {}
+        self.latencies = []
+        self.duration = 0.0
+        self.send_window = 0.0
+        # Index (0-based, in send order), send offset in seconds and arrival time of the first 429
+        self.first_limited = None
+        self.first_limited_at = None
+        self.first_limited_time = None
+        self.retry_after = None
+
+    @property
+    def completed(self):
+        return len(self.latencies)
+
+    @property
+    def limited(self):
+        return self.first_limited is not None
+
+    @property
+    def achieved_rps(self):
+        # Rate over the interval in which requests were launched, not waiting for the last replies
+        if self.sent < 2 or not self.send_window:
+            return float(self.sent)
+        return (self.sent - 1) / self.send_window
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def histogram(self):
+        """Latency counts per bucket, keyed by the bucket's label"""
+        counts = dict.fromkeys([f'<={bound}ms' for bound in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}ms'], 0)
+        for latency in self.latencies:
+            millis = latency * 1000
+            for bound in LATENCY_BUCKETS:
+                if millis <= bound:
+                    counts[f'<={bound}ms'] += 1
+                    break
+            else:
+                counts[f'>{LATENCY_BUCKETS[-1]}ms'] += 1
+        return {label: count for label, count in counts.items() if count}
+
+    def summary(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            'target_rps': self.rps,
+            'achieved_rps': round(self.achieved_rps, 1),
+            'sent': self.sent,
+            'completed': self.completed,
+            'errors': self.errors,
+            'statuses': dict(sorted(self.statuses.items())),
+            'first_429_index': self.first_limited,
+            'first_429_at_s': round(self.first_limited_at, 3) if self.first_limited_at is not None else None,
+            'first_429_received': self.first_limited_time,
+            'retry_after_s': self.retry_after,
+            'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'latency_histogram': self.histogram()
+        }
+
+
+class OpenLoopBurst:
+    """Send requests at a fixed rate with bounded concurrency and record where limiting starts"""
+
+    def __init__(self, transport, rps=25, requests=50, concurrency=32, timeout=2, stop_on_limit=True):
+        self.transport = transport
+        self.rps = rps
+        self.requests = requests
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.stop_on_limit = stop_on_limit
+
+    def run(self, method, url, payload=None):
+        return self.transport.run(self.arun(method, url, payload))
+
+    async def arun(self, method, url, payload=None):
+        """payload(i) returns the request kwargs (json=..., headers=...) for request i"""
+        result = BurstResult(url, self.rps, self.requests)
+        slots = asyncio.Semaphore(self.concurrency)
+        limited = asyncio.Event()
+        start = time.perf_counter()
+
+        async def fire(index, scheduled):
+            try:
+                kwargs = payload(index) if payload else {}
+                # Outside the adaptive throttle: the burst exists to see the server's limiter, not ours
+                response = await self.transport.arequest(method, url, timeout=self.timeout, throttle=False,
+                                                         **kwargs)
+            except Exception:
+                result.errors += 1
+                return
+            finally:
+                slots.release()
+            finished = time.perf_counter()
+            result.latencies.append(finished - scheduled)
+            result.statuses[response.status_code] = result.statuses.get(response.status_code, 0) + 1
+            if response.status_code == 429 and (result.first_limited is None or index < result.first_limited):
+                result.first_limited = index
+                result.first_limited_at = scheduled - start
+                now = time.time()
+                result.first_limited_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)) \
+                    + f'.{int(now * 1000) % 1000:03d}'
+                result.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                limited.set()
+
+        tasks = []
+        for index in range(self.requests):
+            scheduled = start + index / self.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0 and self.stop_on_limit:
+                try:
+                    await asyncio.wait_for(limited.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            elif delay > 0:
+                await asyncio.sleep(delay)
+            if self.stop_on_limit and limited.is_set():
+                break
+            await slots.acquire()
+            result.sent += 1
+            result.send_window = time.perf_counter() - start
+            tasks.append(asyncio.ensure_future(fire(index, scheduled)))
+
+        await asyncio.gather(*tasks)
+        result.duration = time.perf_counter() - start
+        return result
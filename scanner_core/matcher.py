@@ -0,0 +1,243 @@
+"""
+Multi-pattern indicator matching
+Every indicator set a tool uses is compiled into one matcher, so each
+response body is lowercased once no matter how many detectors look at it.
+Uses a pyahocorasick automaton, which walks the body once, when the C
+extension is installed. Without it, patterns are looked up with str's
+substring search over the lowered body when a detector asks about their
+set: a set stops at its first hit, and a pattern shared by several sets is
+searched for once, so the body is never scanned more than the detectors
+would have scanned it themselves. The 'regex' backend puts every pattern in
+one trie-shaped regular expression instead, for pattern lists long enough
+that one pass beats one search per pattern. A hit also marks every shorter
+pattern it contains. IndicatorStream runs the same sets over a body as it
+streams in, so a probe can stop reading once it has a verdict.
+"""
+
+import codecs
+import re
+import weakref
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def trie_pattern(patterns):
+    """A regex matching the longest of patterns at any position, with shared prefixes written once
+
+    Python's regex engine tries alternatives one by one, so a flat a|b|c
+    costs a comparison per pattern at every position. Nested by prefix, one
+    character decides the branch and a position costs about one comparison.
+    """
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A pattern ending here: the longer ones are tried first, so the match is the longest
+        return f"(?:{body})?" if '' in node else body
+    return build(trie)
+
+
+class IndicatorHits:
+    """Which patterns of which indicator sets occurred in one body
+
+    With text (the lowered body), patterns are searched for only when a set
+    is asked about, and a set stops at its first hit, so detectors that ask
+    about a few sets never pay for the others. Each pattern is searched for
+    at most once whichever sets share it.
+    """
+
+    def __init__(self, matcher, found, text=None):
+        self._sets = matcher.sets
+        self._matcher = matcher
+        self._found = found
+        self._text = text
+        self._missing = set()
+
+    @property
+    def found(self):
+        """Every pattern that occurred"""
+        if self._text is not None:
+            for pattern in self._matcher.patterns:
+                self._occurs(pattern)
+            self._text = None
+        return self._found
+
+    def _occurs(self, pattern):
+        if pattern in self._found:
+            return True
+        if self._text is None or pattern in self._missing:
+            return False
+        if pattern in self._text:
+            self._found.update(self._matcher.implied(pattern))
+            return True
+        self._missing.add(pattern)
+        return False
+
+    def matched(self, name):
+        """Patterns of a set that occurred, in the order the set declares them"""
+        return [pattern for pattern in self._sets[name] if self._occurs(pattern)]
+
+    def first(self, name):
+        for pattern in self._sets[name]:
+            if self._occurs(pattern):
+                return pattern
+        return None
+
+    def hit(self, name):
+        return self.first(name) is not None
+
+    def count(self, name):
+        return len(self.matched(name))
+
+    def hit_sets(self):
+        return [name for name in self._sets if self.hit(name)]
+
+    def __contains__(self, name):
+        return self.hit(name)
+
+
+class IndicatorMatcher:
+    """Compiled matcher over named indicator sets"""
+
+    def __init__(self, sets, ignore_case=True, backend=None):
+        self.ignore_case = ignore_case
+        self.sets = {name: tuple(self._fold(p) for p in patterns) for name, patterns in sets.items()}
+        self.patterns = sorted({p for patterns in self.sets.values() for p in patterns})
+        # A match also proves every shorter pattern it contains (e.g. 'api_key' implies 'key')
+        self._implied = {p: frozenset(q for q in self.patterns if q in p) for p in self.patterns}
+        self.max_length = max((len(p) for p in self.patterns), default=0)
+        self._memo = weakref.WeakKeyDictionary()
+
+        self.backend = backend or ('ahocorasick' if ahocorasick is not None else 'substring')
+        if self.backend == 'ahocorasick':
+            self._automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                self._automaton.add_word(pattern, pattern)
+            self._automaton.make_automaton()
+        elif self.backend == 'regex':
+            self._regex = re.compile(trie_pattern(self.patterns)) if self.patterns else None
+        elif self.backend == 'substring':
+            # A long pattern that hits marks the shorter ones inside it, which then need no search of their own
+            self._longest_first = sorted(self.patterns, key=len, reverse=True)
+        else:
+            raise ValueError(f"Unknown matcher backend: {self.backend}")
+
+    def implied(self, pattern):
+        return self._implied[pattern]
+
+    def _fold(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def scan(self, body):
+        """Scan a Response (memoised per response) or a string and return IndicatorHits"""
+        if isinstance(body, str):
+            return self._hits(body)
+
+        hits = self._memo.get(body)
+        if hits is None:
+            hits = self._hits(body.text)
+            self._memo[body] = hits
+        return hits
+
+    def _hits(self, text):
+        if self.backend == 'substring':
+            return IndicatorHits(self, set(), text=self._fold(text))
+        found = set()
+        if self.patterns:
+            self._search(self._fold(text), found)
+        return IndicatorHits(self, found)
+
+    def find(self, text):
+        """Return the set of patterns that occur anywhere in text"""
+        return self._hits(text).found
+
+    def stream(self, until=None):
+        """Start an incremental scan; pass it as a transport on_chunk callback"""
+        return IndicatorStream(self, until)
+
+    def _search(self, window, found):
+        """Add every pattern occurring in window to found; stops early once all have"""
+        total = len(self.patterns)
+        if self.backend == 'ahocorasick':
+            for _, pattern in self._automaton.iter(window):
+                found.add(pattern)
+                if len(found) == total:
+                    return
+            return
+        if self.backend == 'substring':
+            # str's search is C code that skips ahead on mismatches; there is no per-character Python work
+            for pattern in self._longest_first:
+                if pattern not in found and pattern in window:
+                    found.update(self._implied[pattern])
+            return
+        search = self._regex.search
+        match = search(window)
+        while match is not None:
+            found.update(self._implied[match.group()])
+            if len(found) == total:
+                return
+            # Resume one character on, so a pattern overlapping the end of this match is still seen
+            match = search(window, match.start() + 1)
+
+
+class IndicatorStream:
+    """Indicator matching over a body that arrives in pieces
+
+    Keeps only the last max_length - 1 characters between pieces so patterns
+    that straddle a boundary are still seen, and memory stays flat however
+    large the body is. until(stream) is checked after every piece; once it
+    returns True the transport stops reading.
+    """
+
+    def __init__(self, matcher, until=None):
+        self.matcher = matcher
+        self.until = until
+        self.response = None
+        self.found = set()
+        self.chars = 0
+        self._decoder = None
+        self._tail = ''
+
+    def __call__(self, response, chunk):
+        if self._decoder is None:
+            self.response = response
+            try:
+                self._decoder = codecs.getincrementaldecoder(response.encoding)(errors='replace')
+            except LookupError:
+                self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.feed(self._decoder.decode(chunk))
+        return bool(self.until and self.until(self))
+
+    def feed(self, text):
+        """Scan the next piece of decoded text"""
+        self.chars += len(text)
+        window = self._tail + self.matcher._fold(text)
+        if len(self.found) < len(self.matcher.patterns):
+            self.matcher._search(window, self.found)
+        keep = self.matcher.max_length - 1
+        self._tail = window[-keep:] if keep > 0 else ''
+
+    def hits(self):
+        """IndicatorHits for everything seen so far"""
+        return IndicatorHits(self.matcher, found=self.found)
+
+    def hit(self, name):
+        return any(pattern in self.found for pattern in self.matcher.sets[name])
+
+    def matched(self, name):
+        return [pattern for pattern in self.matcher.sets[name] if pattern in self.found]
+
+    def saw_all(self, name):
+        """True once every pattern of a set has occurred, so reading further cannot add to it"""
+        return all(pattern in self.found for pattern in self.matcher.sets[name])
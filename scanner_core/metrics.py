@@ -0,0 +1,316 @@
+"""
+Per-request timing breakdown and probe metrics
+The transport times every request it sends, phase by phase: waiting for a
+concurrency slot, DNS, TCP connect, TLS handshake, time to first byte and body
+transfer, along with the bytes sent and received. ProbeMetrics folds those
+into fixed-bucket histograms per scan module and per endpoint, so memory stays
+flat however many probes run. The results can be written out as JSON at the
+end of a run, or scraped live in Prometheus text format from MetricsServer.
+Requests are credited to the module whose thread (or plan probe) sent them,
+through a context variable that follows the request onto the event loop.
+"""
+
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Upper bounds of the histogram buckets, in seconds; everything slower lands in +Inf
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ('queue', 'dns', 'connect', 'tls', 'ttfb', 'transfer', 'total')
+# Connection phases only happen on requests that opened a connection
+CONNECTION_PHASES = ('dns', 'connect', 'tls')
+# Endpoints past this many are counted together, so a long wordlist cannot grow the metrics without bound
+MAX_ENDPOINTS = 250
+OTHER_ENDPOINTS = '(other)'
+NO_MODULE = '(none)'
+
+current_module = contextvars.ContextVar('scan_module', default=None)
+
+
+@contextlib.contextmanager
+def module_scope(name):
+    """Credit requests sent inside this block (and the loop tasks they start) to module name"""
+    token = current_module.set(name)
+    try:
+        yield
+    finally:
+        current_module.reset(token)
+
+
+class RequestTiming:
+    """Where one request's time went, in seconds, and the bytes it moved"""
+
+    def __init__(self):
+        self.queue = 0.0
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.transfer = 0.0
+        # A new connection was opened for this request, so dns/connect/tls were measured
+        self.connected = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def total(self):
+        return self.queue + self.dns + self.connect + self.tls + self.ttfb + self.transfer
+
+    def as_dict(self):
+        timing = {phase: round(getattr(self, phase), 6) for phase in PHASES}
+        timing.update(connected=self.connected, bytes_sent=self.bytes_sent, bytes_received=self.bytes_received)
+        return timing
+
+    def __repr__(self):
+        return f"<RequestTiming ttfb={self.ttfb * 1000:.1f}ms total={self.total * 1000:.1f}ms>"
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count and sum"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile; None if empty, inf past the last bound"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def cumulative(self):
+        """(le, observations at or below it) pairs, Prometheus style"""
+        seen = 0
+        pairs = []
+        for bound, count in zip(BUCKETS + (float('inf'),), self.buckets):
+            seen += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), seen))
+        return pairs
+
+    def as_dict(self):
+        # Quantiles past the last bound are written the way the bucket is, since JSON has no infinity
+        p50, p95 = (('+Inf' if bound == float('inf') else bound) for bound in (self.quantile(0.5), self.quantile(0.95)))
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': dict(self.cumulative()),
+                'p50': p50, 'p95': p95}
+
+
+class Series:
+    """Everything observed for one module or endpoint"""
+
+    def __init__(self):
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses = {}
+
+    def observe(self, timing, status):
+        self.requests += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += timing.bytes_sent
+        self.bytes_received += timing.bytes_received
+        if timing.connected:
+            self.connections += 1
+        for phase in PHASES:
+            if timing.connected or phase not in CONNECTION_PHASES:
+                self.phases[phase].observe(getattr(timing, phase))
+
+    def as_dict(self):
+        return {'requests': self.requests, 'errors': self.errors, 'connections_opened': self.connections,
+                'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received,
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'phases': {phase: histogram.as_dict() for phase, histogram in self.phases.items()}}
+
+
+class ProbeMetrics:
+    """Request timings aggregated per scan module and per endpoint"""
+
+    def __init__(self, max_endpoints=MAX_ENDPOINTS):
+        self.max_endpoints = max_endpoints
+        self.modules = {}
+        self.endpoints = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url):
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path or '/'}"
+
+    def _series(self, url):
+        module = current_module.get() or NO_MODULE
+        endpoint = self.endpoint(url)
+        if endpoint not in self.endpoints and len(self.endpoints) >= self.max_endpoints:
+            endpoint = OTHER_ENDPOINTS
+        return (self.modules.setdefault(module, Series()), self.endpoints.setdefault(endpoint, Series()))
+
+    def observe(self, url, status, timing):
+        """Record one answered request"""
+        with self._lock:
+            for series in self._series(url):
+                series.observe(timing, status)
+
+    def observe_error(self, url):
+        """Record a request that got no answer (refused, reset, timed out)"""
+        with self._lock:
+            for series in self._series(url):
+                series.errors += 1
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def as_dict(self):
+        with self._lock:
+            return {'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                    'elapsed': round(time.time() - self.started, 3),
+                    'buckets': list(BUCKETS),
+                    'modules': {name: series.as_dict() for name, series in self.modules.items()},
+                    'endpoints': {name: series.as_dict() for name, series in self.endpoints.items()}}
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
+
+    def prometheus(self):
+        """Everything so far in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for scope, table in (('module', self.modules), ('endpoint', self.endpoints)):
+                family = f"scanner_{scope}_request_phase_seconds"
+                lines.append(f"# HELP {family} Time per request phase, by {scope}")
+                lines.append(f"# TYPE {family} histogram")
+                for name, series in table.items():
+                    for phase, histogram in series.phases.items():
+                        labels = f'{scope}="{_escape(name)}",phase="{phase}"'
+                        for le, count in histogram.cumulative():
+                            lines.append(f'{family}_bucket{{{labels},le="{le}"}} {count}')
+                        lines.append(f"{family}_sum{{{labels}}} {histogram.sum:.6f}")
+                        lines.append(f"{family}_count{{{labels}}} {histogram.count}")
+            for metric, attribute, help_text in (
+                    ('requests', 'requests', 'Requests answered'),
+                    ('request_errors', 'errors', 'Requests that got no answer'),
+                    ('connections_opened', 'connections', 'Connections opened'),
+                    ('bytes_sent', 'bytes_sent', 'Request bytes sent'),
+                    ('bytes_received', 'bytes_received', 'Response bytes received')):
+                family = f"scanner_module_{metric}_total"
+                lines.append(f"# HELP {family} {help_text}, by module")
+                lines.append(f"# TYPE {family} counter")
+                for name, series in self.modules.items():
+                    lines.append(f'{family}{{module="{_escape(name)}"}} {getattr(series, attribute)}')
+            lines.append("# HELP scanner_module_responses_total Responses by status code, by module")
+            lines.append("# TYPE scanner_module_responses_total counter")
+            for name, series in self.modules.items():
+                for status, count in sorted(series.statuses.items()):
+                    lines.append(f'scanner_module_responses_total{{module="{_escape(name)}",status="{status}"}} '
+                                 f'{count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        with self._lock:
+            requests = sum(series.requests for series in self.modules.values())
+            if not requests:
+                return "Probe metrics: no requests timed"
+            ttfb, total = Histogram(), Histogram()
+            for series in self.modules.values():
+                for merged, phase in ((ttfb, 'ttfb'), (total, 'total')):
+                    histogram = series.phases[phase]
+                    merged.buckets = [a + b for a, b in zip(merged.buckets, histogram.buckets)]
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+            slowest = max(self.modules.items(), key=lambda item: item[1].phases['total'].sum)[0]
+        return (f"Probe metrics: {requests} requests timed, time to first byte p50 <= {_ms(ttfb.quantile(0.5))}, "
+                f"total p95 <= {_ms(total.quantile(0.95))}; most time spent in {slowest}")
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _ms(seconds):
+    return '+Inf' if seconds == float('inf') else f"{seconds * 1000:g}ms"
+
+
+class MetricsServer:
+    """Serves a ProbeMetrics at /metrics in Prometheus text format from a background thread"""
+
+    def __init__(self, metrics, port=9464, host='127.0.0.1'):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+
+def serve_metrics(metrics, port, announce=print):
+    """Start a MetricsServer for metrics if port is set; a port that cannot be bound is announced, not raised"""
+    if not port:
+        return None
+    try:
+        server = MetricsServer(metrics, port).start()
+    except OSError as e:
+        announce(f"⚠️  Could not serve metrics on port {port}: {e}")
+        return None
+    announce(f"📈 Live metrics: {server.url}")
+    return server
+
+
+def export_metrics(metrics, server, path, announce=print):
+    """End of run: stop the live endpoint, if any, and write the timings to path as JSON"""
+    if server is not None:
+        server.close()
+    try:
+        metrics.write_json(path)
+    except OSError as e:
+        announce(f"⚠️  Could not write metrics to {path}: {e}")
+        return
+    announce(f"📈 Request timings written to {path}")
@@ -0,0 +1,161 @@
+"""
+Scanner module registry and dependency-aware scheduler
+A tool registers its test modules with the modules each one needs to have
+finished first. The registry then runs every module whose dependencies are
+done on a small thread pool, so independent modules overlap. A module marked
+exclusive (rate-limit bursts, race timing) runs with nothing else in flight,
+so its traffic neither distorts nor is distorted by other modules' timings.
+Registries that run side by side (one per target in a batch) share an
+ExclusiveGate, which keeps an exclusive module alone across all of them.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .metrics import module_scope
+
+
+class ScanModule:
+    """One named unit of a scan and what it needs before it can start"""
+
+    def __init__(self, name, func, args=(), depends=(), exclusive=False):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.depends = tuple(depends)
+        self.exclusive = exclusive
+
+    def __repr__(self):
+        return f"<ScanModule {self.name} depends={list(self.depends)}{' exclusive' if self.exclusive else ''}>"
+
+
+class ExclusiveGate:
+    """Shared/exclusive lock over the modules of several registries
+
+    Ordinary modules hold it shared; an exclusive one waits for them to finish and
+    keeps new ones from starting until it is done.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    def acquire(self, exclusive):
+        with self._condition:
+            if exclusive:
+                self._waiting += 1
+                self._condition.wait_for(lambda: not self._exclusive and not self._shared)
+                self._waiting -= 1
+                self._exclusive = True
+            else:
+                # A waiting exclusive module goes first, or a steady stream of others would starve it
+                self._condition.wait_for(lambda: not self._exclusive and not self._waiting)
+                self._shared += 1
+
+    def release(self, exclusive):
+        with self._condition:
+            if exclusive:
+                self._exclusive = False
+            else:
+                self._shared -= 1
+            self._condition.notify_all()
+
+
+class ModuleRegistry:
+    """Ordered set of modules; dependencies must be registered before the modules that need them"""
+
+    def __init__(self):
+        self.modules = OrderedDict()
+
+    def register(self, name, func, *args, depends=(), exclusive=False):
+        if name in self.modules:
+            raise ValueError(f"Module already registered: {name}")
+        missing = [dep for dep in depends if dep not in self.modules]
+        if missing:
+            raise ValueError(f"Module {name} depends on unregistered modules: {', '.join(missing)}")
+        module = ScanModule(name, func, args, depends, exclusive)
+        self.modules[name] = module
+        return module
+
+    def subset(self, names):
+        """A registry of just the named modules, in registration order; dependencies outside it are dropped"""
+        subset = ModuleRegistry()
+        for module in self:
+            if module.name in names:
+                subset.register(module.name, module.func, *module.args, exclusive=module.exclusive,
+                                depends=[dep for dep in module.depends if dep in names])
+        return subset
+
+    def __len__(self):
+        return len(self.modules)
+
+    def __iter__(self):
+        return iter(self.modules.values())
+
+    def run(self, max_parallel=4, runner=None, on_done=None, gate=None):
+        """Run every module, returning {name: result}
+
+        runner(name, func, *args) wraps each module (e.g. a checkpoint step) and
+        on_done(name) is called as each one finishes. gate, an ExclusiveGate shared
+        with other registries, extends exclusive modules' isolation to theirs. The first module to raise
+        stops new modules from starting; its exception is re-raised once the
+        running ones have finished.
+        """
+        runner = runner or (lambda name, func, *args: func(*args))
+        pending = list(self.modules.values())
+        finished = set()
+        results = {}
+        running = {}
+        error = None
+
+        def start_ready(pool):
+            # Registration order is a valid topological order, so scanning it in order is fair
+            for module in list(pending):
+                if any(dep not in finished for dep in module.depends):
+                    continue
+                if len(running) >= max_parallel or any(m.exclusive for m in running.values()):
+                    return
+                if module.exclusive and running:
+                    # Hold everything else back until the exclusive module has had the host to itself
+                    return
+                pending.remove(module)
+                running[pool.submit(_run_module, runner, module, gate)] = module
+
+        pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='module')
+        try:
+            start_ready(pool)
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    module = running.pop(future)
+                    try:
+                        results[module.name] = future.result()
+                    except Exception as exc:
+                        error = error or exc
+                        continue
+                    finished.add(module.name)
+                    if on_done is not None:
+                        on_done(module.name)
+                if error is None:
+                    start_ready(pool)
+        finally:
+            # On Ctrl-C or a failure, modules that never started are dropped
+            pool.shutdown(wait=error is not None, cancel_futures=True)
+        if error is not None:
+            raise error
+        return results
+
+
+def _run_module(runner, module, gate):
+    if gate is not None:
+        gate.acquire(module.exclusive)
+    try:
+        # Requests the module sends are credited to it in the transport's probe metrics
+        with module_scope(module.name):
+            return runner(module.name, module.func, *module.args)
+    finally:
+        if gate is not None:
+            gate.release(module.exclusive)
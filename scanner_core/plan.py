@@ -0,0 +1,266 @@
+"""
+Declarative probe plans and the worker-pool executor that runs them
+A plan is data: (method, path, body, headers, detector) entries that the
+executor may reorder and run in parallel while still reporting findings
+in plan order
+"""
+
+import asyncio
+import hashlib
+import json as jsonlib
+import time
+from collections import OrderedDict
+
+from .breaker import CircuitOpen
+from .metrics import current_module, module_scope
+
+
+class Probe:
+    """A single request plus the detector that turns its response into findings"""
+
+    def __init__(self, method, path, detector, json=None, data=None, files=None,
+                 headers=None, timeout=5, context=None, then=None, module=None):
+        self.method = method
+        self.path = path
+        self.detector = detector
+        self.json = json
+        self.data = data
+        self.files = files
+        self.headers = headers
+        self.timeout = timeout
+        self.context = context or {}
+        self.then = then
+        self.module = module
+
+    def request_kwargs(self):
+        kwargs = {'timeout': self.timeout}
+        for name in ('json', 'data', 'files', 'headers'):
+            value = getattr(self, name)
+            if value is not None:
+                kwargs[name] = value
+        return kwargs
+
+    def digest(self):
+        """Stable fingerprint of the request this probe sends, used to checkpoint it"""
+        spec = [self.module, self.method, self.path, self.json, self.data, self.files, self.headers]
+        encoded = jsonlib.dumps(spec, sort_keys=True, default=repr).encode()
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    def __repr__(self):
+        return f"<Probe {self.method} {self.path} [{self.module}]>"
+
+
+class ProbePlan:
+    """Ordered collection of probes with optional section banners"""
+
+    def __init__(self, probes=None):
+        self.probes = list(probes or [])
+        self.sections = {}
+
+    def section(self, title):
+        """Announce a banner before the next probe's findings are reported"""
+        self.sections.setdefault(len(self.probes), []).append(title)
+
+    def add(self, probe):
+        self.probes.append(probe)
+        return probe
+
+    def extend(self, probes):
+        for probe in probes:
+            self.add(probe)
+        return self
+
+    def merge(self, other):
+        """Append another plan, keeping its section banners aligned"""
+        offset = len(self.probes)
+        for index, titles in other.sections.items():
+            self.sections.setdefault(offset + index, []).extend(titles)
+        self.probes.extend(other.probes)
+        return self
+
+    def probe_ids(self):
+        """Checkpoint IDs: each probe's digest plus how many identical probes came before it"""
+        seen = {}
+        ids = []
+        for probe in self.probes:
+            digest = probe.digest()
+            seen[digest] = seen.get(digest, 0) + 1
+            ids.append(f"probe:{digest}:{seen[digest]}")
+        return ids
+
+    def endpoints(self):
+        """{path: methods sent to it} for every probe in the plan"""
+        endpoints = OrderedDict()
+        for probe in self.probes:
+            endpoints.setdefault(probe.path, set()).add(probe.method)
+        return endpoints
+
+    def __iter__(self):
+        return iter(self.probes)
+
+    def __len__(self):
+        return len(self.probes)
+
+
+class PlanExecutor:
+    """Runs a ProbePlan across a pool of asyncio workers on the transport loop"""
+
+    SCHEDULES = ('fifo', 'interleave')
+
+    def __init__(self, transport, target, workers=32, schedule='interleave', breaker=None):
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"Unknown schedule: {schedule}")
+        self.transport = transport
+        self.target = target.rstrip('/')
+        self.workers = workers
+        self.schedule = schedule
+        # With a CircuitBreaker, endpoints are checked before a plan runs and dead ones are skipped
+        self.breaker = breaker
+
+    def execute(self, plan, emit, announce=print, checkpoint=None, rescan=None, progress=None):
+        """Run every probe; emit(severity, message, details) is called in plan order
+
+        With a checkpoint, probes it already completed are skipped and each probe is
+        marked complete once its findings have been emitted. With a RescanStore, a
+        probe whose response is unchanged since the last run reuses that run's
+        findings instead of running its detector again. A progress sink (a Console)
+        is told how many probes will run and about each one as it completes.
+        """
+        if not isinstance(plan, ProbePlan):
+            plan = ProbePlan(plan)
+        return self.transport.run(self._execute(plan, emit, announce, checkpoint, rescan, progress))
+
+    def collect(self, probes):
+        """Run probes without reporting anything: returns each probe's findings, in the order given"""
+        return self.transport.run(self._collect(list(probes)))
+
+    async def _collect(self, probes):
+        if self.breaker is not None:
+            await self.breaker.acheck(self.transport, self.target, ProbePlan(probes).endpoints())
+        results = [None] * len(probes)
+        queue = asyncio.Queue()
+        for index in self._dispatch_order(probes):
+            queue.put_nowait(index)
+
+        async def worker():
+            while not queue.empty():
+                index = queue.get_nowait()
+                results[index] = await self._run_probe(probes[index])
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, queue.qsize()))))
+        return results
+
+    def _dispatch_order(self, probes):
+        if self.schedule == 'fifo':
+            return list(range(len(probes)))
+
+        # Round-robin across endpoints so no single path receives a burst of consecutive probes
+        groups = OrderedDict()
+        for index, probe in enumerate(probes):
+            groups.setdefault(probe.path, []).append(index)
+        lanes = [iter(indices) for indices in groups.values()]
+        order = []
+        while lanes:
+            remaining = []
+            for lane in lanes:
+                index = next(lane, None)
+                if index is not None:
+                    order.append(index)
+                    remaining.append(lane)
+            lanes = remaining
+        return order
+
+    async def _execute(self, plan, emit, announce, checkpoint=None, rescan=None, progress=None):
+        probes = plan.probes
+        if self.breaker is not None:
+            await self.breaker.acheck(self.transport, self.target, plan.endpoints())
+        ids = plan.probe_ids() if checkpoint is not None or rescan is not None else None
+        results = [None] * len(probes)
+        queue = asyncio.Queue()
+        for index in self._dispatch_order(probes):
+            if checkpoint is not None and checkpoint.is_done(ids[index]):
+                checkpoint.skipped += 1
+                results[index] = ()
+                continue
+            queue.put_nowait(index)
+
+        if progress is not None:
+            progress.add_total(queue.qsize())
+        state = {'next': 0}
+
+        def report(findings):
+            for finding in findings:
+                emit(*finding)
+
+        def flush():
+            # Reorder buffer: report a probe's findings only once every earlier probe has finished
+            while state['next'] < len(probes) and results[state['next']] is not None:
+                index = state['next']
+                for title in plan.sections.get(index, ()):
+                    announce(title)
+                if checkpoint is None:
+                    report(results[index])
+                elif not checkpoint.is_done(ids[index]):
+                    # Findings are journalled under the probe, then the probe is marked complete
+                    checkpoint.step(ids[index], report, results[index])
+                results[index] = ()
+                state['next'] += 1
+
+        async def worker():
+            while not queue.empty():
+                index = queue.get_nowait()
+                results[index] = await self._run_probe(probes[index], ids[index] if rescan else None, rescan)
+                if progress is not None:
+                    progress.advance(f"{probes[index].method} {probes[index].path}")
+                flush()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, queue.qsize()))))
+        flush()
+        for title in plan.sections.get(len(probes), ()):
+            announce(title)
+        return len(probes)
+
+    async def _run_probe(self, probe, probe_id=None, rescan=None):
+        """Send a probe and any follow-ups it chains, collecting their findings"""
+        if not probe.module:
+            return await self._run_chain(probe, probe_id, rescan)
+        # The probe's requests are credited to its module in the probe metrics, under the scan module
+        outer = current_module.get()
+        with module_scope(f"{outer}/{probe.module}" if outer else probe.module):
+            return await self._run_chain(probe, probe_id, rescan)
+
+    async def _run_chain(self, probe, probe_id=None, rescan=None):
+        findings = []
+        breaker = self.breaker
+        while probe is not None:
+            # Checked when the request gets its slot, not when the probe is picked up: probes
+            # queued behind a hanging endpoint are skipped once its breaker trips
+            gate = breaker.gate(probe.path, probe.method) if breaker is not None else None
+            sent = time.monotonic()
+            try:
+                response = await self.transport.arequest(probe.method, f"{self.target}{probe.path}",
+                                                         gate=gate, **probe.request_kwargs())
+            except CircuitOpen as exc:
+                breaker.skip(probe.path, str(exc))
+                break
+            except Exception:
+                if breaker is not None:
+                    breaker.observe(probe.path, probe.method, None, sent)
+                break
+            if breaker is not None:
+                breaker.observe(probe.path, probe.method, response, sent)
+            try:
+                # Chained probes decide their follow-ups from the live response, so only
+                # single-shot probes can carry last run's findings forward
+                if rescan is not None and probe.then is None:
+                    carried = rescan.carried_findings(probe_id, response)
+                    if carried is None:
+                        carried = list(probe.detector(probe, response) or ())
+                        rescan.record_findings(probe_id, response, carried)
+                    findings.extend(carried)
+                    break
+                findings.extend(probe.detector(probe, response) or ())
+                probe = probe.then(probe, response) if probe.then else None
+            except Exception:
+                break
+        return findings
@@ -0,0 +1,247 @@
+"""
+Per-module CPU and allocation profiling for the scanners' --profile mode
+Each module runs under cProfile, and tracemalloc snapshots are taken before
+and after it. cProfile only sees the thread that enables it. Response
+decoding, detectors and plan probes run on the transport's event loop thread,
+so a second profiler is switched on there for as long as the module runs, and
+the two are merged. Both clock their thread's CPU time, so waiting on the
+network or on a lock costs nothing and the hot spots are where the interpreter
+actually works. Modules are profiled one at a time, so everything on the
+loop and every allocation in the process belongs to the module running.
+Raw cProfile files are written per module, plus one merged all.prof. They
+load with pstats, snakeviz, flameprof or gprof2dot for flame graphs. The
+tracemalloc snapshots are written next to them.
+"""
+
+import cProfile
+import concurrent.futures
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+# Frames kept per allocation; one is enough to name the line that allocated
+TRACE_FRAMES = 1
+HOT_SPOTS = 15
+ALLOCATORS = 15
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Allocations made by the profiler itself are left out of the allocator tables
+IGNORED_FILES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>',
+                 '<frozen importlib._bootstrap_external>')
+
+
+class ModuleResult:
+    """What one module cost: wall time, profiled CPU, traced memory and its raw files"""
+
+    def __init__(self, name, wall, stats, allocations, peak, profile_file, snapshot_file):
+        self.name = name
+        self.wall = wall
+        self.stats = stats
+        # (file, line, bytes, blocks) still held when the module finished, biggest first
+        self.allocations = allocations
+        self.peak = peak
+        self.profile_file = profile_file
+        self.snapshot_file = snapshot_file
+
+    @property
+    def cpu(self):
+        return self.stats.total_tt if self.stats is not None else 0.0
+
+    @property
+    def allocated(self):
+        return sum(size for _, _, size, _ in self.allocations)
+
+
+class ModuleProfiler:
+    """Profiles scan modules one at a time and writes their raw profiles to directory"""
+
+    def __init__(self, directory, transport=None):
+        self.directory = directory
+        # Its event loop thread is profiled alongside each module
+        self.transport = transport
+        self.results = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+
+    def wrap(self, runner=None):
+        """A ModuleRegistry runner that profiles each module around runner (e.g. a checkpoint step)"""
+        runner = runner or (lambda name, func, *args: func(*args))
+
+        def profiled(name, func, *args):
+            return self.profile(name, runner, name, func, *args)
+        return profiled
+
+    def profile(self, name, func, *args):
+        """Run func(*args) as module name, profiled; modules that arrive together wait their turn"""
+        with self._lock:
+            profile = cProfile.Profile(time.thread_time)
+            loop_profile = self._loop_profile()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                return func(*args)
+            finally:
+                profile.disable()
+                wall = time.perf_counter() - start
+                if loop_profile is not None:
+                    self._on_loop(loop_profile.disable)
+                after = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                self._record(name, wall, profile, loop_profile, before, after, peak)
+
+    def close(self):
+        """Stop tracing (if this profiler started it) and write the merged profile of every module"""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        merged = self.merged()
+        if merged is not None:
+            merged.dump_stats(os.path.join(self.directory, 'all.prof'))
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def merged(self):
+        """pstats.Stats over every profiled module, or None before any ran"""
+        merged = None
+        for result in self.results:
+            if result.stats is None:
+                continue
+            if merged is None:
+                merged = pstats.Stats(result.profile_file)
+            else:
+                merged.add(result.profile_file)
+        return merged
+
+    def hot_spots(self, n=HOT_SPOTS):
+        """[(function, calls, own seconds, cumulative seconds)] with the most own time across all modules"""
+        merged = self.merged()
+        if merged is None:
+            return []
+        rows = sorted(merged.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+        return [(_function(func), calls, own, cumulative) for func, (_, calls, own, cumulative, _) in rows]
+
+    def allocators(self, n=ALLOCATORS):
+        """[(module, file:line, bytes, blocks)] for the lines that kept the most memory allocated"""
+        rows = [(result.name, f"{_path(filename)}:{line}", size, blocks)
+                for result in self.results for filename, line, size, blocks in result.allocations]
+        return sorted(rows, key=lambda row: row[2], reverse=True)[:n]
+
+    def markdown(self, hot_spots=HOT_SPOTS, allocators=ALLOCATORS):
+        """Top Hot Spots and Top Allocators report sections"""
+        if not self.results:
+            return ''
+        lines = ["\n## Top Hot Spots\n\n",
+                 "CPU time by scan module, measured with cProfile on the module's thread and the transport's "
+                 "event loop. Profiling slows the scan down, so compare the times with each other rather than "
+                 "with an unprofiled run.\n\n",
+                 "| Module | Wall s | Profiled CPU s | Peak traced MB | Still allocated MB |\n|---|---|---|---|---|\n"]
+        for result in sorted(self.results, key=lambda result: result.cpu, reverse=True):
+            lines.append(f"| `{result.name}` | {result.wall:.2f} | {result.cpu:.2f} | {result.peak / 2 ** 20:.1f} | "
+                         f"{result.allocated / 2 ** 20:.2f} |\n")
+        lines.append("\n| Function | Calls | Own s | Cumulative s |\n|---|---|---|---|\n")
+        for function, calls, own, cumulative in self.hot_spots(hot_spots):
+            lines.append(f"| `{function}` | {calls} | {own:.3f} | {cumulative:.3f} |\n")
+        lines.append("\n## Top Allocators\n\n"
+                     "Lines whose allocations were still held when their module finished, from tracemalloc "
+                     "snapshots taken before and after each module.\n\n"
+                     "| Module | Line | KB | Blocks |\n|---|---|---|---|\n")
+        for module, where, size, blocks in self.allocators(allocators):
+            lines.append(f"| `{module}` | `{where}` | {size / 1024:.1f} | {blocks} |\n")
+        lines.append(f"\nRaw profiles: `{self.directory}` (one `.prof` per module and `all.prof`, for snakeviz, "
+                     f"flameprof or gprof2dot; `.tracemalloc` snapshots load with `tracemalloc.Snapshot.load`).\n")
+        return ''.join(lines)
+
+    def write_markdown(self):
+        path = os.path.join(self.directory, 'profile.md')
+        with open(path, 'w') as f:
+            f.write(self.markdown())
+        return path
+
+    def summary(self):
+        if not self.results:
+            return "Profiling: no modules profiled"
+        slowest = max(self.results, key=lambda result: result.cpu)
+        spots = self.hot_spots(1)
+        return (f"Profiling: {len(self.results)} modules, most CPU in {slowest.name} ({slowest.cpu:.2f}s)"
+                + (f", hottest function {spots[0][0]}" if spots else '') + f"; raw profiles in {self.directory}")
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _loop_profile(self):
+        """A profiler running on the transport's loop thread, or None if there is none to profile"""
+        loop = getattr(self.transport, 'loop', None)
+        if loop is None or not loop.is_running():
+            return None
+        profile = cProfile.Profile(time.thread_time)
+        try:
+            self._on_loop(profile.enable)
+        except ValueError:
+            # From Python 3.12 a profiler sees every thread, and a second one cannot be switched on
+            return None
+        return profile
+
+    def _on_loop(self, func):
+        # cProfile attaches to the thread that enables it, so the call has to happen on the loop itself
+        future = concurrent.futures.Future()
+
+        def call():
+            try:
+                future.set_result(func())
+            except Exception as exc:
+                future.set_exception(exc)
+        self.transport.loop.call_soon_threadsafe(call)
+        return future.result(timeout=10)
+
+    def _record(self, name, wall, profile, loop_profile, before, after, peak):
+        stem = os.path.join(self.directory, re.sub(r'[^\w.-]', '_', name))
+        stats = None
+        for part in (profile, loop_profile):
+            if part is None:
+                continue
+            part.create_stats()
+            # pstats refuses a profiler that recorded nothing, e.g. a loop that stayed idle
+            if not part.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(part)
+            else:
+                stats.add(part)
+        profile_file = None
+        if stats is not None:
+            profile_file = f"{stem}.prof"
+            stats.dump_stats(profile_file)
+        snapshot_file = f"{stem}.tracemalloc"
+        after.dump(snapshot_file)
+        allocations = []
+        for diff in after.compare_to(before, 'lineno'):
+            frame = diff.traceback[0]
+            if diff.size_diff > 0 and frame.filename not in IGNORED_FILES:
+                allocations.append((frame.filename, frame.lineno, diff.size_diff, diff.count_diff))
+        allocations = allocations[:ALLOCATORS]
+        self.results.append(ModuleResult(name, wall, stats, allocations, peak, profile_file, snapshot_file))
+
+
+def _path(filename):
+    # Repository files by their path in the repo, everything else by its last two parts
+    if filename.startswith(ROOT + os.sep):
+        return os.path.relpath(filename, ROOT)
+    parts = filename.split(os.sep)
+    return os.sep.join(parts[-2:]) if len(parts) > 2 else filename
+
+
+def _function(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins have no source file, only a name like <method 'read' of ...>
+        return name
+    return f"{_path(filename)}:{line}({name})"
@@ -0,0 +1,92 @@
+"""
+Streaming report writer
+One pass over the findings writes the Markdown report, a JSON Lines export
+and a SARIF log side by side. Every piece goes to its file as soon as it is
+produced, so memory stays flat and the time is linear however many findings
+a scan turns up.
+"""
+
+import json
+
+from .findings import classify
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+# SARIF has three result levels; severities map onto them case-insensitively
+SARIF_LEVELS = {
+    'critical': 'error',
+    'high': 'error',
+    'medium': 'warning',
+    'low': 'note',
+    'info': 'note'
+}
+
+
+class ReportWriter:
+    """Write <base>.md, <base>.jsonl and <base>.sarif together, one finding at a time"""
+
+    def __init__(self, base_path, tool, target, version='1.0'):
+        self.base_path = base_path
+        self.tool = tool
+        self.target = target.rstrip('/')
+        self.markdown_file = f"{base_path}.md"
+        self.jsonl_file = f"{base_path}.jsonl"
+        self.sarif_file = f"{base_path}.sarif"
+        self.count = 0
+        self._md = open(self.markdown_file, 'w', encoding='utf-8')
+        self._jsonl = open(self.jsonl_file, 'w', encoding='utf-8')
+        self._sarif = open(self.sarif_file, 'w', encoding='utf-8')
+        # SARIF is one JSON document, so results are written between a fixed head and tail
+        head = {
+            'version': '2.1.0',
+            '$schema': SARIF_SCHEMA,
+            'runs': [{'tool': {'driver': {'name': tool, 'version': version}}, 'results': []}]
+        }
+        text = json.dumps(head)
+        split = text.rindex('[]') + 1
+        self._sarif.write(text[:split])
+        self._sarif_tail = text[split:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def markdown(self, text):
+        """Write a block of Markdown that is not a finding (headings, summaries, recommendations)"""
+        self._md.write(text)
+
+    def finding(self, severity, finding, markdown):
+        """Write one finding: its Markdown block as rendered by the tool, a JSONL record and a SARIF result"""
+        self._md.write(markdown)
+
+        record = dict(finding, severity=severity)
+        self._jsonl.write(json.dumps(record, default=str) + '\n')
+
+        title = finding.get('title') or finding.get('message') or ''
+        category, endpoint = classify(title, finding.get('details'))
+        result = {
+            'ruleId': category,
+            'level': SARIF_LEVELS.get(severity.lower(), 'none'),
+            'message': {'text': title},
+            'properties': {
+                'severity': severity,
+                'timestamp': finding.get('timestamp'),
+                'details': finding.get('details'),
+                'occurrences': finding.get('occurrences', 1),
+                'samples': finding.get('samples', [])
+            }
+        }
+        if endpoint:
+            result['locations'] = [{'physicalLocation': {'artifactLocation': {'uri': f"{self.target}{endpoint}"}}}]
+        self._sarif.write((',' if self.count else '') + json.dumps(result, default=str))
+        self.count += 1
+
+    def close(self):
+        if self._md is None:
+            return
+        self._sarif.write(self._sarif_tail)
+        for f in (self._md, self._jsonl, self._sarif):
+            f.close()
+        self._md = self._jsonl = self._sarif = None
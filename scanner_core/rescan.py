@@ -0,0 +1,151 @@
+"""
+Incremental re-scan support
+Keeps, per target, each GET's validators (ETag, Last-Modified) and body, and
+each plan probe's response fingerprint and findings from earlier runs. The
+transport turns the validators into If-None-Match / If-Modified-Since and
+replays the stored body on a 304; the executor carries a probe's findings
+forward when its response is byte-for-byte what it was last time, and only
+runs detectors on what changed.
+"""
+
+import base64
+import hashlib
+import json
+import os
+from email.parser import BytesParser
+from http.client import HTTPMessage
+
+
+class RescanStore:
+    """On-disk record of validators, bodies and probe findings from earlier scans of one target"""
+
+    # Bodies larger than this are not kept, so their URLs are simply fetched again
+    MAX_BODY = 2 ** 20
+
+    def __init__(self, path, target):
+        self.path = path
+        self.target = target
+        self.stats = {
+            'revalidated': 0,
+            'stored': 0,
+            'carried': 0,
+            'analysed': 0
+        }
+        self._validators = {}
+        self._bodies = {}
+        self._probes = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except ValueError:
+                return
+        state = data.get(self.target, {})
+        self._validators = state.get('validators', {})
+        self._bodies = state.get('bodies', {})
+        self._probes = state.get('probes', {})
+
+    def save(self):
+        """Write the store atomically, keeping other targets' records"""
+        if not self.path:
+            return
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                try:
+                    data = json.load(f)
+                except ValueError:
+                    data = {}
+        # Drop bodies nothing refers to any more
+        used = {entry['sha256'] for entry in self._validators.values()}
+        data[self.target] = {
+            'validators': self._validators,
+            'bodies': {digest: body for digest, body in self._bodies.items() if digest in used},
+            'probes': self._probes
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def request_key(url, headers):
+        header_items = sorted((k.lower(), str(v)) for k, v in (headers or {}).items())
+        return f"{url} {hashlib.sha1(repr(header_items).encode()).hexdigest()[:12]}"
+
+    @staticmethod
+    def body_hash(content):
+        return hashlib.sha256(content).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Conditional GETs (used by the transport)
+    # ------------------------------------------------------------------
+
+    def conditional_headers(self, url, headers):
+        """If-None-Match / If-Modified-Since for a request seen on an earlier run, else {}"""
+        entry = self._validators.get(self.request_key(url, headers))
+        if entry is None:
+            return {}
+        conditions = {}
+        if entry.get('etag'):
+            conditions['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditions['If-Modified-Since'] = entry['last_modified']
+        return conditions
+
+    def remember(self, url, headers, response):
+        """Store a complete response that carries validators so the next run can revalidate it"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or response.truncated or not (etag or last_modified) \
+                or len(response.content) > self.MAX_BODY:
+            return
+        digest = self.body_hash(response.content)
+        self._bodies.setdefault(digest, base64.b64encode(response.content).decode('ascii'))
+        self._validators[self.request_key(url, headers)] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': response.headers.as_string(),
+            'sha256': digest
+        }
+        self.stats['stored'] += 1
+
+    def replay(self, url, headers):
+        """(status, reason, headers, content) of the stored response for a 304"""
+        entry = self._validators.get(self.request_key(url, headers))
+        if entry is None or entry['sha256'] not in self._bodies:
+            return None
+        self.stats['revalidated'] += 1
+        stored_headers = BytesParser(_class=HTTPMessage).parsebytes(entry['headers'].encode('latin-1', 'replace'))
+        return entry['status'], entry['reason'], stored_headers, base64.b64decode(self._bodies[entry['sha256']])
+
+    # ------------------------------------------------------------------
+    # Probe findings (used by the plan executor)
+    # ------------------------------------------------------------------
+
+    def carried_findings(self, probe_id, response):
+        """Last run's findings for a probe whose response has not changed, else None"""
+        entry = self._probes.get(probe_id)
+        if entry is None or entry['status'] != response.status_code \
+                or entry['sha256'] != self.body_hash(response.content):
+            self.stats['analysed'] += 1
+            return None
+        self.stats['carried'] += 1
+        return [tuple(finding) for finding in entry['findings']]
+
+    def record_findings(self, probe_id, response, findings):
+        self._probes[probe_id] = {
+            'status': response.status_code,
+            'sha256': self.body_hash(response.content),
+            'findings': [list(finding) for finding in findings]
+        }
+
+    def summary(self):
+        return (f"Incremental re-scan: {self.stats['revalidated']} responses unchanged (304), "
+                f"{self.stats['carried']} probes carried forward, {self.stats['analysed']} analysed")
@@ -0,0 +1,283 @@
+"""
+Sharded plan execution across worker processes
+A coordinator cuts each target's probe plan into shards of probe indices and
+deals them to workers over authenticated multiprocessing connections. Workers
+are local processes it spawns, remote ones that connect to its address, or
+both. A plan is deterministic, so each worker rebuilds it from the same builder
+and only shard indices and findings cross the wire. A shard held by a worker
+that disconnects is put back on the queue for the others, and findings are
+reported in plan order whichever worker produced them.
+"""
+
+import collections
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+
+def parse_address(text):
+    """(host, port) from 'host:port' or ':port' (all interfaces)"""
+    host, sep, port = text.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got {text!r}")
+    return host or '0.0.0.0', int(port)
+
+
+class Shard:
+    """A slice of one target's plan: the probe indices a worker runs in one go"""
+
+    def __init__(self, shard_id, target, indices):
+        self.shard_id = shard_id
+        self.target = target
+        self.indices = indices
+
+    def __repr__(self):
+        return f"<Shard {self.shard_id} {self.target} probes={len(self.indices)}>"
+
+
+def make_shards(sizes, shard_size=25):
+    """Shards for {target: plan length}, alternating between targets
+
+    Each shard takes every n-th probe of its plan rather than a contiguous run,
+    so a shard spans several endpoints instead of sending one endpoint's whole
+    payload list from a single worker.
+    """
+    lanes = []
+    for target, size in sizes.items():
+        count = max(1, -(-size // shard_size)) if size else 0
+        lanes.append([(target, list(range(k, size, count))) for k in range(count)])
+    shards = []
+    for round_ in range(max((len(lane) for lane in lanes), default=0)):
+        for lane in lanes:
+            if round_ < len(lane):
+                target, indices = lane[round_]
+                shards.append(Shard(len(shards), target, indices))
+    return shards
+
+
+class WorkerStats:
+    """What one worker got through: shards, probes and requests over its busy time"""
+
+    def __init__(self, name):
+        self.name = name
+        self.shards = 0
+        self.probes = 0
+        self.requests = 0
+        self.busy = 0.0
+        self.lost = False
+
+    def add(self, probes, metrics):
+        self.shards += 1
+        self.probes += probes
+        self.requests += metrics.get('requests', 0)
+        self.busy += metrics.get('elapsed', 0.0)
+
+    def summary(self):
+        busy = max(self.busy, 1e-6)
+        return (f"{self.name}: {self.shards} shards, {self.probes} probes, {self.requests} requests in "
+                f"{self.busy:.1f}s ({self.probes / busy:.1f} probes/s, {self.requests / busy:.1f} req/s)"
+                f"{' - disconnected' if self.lost else ''}")
+
+
+class Coordinator:
+    """Deal shards of one or more targets' plans to workers and gather their findings in plan order"""
+
+    def __init__(self, plans, shard_size=25, address=('127.0.0.1', 0), authkey=None):
+        self.plans = dict(plans)
+        self.authkey = authkey or os.urandom(16)
+        self.shards = make_shards({target: len(plan) for target, plan in self.plans.items()}, shard_size)
+        self.workers = {}
+        self.requeued = 0
+        # target -> {(endpoint, reason): probes} skipped by the workers' circuit breakers
+        self.skipped = {}
+        self._pending = collections.deque(self.shards)
+        self._remaining = len(self.shards)
+        self._live = 0
+        self._results = {target: [None] * len(plan) for target, plan in self.plans.items()}
+        self._next = dict.fromkeys(self.plans, 0)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+
+    def run(self, emit, announce=print, workers=0, build=None, remote=False, progress=None):
+        """Run every shard; emit(target, severity, message, details) is called in each plan's order
+
+        workers local processes run run_worker(build); with remote=True the
+        coordinator also waits for workers that connect to self.address on
+        their own. Raises RuntimeError if every worker is gone with shards
+        still outstanding and none can join.
+        """
+        self._emit = emit
+        self._announce = announce
+        self._progress = progress
+        if progress is not None:
+            progress.add_total(sum(len(plan) for plan in self.plans.values()))
+        threading.Thread(target=self._accept, name='shard-accept', daemon=True).start()
+
+        # Spawned rather than forked: the parent has live event-loop and console threads
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=run_worker, args=(self.address, self.authkey, build),
+                                     name=f"shard-worker-{i}", daemon=True) for i in range(workers)]
+        for process in processes:
+            process.start()
+        try:
+            with self._cond:
+                while self._remaining:
+                    self._cond.wait(0.5)
+                    if (self._remaining and not remote and not self._live
+                            and not any(process.is_alive() for process in processes)):
+                        raise RuntimeError(f"All workers exited with {self._remaining} shards left")
+        finally:
+            self.close()
+            for process in processes:
+                process.join(5)
+                if process.is_alive():
+                    process.terminate()
+        for target, plan in self.plans.items():
+            for title in plan.sections.get(len(plan), ()):
+                announce(title)
+        return sum(len(plan) for plan in self.plans.values())
+
+    def summary(self):
+        lines = [stats.summary() for stats in self.workers.values()]
+        if self.requeued:
+            lines.append(f"{self.requeued} shards reassigned after a worker disconnected")
+        return lines
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # accept() does not return when its socket is closed, so wake it with a connection of our own
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+
+    # ------------------------------------------------------------------
+    # Per-worker connections
+    # ------------------------------------------------------------------
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError:
+                continue
+            except OSError:
+                return
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), name='shard-conn', daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            _, name = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            return
+        with self._cond:
+            if name in self.workers:
+                name = f"{name}#{len(self.workers)}"
+            stats = self.workers[name] = WorkerStats(name)
+            self._live += 1
+
+        shard = None
+        try:
+            while True:
+                with self._cond:
+                    # Idle workers wait here for a shard given back by a worker that disconnected
+                    while not self._pending and self._remaining:
+                        self._cond.wait()
+                    if not self._remaining:
+                        break
+                    shard = self._pending.popleft()
+                conn.send(('shard', shard))
+                _, shard_id, results, metrics = conn.recv()
+                stats.add(len(shard.indices), metrics)
+                self._complete(shard, results, name, metrics.get('skipped'))
+                shard = None
+            conn.send(('stop',))
+        except (EOFError, OSError):
+            stats.lost = True
+            if shard is not None:
+                with self._cond:
+                    self._pending.appendleft(shard)
+                    self.requeued += 1
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify_all()
+            conn.close()
+
+    def _complete(self, shard, results, worker, skipped=None):
+        with self._cond:
+            totals = self.skipped.setdefault(shard.target, {})
+            for key, count in (skipped or {}).items():
+                totals[key] = totals.get(key, 0) + count
+            store = self._results[shard.target]
+            for index, findings in zip(shard.indices, results):
+                store[index] = findings
+            self._remaining -= 1
+            self._flush(shard.target)
+            if self._progress is not None:
+                for _ in shard.indices:
+                    self._progress.advance()
+                self._progress.debug(f"  ✓ shard {shard.shard_id} ({shard.target}) from {worker}")
+            self._cond.notify_all()
+
+    def _flush(self, target):
+        # Reorder buffer: a probe's findings go out once every earlier probe of its plan is in
+        plan = self.plans[target]
+        results = self._results[target]
+        while self._next[target] < len(results) and results[self._next[target]] is not None:
+            index = self._next[target]
+            for title in plan.sections.get(index, ()):
+                self._announce(title)
+            for finding in results[index]:
+                self._emit(target, *finding)
+            results[index] = ()
+            self._next[target] += 1
+
+
+def run_worker(address, authkey, build, name=None):
+    """Worker loop: take shards from a coordinator, run their probes and send back the findings
+
+    build(target) returns (executor, plan, close) for a target; it is called
+    once per target this worker is given, and close() releases whatever it
+    built (transport, console, stores) when the worker stops.
+    """
+    conn = Client(address, authkey=authkey)
+    conn.send(('hello', name or f"{socket.gethostname()}:{os.getpid()}"))
+    built = {}
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'stop':
+                break
+            shard = message[1]
+            if shard.target not in built:
+                built[shard.target] = build(shard.target)
+            executor, plan, _ = built[shard.target]
+            requests = executor.transport.stats['requests']
+            started = time.perf_counter()
+            results = executor.collect(plan.probes[index] for index in shard.indices)
+            breaker = getattr(executor, 'breaker', None)
+            conn.send(('done', shard.shard_id, results,
+                       {'requests': executor.transport.stats['requests'] - requests,
+                        'elapsed': time.perf_counter() - started,
+                        'skipped': breaker.take_unreported() if breaker is not None else {}}))
+    except EOFError:
+        # The coordinator finished or went away
+        pass
+    finally:
+        conn.close()
+        for _, _, close in built.values():
+            close()
@@ -0,0 +1,60 @@
+"""
+Magic-byte sniffing for sensitive artifact probes
+Whether /backup.zip or /.git/HEAD really exists is decided by its first few
+bytes, so these probes ask for a small Range (and cap the read in case the
+server ignores it) instead of downloading the whole file.
+"""
+
+import re
+
+SNIFF_BYTES = 512
+
+GIT_HEAD = re.compile(rb'(ref: refs/[\w./-]+|[0-9a-f]{40})\s*$')
+SQL_DUMP = re.compile(rb'^\s*(-- (MySQL|MariaDB|PostgreSQL) (database )?dump|CREATE TABLE|INSERT INTO'
+                      rb'|DROP TABLE|SET NAMES|BEGIN TRANSACTION)', re.I | re.M)
+
+
+def _is_sql_dump(head):
+    # An HTML page that happens to mention SQL is not a dump
+    return not head.lstrip().startswith(b'<') and SQL_DUMP.search(head) is not None
+
+
+# (kind, description, test) in the order they are tried
+SIGNATURES = [
+    ('zip', 'ZIP archive', lambda head: head.startswith((b'PK\x03\x04', b'PK\x05\x06', b'PK\x07\x08'))),
+    ('gzip', 'gzip archive', lambda head: head.startswith(b'\x1f\x8b')),
+    ('7z', '7-Zip archive', lambda head: head.startswith(b"7z\xbc\xaf\x27\x1c")),
+    ('rar', 'RAR archive', lambda head: head.startswith(b'Rar!\x1a\x07')),
+    ('tar', 'tar archive', lambda head: head[257:262] == b'ustar'),
+    ('sqlite', 'SQLite database', lambda head: head.startswith(b'SQLite format 3\x00')),
+    ('ds_store', '.DS_Store index', lambda head: head[:8] == b'\x00\x00\x00\x01Bud1'),
+    ('git_head', 'git HEAD reference', lambda head: GIT_HEAD.match(head) is not None),
+    ('sql_dump', 'SQL dump', _is_sql_dump),
+]
+
+
+def sniff_artifact(head):
+    """Return (kind, description) for a recognised file prefix, or None"""
+    for kind, description, test in SIGNATURES:
+        if test(head):
+            return kind, description
+    return None
+
+
+def range_headers(size=SNIFF_BYTES):
+    """Headers asking for just the first bytes of the identity representation"""
+    # Ranges apply to the encoded body, so ask for it uncompressed
+    return {'Range': f'bytes=0-{size - 1}', 'Accept-Encoding': 'identity'}
+
+
+def total_size(response):
+    """Full size of the file behind a ranged or capped response, when the server says"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length', '')
+    if response.status_code == 200 and length.strip().isdigit():
+        return int(length)
+    return None
@@ -0,0 +1,141 @@
+"""
+Adaptive per-host throttling
+Each host gets an in-flight limit that grows while its answers stay healthy
+and is cut back when the host pushes back: additive increase, multiplicative
+decrease (AIMD), as in TCP congestion control. A 429 or 503, a failed
+request, or a p95 latency well above the best the host has shown all count
+as push-back, and a Retry-After header holds every new request for that host
+until the server said to come back. The limit starts small, doubles each
+round trip until the first push-back (slow start), and from then on grows by
+one slot per interval of clean answers. Rate limits are counted over windows
+of seconds, not round trips, so growth on that scale lets the limit settle
+just under the highest rate the host tolerates instead of tripping it again
+within a few round trips.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from .load import parse_retry_after
+
+# Statuses that mean "slow down" rather than "this probe failed"
+BACKOFF_STATUSES = (429, 503)
+# Longest Retry-After honoured, in seconds; anything longer would stall the scan outright
+MAX_PAUSE = 120
+# p95 is recomputed after this many answers, once the latency window is full
+LATENCY_CHECK_EVERY = 10
+# Latency rises smaller than this are noise, however large they are relative to a fast host
+MIN_LATENCY_RISE = 0.05
+
+
+class HostThrottle:
+    """AIMD in-flight limit for one host, used as `async with throttle:` around a request"""
+
+    def __init__(self, maximum, initial=4, minimum=1, decrease=0.5, increase_interval=1.0, latency_factor=2.0,
+                 window=40):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.decrease = decrease
+        self.increase_interval = increase_interval
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.peak = self.limit
+        self.cuts = 0
+        self.backoffs = 0
+        self.pauses = 0
+        self.paused = 0.0
+        self.healthy_p95 = None
+        self._slow_start = True
+        self._latencies = deque(maxlen=window)
+        self._answers = 0
+        self._last_cut = 0.0
+        self._grown_at = 0.0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            while True:
+                delay = self._resume_at - time.monotonic()
+                if delay > 0:
+                    # Honouring Retry-After: nothing new goes to this host until then
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                elif self.in_flight < int(self.limit):
+                    break
+                else:
+                    await self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            # The limit may have grown as well as a slot freed up
+            self._cond.notify_all()
+
+    def observe(self, status=None, elapsed=None, retry_after=None):
+        """Feed back one request's outcome; status None means it failed without an answer"""
+        now = time.monotonic()
+        if status is None or status in BACKOFF_STATUSES:
+            if status is not None:
+                self.backoffs += 1
+            delay = min(parse_retry_after(retry_after) or 0, MAX_PAUSE)
+            if delay and now + delay > self._resume_at:
+                # Answers to requests sent before the pause only extend it
+                if now >= self._resume_at:
+                    self.pauses += 1
+                    self.paused += delay
+                else:
+                    self.paused += now + delay - self._resume_at
+                self._resume_at = now + delay
+            self._cut(now)
+            return
+
+        if elapsed is not None:
+            self._latencies.append(elapsed)
+            self._answers += 1
+            if len(self._latencies) == self._latencies.maxlen and self._answers % LATENCY_CHECK_EVERY == 0:
+                p95 = self.p95()
+                if self.healthy_p95 is None or p95 < self.healthy_p95:
+                    self.healthy_p95 = p95
+                elif p95 > self.healthy_p95 * self.latency_factor and p95 - self.healthy_p95 > MIN_LATENCY_RISE:
+                    self._cut(now)
+                    # Judge the smaller limit on its own latencies
+                    self._latencies.clear()
+                    return
+
+        # Slow start adds a slot per answer (doubling per round trip), then one per increase_interval
+        if self._slow_start:
+            self.limit = min(self.maximum, self.limit + 1)
+        elif now - self._grown_at >= self.increase_interval:
+            self.limit = min(self.maximum, self.limit + 1)
+            self._grown_at = now
+        self.peak = max(self.peak, self.limit)
+
+    def p95(self):
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _cut(self, now):
+        # Every request already in flight may come back throttled; that is one signal, not many
+        if now - self._last_cut < max(0.1, self.p95() or 0):
+            return
+        self._last_cut = self._grown_at = now
+        self._slow_start = False
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        self.cuts += 1
+
+    def summary(self):
+        text = f"{int(self.limit)} in flight (peak {int(self.peak)}), {self.cuts} cuts"
+        if self.backoffs:
+            text += f", {self.backoffs} 429/503"
+        if self.pauses:
+            text += f", {self.pauses} Retry-After pauses ({self.paused:.0f}s)"
+        return text
@@ -0,0 +1,816 @@
+"""
+Asyncio HTTP/1.1 transport shared by the portfolio scanners
+Runs an event loop on a background thread so the synchronous test_* methods
+can fan out whole endpoint x payload matrices with bounded concurrency.
+With http2=True (needs the h2 package) requests to hosts that speak HTTP/2
+are multiplexed as streams over one connection per host instead.
+"""
+
+import asyncio
+import json as jsonlib
+import socket
+import ssl
+import threading
+import time
+import uuid
+import zlib
+from datetime import timedelta
+from email.parser import BytesParser
+from http.client import HTTPMessage
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from .http2 import HTTP2_AVAILABLE, H2Session
+from .metrics import RequestTiming
+from .throttle import HostThrottle
+
+DEFAULT_USER_AGENT = 'portfolio-scanner/1.0'
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 30
+# Bodies are read and decoded in bounded pieces and never kept past this many bytes
+DEFAULT_MAX_BODY = 8 * 2 ** 20
+READ_SIZE = 64 * 1024
+# Most requests one host's HTTP/2 connection may carry at once, whatever stream limit the server offers
+MAX_H2_STREAMS = 256
+# StreamWriter.start_tls (Python 3.11+) lets the TLS handshake be timed apart from the TCP connect
+SPLIT_TLS = hasattr(asyncio.StreamWriter, 'start_tls')
+
+
+class Response:
+    """Minimal response object mirroring the parts of requests.Response the scanners use"""
+
+    def __init__(self, url, status_code, reason, headers, content, elapsed):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+        self.history = []
+        # True when the body was cut short by a byte cap or a streaming verdict
+        self.truncated = False
+        # True when the server answered 304 and the body was replayed from an earlier run
+        self.revalidated = False
+        # Phase-by-phase RequestTiming of the request that got this response; None if it was never sent
+        self.timing = None
+        self._text = None
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get('Content-Type', '')
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return 'utf-8'
+
+    @property
+    def text(self):
+        if self._text is None:
+            try:
+                self._text = self.content.decode(self.encoding, errors='replace')
+            except LookupError:
+                self._text = self.content.decode('utf-8', errors='replace')
+        return self._text
+
+    @property
+    def cookies(self):
+        jar = {}
+        for header in self.headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except Exception:
+                continue
+            for name, morsel in cookie.items():
+                jar[name] = morsel.value
+        return jar
+
+    def json(self):
+        return jsonlib.loads(self.text)
+
+    def __repr__(self):
+        return f"<Response [{self.status_code}]>"
+
+
+def _encode_body(data=None, json=None, files=None):
+    """Encode a request body the same way requests does for data/json/files"""
+    if files:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for key, value in (data or {}).items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n'.encode())
+            parts.append(str(value).encode() + b'\r\n')
+        for field, spec in files.items():
+            filename, content, content_type = (list(spec) + ['application/octet-stream'])[:3]
+            if isinstance(content, str):
+                content = content.encode()
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                         f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode())
+            parts.append(content + b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+    if json is not None:
+        return jsonlib.dumps(json).encode(), 'application/json'
+    if data is not None:
+        if isinstance(data, (bytes, str)):
+            return data.encode() if isinstance(data, str) else data, None
+        return urlencode(data, doseq=True).encode(), 'application/x-www-form-urlencoded'
+    return b'', None
+
+
+class _ContentDecoder:
+    """Incremental gzip/deflate decoding that passes the bytes through if they are not compressed"""
+
+    def __init__(self, encoding):
+        self.encoding = (encoding or '').lower()
+        self.identity = self.encoding not in ('gzip', 'deflate')
+        self._zlib = None
+
+    def decode(self, data):
+        """Yield decoded pieces of at most READ_SIZE bytes so a small compressed chunk cannot balloon"""
+        if self.identity:
+            yield data
+            return
+
+        if self._zlib is None:
+            if self.encoding == 'gzip':
+                wbits = 16 + zlib.MAX_WBITS
+            # Servers disagree on whether deflate means a zlib stream or a raw one
+            elif len(data) >= 2 and data[0] & 0x0f == 8 and ((data[0] << 8) | data[1]) % 31 == 0:
+                wbits = zlib.MAX_WBITS
+            else:
+                wbits = -zlib.MAX_WBITS
+            self._zlib = zlib.decompressobj(wbits)
+
+        try:
+            piece = self._zlib.decompress(data, READ_SIZE)
+            while piece:
+                yield piece
+                piece = self._zlib.decompress(self._zlib.unconsumed_tail, READ_SIZE) \
+                    if self._zlib.unconsumed_tail else b''
+        except zlib.error:
+            self.identity = True
+            yield data
+
+    @property
+    def drained(self):
+        """True when every decoded byte of the input seen so far has been handed out"""
+        return self.identity or (self._zlib is not None and self._zlib.eof)
+
+
+class AsyncTransport:
+    """Pooled asyncio HTTP client with a global and a per-host concurrency cap"""
+
+    def __init__(self, max_concurrency=64, per_host_limit=16, timeout=10, user_agent=DEFAULT_USER_AGENT,
+                 cache=None, max_body=DEFAULT_MAX_BODY, rescan=None, adaptive=True, http2=False, cafile=None,
+                 metrics=None):
+        if http2 and not HTTP2_AVAILABLE:
+            raise RuntimeError('HTTP/2 needs the h2 package (pip install h2)')
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        # Adaptive hosts get an AIMD limit that per_host_limit only caps; otherwise it is a fixed semaphore
+        self.adaptive = adaptive
+        # Multiplex each host's requests over one HTTP/2 connection where the host supports it
+        self.http2 = http2
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.cache = cache
+        self.max_body = max_body
+        # A RescanStore turns GETs seen on earlier runs into conditional requests
+        self.rescan = rescan
+        # A ProbeMetrics gets every request's timing breakdown
+        self.metrics = metrics
+        self.stats = {
+            'requests': 0,
+            'errors': 0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'bytes_received': 0,
+            'truncated': 0
+        }
+
+        self._global_slots = asyncio.Semaphore(max_concurrency)
+        self._host_slots = {}
+        self._throttles = {}
+        # (scheme, host, port) -> per-host limit raised above per_host_limit, e.g. for an HTTP/2 host
+        self._host_limits = {}
+        self._pool = {}
+        # (scheme, host, port) -> H2Session, or False for a host that only speaks HTTP/1.1
+        self._sessions = {}
+        self._session_locks = {}
+        self._h2_sessions = []
+        self._cookies = {}
+        self._ssl_context = ssl.create_default_context()
+        self._h2_ssl_context = ssl.create_default_context()
+        self._h2_ssl_context.set_alpn_protocols(['h2', 'http/1.1'])
+        # An extra CA bundle to trust, e.g. a staging deployment's internal CA
+        if cafile:
+            self._ssl_context.load_verify_locations(cafile)
+            self._h2_ssl_context.load_verify_locations(cafile)
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='scanner-transport', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    # ------------------------------------------------------------------
+    # Synchronous facade used by the test_* methods
+    # ------------------------------------------------------------------
+
+    def run(self, coro):
+        """Run a coroutine on the transport loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def request(self, method, url, **kwargs):
+        """Send one request, raising on failure like requests.Session.request"""
+        return self.run(self.arequest(method, url, **kwargs))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def fetch_all(self, specs):
+        """Send many requests concurrently; returns responses in input order, None for failures"""
+        return self.run(self.afetch_all(specs))
+
+    async def afetch_all(self, specs):
+        return await asyncio.gather(*(self._safe_request(spec) for spec in specs))
+
+    async def _safe_request(self, spec):
+        spec = dict(spec)
+        method = spec.pop('method', 'GET')
+        url = spec.pop('url')
+        try:
+            return await self.arequest(method, url, **spec)
+        except Exception:
+            return None
+
+    def close(self):
+        """Close pooled connections and stop the loop thread"""
+        if not self.loop.is_running():
+            return
+        self.run(self._close_pool())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _close_pool(self):
+        # Requests still in flight after an interrupt are abandoned, not left to the dying loop
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for connections in self._pool.values():
+            for _, writer in connections:
+                writer.close()
+        self._pool.clear()
+        for session in self._sessions.values():
+            if session:
+                session.close()
+        self._sessions.clear()
+
+    # ------------------------------------------------------------------
+    # Async request path
+    # ------------------------------------------------------------------
+
+    def _host_semaphore(self, host_key):
+        if host_key not in self._host_slots:
+            self._host_slots[host_key] = asyncio.Semaphore(self._host_limits.get(host_key, self.per_host_limit))
+        return self._host_slots[host_key]
+
+    def _host_throttle(self, host_key):
+        if host_key not in self._throttles:
+            self._throttles[host_key] = HostThrottle(self._host_limits.get(host_key, self.per_host_limit))
+        return self._throttles[host_key]
+
+    def _widen_host(self, host_key, limit):
+        """Let a host have up to limit requests in flight, for one that multiplexes them over HTTP/2"""
+        old = self._host_limits.get(host_key, self.per_host_limit)
+        if limit <= old:
+            return
+        self._host_limits[host_key] = limit
+        semaphore = self._host_slots.get(host_key)
+        if semaphore is not None:
+            # Semaphores cannot be resized, but each release adds a slot for good
+            for _ in range(limit - old):
+                semaphore.release()
+        throttle = self._throttles.get(host_key)
+        if throttle is not None:
+            # Only the ceiling moves: the AIMD limit still has to grow to it on healthy answers
+            throttle.maximum = limit
+
+    def throttle_summary(self):
+        """Where each host's adaptive limit ended up, or None if nothing was throttled"""
+        if not self._throttles:
+            return None
+        hosts = '; '.join(f"{host}{'' if port in (80, 443) else f':{port}'} {throttle.summary()}"
+                          for (_, host, port), throttle in self._throttles.items())
+        return f"Adaptive throttle: {hosts}"
+
+    def http2_summary(self):
+        """Connection reuse and stream concurrency over HTTP/2, or None if it is off"""
+        if not self.http2:
+            return None
+        sessions = self._h2_sessions
+        streams = sum(session.opened for session in sessions)
+        text = (f"HTTP/2: {streams} streams over {len(sessions)} connections "
+                f"({streams - len(sessions) if streams else 0} on an already open connection), "
+                f"peak {max((session.peak for session in sessions), default=0)} concurrent streams on one")
+        fallback = sum(1 for session in self._sessions.values() if session is False)
+        if fallback:
+            text += f"; {fallback} hosts without HTTP/2 stayed on HTTP/1.1"
+        return text
+
+    async def arequest(self, method, url, params=None, data=None, json=None, files=None,
+                       headers=None, timeout=None, allow_redirects=True, cache=True,
+                       max_bytes=None, on_chunk=None, throttle=True, gate=None):
+        """Send a request and follow redirects the way requests does
+
+        max_bytes caps the decoded body kept for this request (default: the transport's
+        max_body). on_chunk(response, chunk) is called with each decoded piece of the
+        final response as it arrives; a truthy return stops the read early.
+        throttle=False sends it outside the host's adaptive limit, which neither delays
+        it nor learns from it (load measurement wants the server's raw behaviour).
+        gate() is called once the request holds its concurrency slots, just before it is
+        sent; raising from it abandons the request (e.g. a circuit breaker that tripped
+        while the request was queued).
+        """
+        method, url, headers, body = self._prepare(method, url, params, data, json, files, headers)
+        reading = (self.max_body if max_bytes is None else max_bytes, on_chunk)
+
+        # A streamed read may stop wherever its callback decides, so it is never shared
+        if self.cache is None or not cache or on_chunk is not None:
+            if self.cache is not None and not self.cache.is_cacheable(method):
+                self.cache.invalidate(url)
+            return await self._fetch(method, url, headers, body, timeout, allow_redirects, reading, throttle, gate)
+
+        if not self.cache.is_cacheable(method):
+            try:
+                return await self._fetch(method, url, headers, body, timeout, allow_redirects, reading, throttle,
+                                         gate)
+            finally:
+                self.cache.invalidate(url)
+
+        # The cookie jar is part of what the server sees, so it is part of the key
+        key_headers = dict(headers)
+        cookie = self._cookie_header(urlsplit(url).hostname)
+        if cookie and not any(k.lower() == 'cookie' for k in headers):
+            key_headers['Cookie'] = cookie
+        key = self.cache.make_key(method, url, key_headers, body)
+        key = key + (allow_redirects, reading[0])
+        return await self.cache.fetch(
+            key, lambda: self._fetch(method, url, headers, body, timeout, allow_redirects, reading, throttle, gate))
+
+    async def _fetch(self, method, url, headers, body, timeout, allow_redirects, reading, throttle=True, gate=None):
+        if self.rescan is None or method != 'GET' \
+                or any(k.lower() in ('if-none-match', 'if-modified-since') for k in headers):
+            return await self._request_uncached(method, url, headers, body, timeout, allow_redirects, reading,
+                                                throttle, gate)
+
+        conditions = self.rescan.conditional_headers(url, headers)
+        response = await self._request_uncached(method, url, dict(headers, **conditions), body, timeout,
+                                                allow_redirects, reading, throttle, gate)
+        if response.status_code == 304 and conditions:
+            stored = self.rescan.replay(url, headers)
+            if stored is not None:
+                return self._replay(response, stored, reading)
+        self.rescan.remember(url, headers, response)
+        return response
+
+    def _replay(self, revalidation, stored, reading):
+        """Rebuild the stored response behind a 304, honouring the byte cap and on_chunk like a live read"""
+        status, reason, headers, content = stored
+        max_bytes, on_chunk = reading
+        response = Response(revalidation.url, status, reason, headers, b'', revalidation.elapsed)
+        response.history = revalidation.history
+        response.revalidated = True
+
+        kept = content if max_bytes is None else content[:max_bytes]
+        if on_chunk is not None:
+            for start in range(0, len(kept), READ_SIZE):
+                if on_chunk(response, kept[start:start + READ_SIZE]):
+                    kept = kept[:start + READ_SIZE]
+                    break
+        response.content = kept
+        response.truncated = len(kept) < len(content)
+        return response
+
+    def _prepare(self, method, url, params, data, json, files, headers):
+        method = method.upper()
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(params, doseq=True)}"
+        body, content_type = _encode_body(data, json, files)
+        headers = dict(headers or {})
+        if content_type and not any(k.lower() == 'content-type' for k in headers):
+            headers['Content-Type'] = content_type
+        return method, url, headers, body
+
+    # ------------------------------------------------------------------
+    # Raw building blocks for engines that drive their own connections
+    # ------------------------------------------------------------------
+
+    def build_request(self, method, url, params=None, data=None, json=None, files=None, headers=None):
+        """Serialise a request exactly as arequest would send it; returns (method, url, wire bytes)"""
+        method, url, headers, body = self._prepare(method, url, params, data, json, files, headers)
+        return method, url, self._build_head(method, urlsplit(url), headers, body) + body
+
+    async def open_connection(self, url):
+        """A fresh connection to url's host that bypasses the pool and the concurrency caps"""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return await self._connect(parts.scheme, parts.hostname, port)
+
+    async def read_response(self, reader, method, url, max_bytes=None, sent_at=None):
+        """Read one response from a connection opened with open_connection"""
+        start = sent_at if sent_at is not None else time.perf_counter()
+        status, reason, headers = await self._read_head(reader)
+        response = Response(url, status, reason, headers, b'',
+                            timedelta(seconds=time.perf_counter() - start))
+        await self._read_body(reader, method, response, self.max_body if max_bytes is None else max_bytes, None)
+        self.stats['requests'] += 1
+        self._store_cookies(urlsplit(url).hostname, headers)
+        return response
+
+    async def _request_uncached(self, method, url, headers, body, timeout, allow_redirects, reading=(None, None),
+                                throttle=True, gate=None):
+        history = []
+        for _ in range(MAX_REDIRECTS + 1):
+            # Only the final hop is streamed to the callback; redirect bodies are drained as usual
+            response = await self._send_limited(method, url, headers, body, timeout or self.timeout,
+                                                reading, allow_redirects, throttle, gate)
+            gate = None
+            if not allow_redirects or response.status_code not in REDIRECT_CODES \
+                    or 'Location' not in response.headers:
+                response.history = history
+                return response
+
+            history.append(response)
+            url = urljoin(url, response.headers['Location'])
+            if response.status_code == 303 or (response.status_code in (301, 302) and method == 'POST'):
+                if method != 'HEAD':
+                    method = 'GET'
+                body = b''
+                headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
+
+        raise ConnectionError(f'Exceeded {MAX_REDIRECTS} redirects')
+
+    async def _send_limited(self, method, url, headers, body, timeout, reading=(None, None), follow=False,
+                            throttle=True, gate=None):
+        parts = urlsplit(url)
+        host_key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        throttle = self._host_throttle(host_key) if throttle and self.adaptive else None
+        timing = RequestTiming()
+        queued = time.perf_counter()
+        # Take the host's slot before a global one: a host already at its cap then waits without
+        # holding budget that other hosts could use, which keeps a batch of targets fair
+        async with throttle or self._host_semaphore(host_key), self._global_slots:
+            timing.queue = time.perf_counter() - queued
+            if gate is not None:
+                gate()
+            self.stats['requests'] += 1
+            try:
+                response = await asyncio.wait_for(
+                    self._send(method, url, parts, headers, body, reading, follow, timing), timeout)
+            except Exception:
+                self.stats['errors'] += 1
+                if throttle is not None:
+                    throttle.observe()
+                if self.metrics is not None:
+                    self.metrics.observe_error(url)
+                raise
+            if throttle is not None:
+                throttle.observe(response.status_code, response.elapsed.total_seconds(),
+                                 response.headers.get('Retry-After'))
+            if self.metrics is not None:
+                self.metrics.observe(url, response.status_code, timing)
+            return response
+
+    async def _acquire(self, scheme, host, port, timing=None):
+        key = (scheme, host, port)
+        idle = self._pool.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.stats['connections_reused'] += 1
+                return reader, writer, True
+            writer.close()
+
+        reader, writer = await self._connect(scheme, host, port, timing=timing)
+        return reader, writer, False
+
+    async def _connect(self, scheme, host, port, ssl_context=None, timing=None):
+        """Open a connection, timing DNS, TCP connect and the TLS handshake separately into timing"""
+        if scheme == 'https':
+            ssl_context = ssl_context or self._ssl_context
+        else:
+            ssl_context = None
+        timing = timing or RequestTiming()
+        started = time.perf_counter()
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        timing.dns = resolved - started
+        # Without start_tls the handshake happens inside the connect and is counted with it
+        split_tls = ssl_context is not None and SPLIT_TLS
+        error = None
+        for *_, address in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    address[0], address[1], ssl=None if split_tls else ssl_context,
+                    server_hostname=host if ssl_context and not split_tls else None, limit=2 ** 20)
+                break
+            except OSError as exc:
+                error = exc
+        else:
+            raise error or ConnectionError(f"No address for {host}")
+        connected = time.perf_counter()
+        timing.connect = connected - resolved
+        if split_tls:
+            try:
+                await writer.start_tls(ssl_context, server_hostname=host)
+            except BaseException:
+                writer.close()
+                raise
+            timing.tls = time.perf_counter() - connected
+        timing.connected = True
+        self.stats['connections_opened'] += 1
+        return reader, writer
+
+    def _release(self, key, reader, writer):
+        self._pool.setdefault(key, []).append((reader, writer))
+
+    def _build_head(self, method, parts, headers, body):
+        target, lines = self._header_lines(method, parts, headers, body)
+        head = f'{method} {target} HTTP/1.1\r\n'
+        head += ''.join(f'{k}: {v}\r\n' for k, v in lines.items())
+        return (head + '\r\n').encode('latin-1', errors='replace')
+
+    def _header_lines(self, method, parts, headers, body):
+        """(request target, {header: value}) for a request, with defaults, cookies and overrides merged"""
+        target = parts.path or '/'
+        if parts.query:
+            target += f'?{parts.query}'
+        default_port = 443 if parts.scheme == 'https' else 80
+        host = parts.hostname if parts.port in (None, default_port) else f'{parts.hostname}:{parts.port}'
+
+        lines = {
+            'Host': host,
+            'User-Agent': self.user_agent,
+            'Accept': '*/*',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        }
+        cookie = self._cookie_header(parts.hostname)
+        if cookie:
+            lines['Cookie'] = cookie
+        lower = {k.lower(): k for k in lines}
+        for key, value in headers.items():
+            lines.pop(lower.get(key.lower(), key), None)
+            lines[key] = value
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines['Content-Length'] = str(len(body))
+        return target, lines
+
+    async def _send(self, method, url, parts, headers, body, reading=(None, None), follow=False, timing=None):
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        timing = timing or RequestTiming()
+        if self.http2:
+            response = await self._send_h2(key, method, url, parts, headers, body, reading, follow, timing)
+            # None: the host does not speak HTTP/2, so the request goes over the HTTP/1.1 pool
+            if response is not None:
+                return response
+        payload = self._build_head(method, parts, headers, body) + body
+        max_bytes, on_chunk = reading
+
+        for attempt in range(2):
+            reader, writer, reused = await self._acquire(*key, timing=timing)
+            start = time.perf_counter()
+            try:
+                writer.write(payload)
+                timing.bytes_sent += len(payload)
+                await writer.drain()
+                status, reason, response_headers = await self._read_head(reader, timing)
+                first_byte = time.perf_counter()
+                timing.ttfb = first_byte - start
+                elapsed = timedelta(seconds=timing.ttfb)
+                response = Response(url, status, reason, response_headers, b'', elapsed)
+                response.timing = timing
+                if follow and status in REDIRECT_CODES and 'Location' in response_headers:
+                    keep_alive = await self._read_body(reader, method, response, max_bytes, None)
+                else:
+                    keep_alive = await self._read_body(reader, method, response, max_bytes, on_chunk)
+                timing.transfer = time.perf_counter() - first_byte
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # A pooled keep-alive socket may have been closed by the server; retry once fresh
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            break
+
+        if keep_alive:
+            self._release(key, reader, writer)
+        else:
+            writer.close()
+
+        self._store_cookies(parts.hostname, response_headers)
+        return response
+
+    async def _send_h2(self, key, method, url, parts, headers, body, reading=(None, None), follow=False,
+                       timing=None):
+        max_bytes, on_chunk = reading
+        timing = timing or RequestTiming()
+        target, lines = self._header_lines(method, parts, headers, body)
+        # Taken out once: a retry on a fresh connection needs the same authority, port included
+        authority = lines.pop('Host', parts.hostname)
+        for attempt in range(2):
+            session = await self._h2_session(*key, timing=timing)
+            if session is None:
+                return None
+            if session.opened:
+                self.stats['connections_reused'] += 1
+            start = time.perf_counter()
+            answered = False
+            try:
+                stream = await session.open_stream(method, parts.scheme, authority, target, lines, body)
+                # Headers go out HPACK-compressed, so only the body is counted on this path
+                timing.bytes_sent += len(body)
+                async with stream:
+                    status, reason, response_headers = await stream.head()
+                    answered = True
+                    first_byte = time.perf_counter()
+                    timing.ttfb = first_byte - start
+                    elapsed = timedelta(seconds=timing.ttfb)
+                    response = Response(url, status, reason, response_headers, b'', elapsed)
+                    response.timing = timing
+                    redirect = follow and status in REDIRECT_CODES and 'Location' in response_headers
+                    await self._read_body(None, method, response, max_bytes, None if redirect else on_chunk,
+                                          stream.pieces())
+                    timing.transfer = time.perf_counter() - first_byte
+            except ConnectionError:
+                # The connection went away (GOAWAY, closed by the server) before answering; retry once fresh
+                if attempt == 0 and session.closed and not answered:
+                    continue
+                raise
+            break
+
+        self._store_cookies(parts.hostname, response_headers)
+        return response
+
+    async def _h2_session(self, scheme, host, port, timing=None):
+        """The host's HTTP/2 session, opened on first use; None if the host only speaks HTTP/1.1"""
+        key = (scheme, host, port)
+        session = self._sessions.get(key)
+        if session is None or (session and session.closed):
+            # Requests arriving together share the one connection the first of them opens
+            async with self._session_locks.setdefault(key, asyncio.Lock()):
+                session = self._sessions.get(key)
+                if session is None or (session and session.closed):
+                    session = self._sessions[key] = await self._open_session(scheme, host, port, timing) or False
+        return session or None
+
+    async def _open_session(self, scheme, host, port, timing=None):
+        reader, writer = await self._connect(scheme, host, port, self._h2_ssl_context, timing)
+        if scheme == 'https':
+            if writer.get_extra_info('ssl_object').selected_alpn_protocol() != 'h2':
+                # The server chose HTTP/1.1; the connection is still good for the pool
+                self._release((scheme, host, port), reader, writer)
+                return None
+            session = await H2Session.start(reader, writer)
+        else:
+            # Cleartext has no ALPN, so h2c is tried with prior knowledge
+            session = await H2Session.start(reader, writer, prior_knowledge=True, timeout=self.timeout)
+            if session is None:
+                writer.close()
+                return None
+        self._h2_sessions.append(session)
+        # The per-host limit was sized for one request per connection; over HTTP/2 the server's
+        # stream limit is what bounds a host, so the limit is raised to it
+        streams = session.conn.remote_settings.max_concurrent_streams
+        self._widen_host((scheme, host, port), min(streams, MAX_H2_STREAMS))
+        return session
+
+    async def _read_head(self, reader, timing=None):
+        while True:
+            raw = await reader.readuntil(b'\r\n\r\n')
+            if timing is not None:
+                timing.bytes_received += len(raw)
+            status_line, _, header_block = raw.partition(b'\r\n')
+            version, status, reason = (status_line.decode('latin-1').split(' ', 2) + [''])[:3]
+            status = int(status)
+            if 100 <= status < 200:
+                continue
+            headers = BytesParser(_class=HTTPMessage).parsebytes(header_block)
+            return status, reason.strip(), headers
+
+    async def _read_body(self, reader, method, response, max_bytes, on_chunk, raw_pieces=None):
+        """Stream the body into response.content; returns whether the connection can be reused
+
+        raw_pieces replaces reading the body off reader, e.g. an HTTP/2 stream's data frames.
+        """
+        headers = response.headers
+        keep_alive = headers.get('Connection', '').lower() != 'close'
+        if method == 'HEAD' or response.status_code in (204, 304):
+            return keep_alive
+
+        chunked = 'chunked' in headers.get('Transfer-Encoding', '').lower()
+        length = None if chunked else headers.get('Content-Length')
+        decoder = _ContentDecoder(headers.get('Content-Encoding'))
+        pieces = []
+        received = 0
+        kept = 0
+        stopped = False
+        if raw_pieces is None:
+            raw_pieces = self._iter_body(reader, headers)
+        try:
+            async for raw in raw_pieces:
+                received += len(raw)
+                self.stats['bytes_received'] += len(raw)
+                if response.timing is not None:
+                    response.timing.bytes_received += len(raw)
+                for piece in decoder.decode(raw):
+                    if max_bytes is not None and kept + len(piece) > max_bytes:
+                        piece = piece[:max_bytes - kept]
+                        response.truncated = True
+                    kept += len(piece)
+                    pieces.append(piece)
+                    if on_chunk is not None and piece and on_chunk(response, piece):
+                        stopped = True
+                    if stopped or response.truncated:
+                        break
+                if stopped or response.truncated:
+                    break
+        finally:
+            await raw_pieces.aclose()
+
+        response.content = b''.join(pieces)
+        # A verdict on the last piece of a body leaves nothing unread on the socket
+        if stopped and not response.truncated and decoder.drained \
+                and length is not None and received == int(length):
+            return keep_alive
+        if stopped or response.truncated:
+            # The rest of the body is still on the wire, so the socket cannot go back to the pool
+            response.truncated = True
+            self.stats['truncated'] += 1
+            return False
+        return keep_alive and (chunked or length is not None)
+
+    async def _iter_body(self, reader, headers):
+        if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            while True:
+                size_line = await reader.readuntil(b'\r\n')
+                size = int(size_line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Consume optional trailers up to the terminating blank line
+                    while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                        pass
+                    return
+                while size:
+                    piece = await reader.readexactly(min(size, READ_SIZE))
+                    size -= len(piece)
+                    yield piece
+                await reader.readexactly(2)
+
+        length = headers.get('Content-Length')
+        if length is not None:
+            remaining = int(length)
+            while remaining:
+                piece = await reader.readexactly(min(remaining, READ_SIZE))
+                remaining -= len(piece)
+                yield piece
+            return
+
+        while True:
+            piece = await reader.read(READ_SIZE)
+            if not piece:
+                return
+            yield piece
+
+    def _cookie_header(self, host):
+        cookies = self._cookies.get(host)
+        if not cookies:
+            return None
+        return '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+    def _store_cookies(self, host, headers):
+        for header in headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except Exception:
+                continue
+            jar = self._cookies.setdefault(host, {})
+            for name, morsel in cookie.items():
+                jar[name] = morsel.value
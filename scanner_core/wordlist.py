@@ -0,0 +1,272 @@
+"""
+Streaming wordlists for path discovery
+Wordlist files are read through a memory map one line at a time and are never
+held as a list, so a wordlist with millions of entries costs no more memory
+than a short one. Repeated paths are dropped by a Bloom filter whose size is
+fixed up front. A trie of directory prefixes drops the rest of a prefix once
+it turns out to be a catch-all, meaning several of its children answered
+byte for byte the same (for example an SPA rewrite, or an auth gateway that
+redirects everything to its login page). 404s never count towards this,
+because an API root that answers 404 can still have live routes under it.
+A fixed pool of workers pulls paths from the stream and the transport's
+limits set the pace.
+"""
+
+import asyncio
+import hashlib
+import math
+import mmap
+import os
+import time
+from urllib.parse import quote
+
+# Characters left as they are when a wordlist entry becomes a request path
+PATH_SAFE = "/:@!$&'()*+,;=-._~%?"
+# Answers that say nothing about a path's siblings
+ABSENT_STATUSES = (404, 410)
+# Rough bytes per wordlist line, for sizing the Bloom filter from file sizes
+ENTRY_BYTES = 8
+# The Bloom filter never grows past this (32 MiB); beyond it the false-positive rate rises instead
+MAX_BLOOM_BITS = 1 << 28
+
+
+def normalize_path(entry):
+    """A wordlist entry as a request path (leading slash, unsafe characters escaped), or None to skip it"""
+    entry = entry.strip()
+    if not entry or entry.startswith('#'):
+        return None
+    if not entry.startswith('/'):
+        entry = f"/{entry}"
+    return quote(entry, safe=PATH_SAFE)
+
+
+def stream_wordlist(path):
+    """Yield the request paths in a wordlist file, one line at a time from a memory map"""
+    with open(path, 'rb') as f:
+        # An empty file cannot be mapped
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                entry = normalize_path(line.decode('utf-8', errors='replace'))
+                if entry is not None:
+                    yield entry
+
+
+def estimate_entries(paths):
+    """Upper estimate of the entries in some wordlist files, from their sizes"""
+    return sum(os.path.getsize(path) for path in paths) // ENTRY_BYTES
+
+
+class BloomFilter:
+    """Fixed-size membership test: no false negatives, about error_rate false positives at capacity"""
+
+    def __init__(self, capacity, error_rate=0.0001):
+        capacity = max(capacity, 1)
+        self.size = min(MAX_BLOOM_BITS, max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add item; False if it was (probably) there already"""
+        new = False
+        bits = self._bits
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class PrefixNode:
+    """One directory prefix: the answer its children have given so far"""
+
+    def __init__(self):
+        self.children = {}
+        self.signature = None
+        self.matches = 0
+        # Children answered differently, so this prefix is never a catch-all
+        self.mixed = False
+        self.gated = False
+        self.skipped = 0
+
+
+class PrefixTrie:
+    """Directory prefixes of probed paths; a prefix whose children all answer the same is pruned"""
+
+    def __init__(self, gate_after=3, max_nodes=100000):
+        self.gate_after = gate_after
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        # prefix -> node, for prefixes found to be catch-alls
+        self.gated = {}
+        self._root = PrefixNode()
+
+    @staticmethod
+    def segments(path):
+        return path.split('?', 1)[0].strip('/').split('/')
+
+    def observe(self, path, signature):
+        """Record the answer path got; signature is anything comparable that identifies the answer"""
+        parents = self.segments(path)[:-1]
+        # The site root is never pruned: its children are the whole site
+        if not parents:
+            return
+        node = self._root
+        for segment in parents:
+            child = node.children.get(segment)
+            if child is None:
+                # Past the cap new prefixes go untracked, so memory stays bounded
+                if self.nodes >= self.max_nodes:
+                    return
+                child = node.children[segment] = PrefixNode()
+                self.nodes += 1
+            node = child
+        if node.gated or node.mixed:
+            return
+        if node.signature is None:
+            node.signature, node.matches = signature, 1
+        elif node.signature == signature:
+            node.matches += 1
+        else:
+            node.mixed = True
+            node.signature = None
+            return
+        if node.matches >= self.gate_after:
+            node.gated = True
+            self.gated['/' + '/'.join(parents)] = node
+
+    def pruned(self, path):
+        """The catch-all prefix path falls under, or None"""
+        node = self._root
+        parents = self.segments(path)[:-1]
+        for depth, segment in enumerate(parents, 1):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+            if node.gated:
+                node.skipped += 1
+                return '/' + '/'.join(parents[:depth])
+        return None
+
+
+def answer_signature(response):
+    """What makes two answers the same for catch-all detection: status, redirect target and body"""
+    return (response.status_code, response.headers.get('Location'), hashlib.md5(response.content).digest())
+
+
+class PathDiscovery:
+    """GET a stream of paths from a fixed pool of workers, dropping repeats and catch-all prefixes"""
+
+    def __init__(self, transport, target, workers=None, capacity=1000000, gate_after=3, timeout=5):
+        self.transport = transport
+        self.target = target.rstrip('/')
+        # Enough workers to keep the host's adaptive limit full; more would only queue on it
+        self.workers = workers or transport.per_host_limit
+        self.timeout = timeout
+        self.seen = BloomFilter(capacity)
+        self.prefixes = PrefixTrie(gate_after)
+        self.probed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self.elapsed = 0.0
+
+    def results(self, paths):
+        """Yield (path, response) as probes complete, response None if the request failed
+
+        paths may be any iterable, typically stream_wordlist() generators; it is
+        consumed lazily, so pruning learned from earlier answers applies to the
+        rest of the stream.
+        """
+        queue = asyncio.Queue(self.workers * 4)
+        future = asyncio.run_coroutine_threadsafe(self._probe_all(self._candidates(paths), queue),
+                                                  self.transport.loop)
+        started = time.perf_counter()
+        try:
+            done = False
+            while not done:
+                # One trip to the loop thread per batch of answers, not per answer
+                for item in self.transport.run(self._drain(queue)):
+                    if item is None:
+                        done = True
+                        break
+                    yield item
+            # Surfaces an error from the path stream, e.g. an unreadable wordlist
+            future.result()
+        finally:
+            future.cancel()
+            self.elapsed += time.perf_counter() - started
+
+    @staticmethod
+    async def _drain(queue):
+        items = [await queue.get()]
+        while not queue.empty():
+            items.append(queue.get_nowait())
+        return items
+
+    def _candidates(self, paths):
+        for path in paths:
+            if not self.seen.add(path):
+                self.duplicates += 1
+            elif self.prefixes.pruned(path) is not None:
+                self.pruned += 1
+            else:
+                yield path
+
+    async def _probe_all(self, candidates, queue):
+        workers = [asyncio.ensure_future(self._worker(candidates, queue)) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            # The consumer went away; nobody is waiting for the end marker
+            for worker in workers:
+                worker.cancel()
+            raise
+        except Exception:
+            for worker in workers:
+                worker.cancel()
+            # The consumer re-raises this from the future once it reaches the end marker
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    async def _worker(self, candidates, queue):
+        # Workers share one generator; each next() runs to completion between awaits
+        for path in candidates:
+            try:
+                # Uncached: a long wordlist would only push useful entries out of the cache
+                response = await self.transport.arequest('GET', f"{self.target}{path}", timeout=self.timeout,
+                                                         cache=False)
+            except Exception:
+                response = None
+                self.failed += 1
+            self.probed += 1
+            if response is not None and response.status_code not in ABSENT_STATUSES:
+                self.prefixes.observe(path, answer_signature(response))
+            await queue.put((path, response))
+
+    def summary(self):
+        rate = self.probed / self.elapsed if self.elapsed else 0.0
+        text = (f"Path discovery: {self.probed} paths probed in {self.elapsed:.1f}s ({rate:.0f} req/s), "
+                f"{self.duplicates} repeats dropped")
+        if self.prefixes.gated:
+            prefixes = ', '.join(f"{prefix} ({node.skipped})" for prefix, node in self.prefixes.gated.items())
+            text += f", {self.pruned} skipped under catch-all prefixes: {prefixes}"
+        return text
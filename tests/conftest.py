@@ -0,0 +1,60 @@
+"""
+Shared fixtures for the scanner_core tests
+The stand-in portfolio from benchmarks/ runs once per session in its own
+process, so transport-level tests talk to a real HTTP server on localhost.
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from scanner_core import AsyncTransport  # noqa: E402
+from standin import StandInTarget  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def standin():
+    with StandInTarget() as target:
+        yield target
+
+
+@pytest.fixture
+def transport_factory():
+    """Build AsyncTransports that are all closed when the test ends"""
+    transports = []
+
+    def build(**kwargs):
+        transport = AsyncTransport(**kwargs)
+        transports.append(transport)
+        return transport
+    yield build
+    for transport in transports:
+        transport.close()
+
+
+class FakeResponse:
+    """The parts of a transport Response that breakers and caches look at"""
+
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def fake_response():
+    return FakeResponse
+
+
+@pytest.fixture
+def closed_url():
+    """Base URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
@@ -0,0 +1,75 @@
+"""SpaBaseline against the stand-in's catch-all: matching the shell and ruling responses out early"""
+
+import secrets
+
+import pytest
+
+from scanner_core import SpaBaseline
+
+
+@pytest.fixture
+def baseline(transport_factory):
+    return SpaBaseline(transport_factory())
+
+
+def test_learns_the_shell_once_per_host(standin, baseline):
+    before = standin.requests
+    status, length, _ = baseline.learn(f"{standin.url}/admin")
+    assert status == 200 and length > 0
+    assert standin.requests - before == 2
+    baseline.learn(f"{standin.url}/other/path")
+    assert standin.requests - before == 2
+
+
+def test_matches_the_shell_and_nothing_else(standin, baseline):
+    baseline.learn(standin.url)
+    transport = baseline.transport
+    assert baseline.matches(transport.get(f"{standin.url}/{secrets.token_hex(4)}"))
+    assert not baseline.matches(transport.get(f"{standin.url}/robots.txt"))
+    assert not baseline.matches(transport.get(f"{standin.url}/api/missing"))
+    assert baseline.stats == {'matches': 1, 'misses': 2}
+    assert 'SPA fallback baseline: 1 responses matched' in baseline.summary()
+
+
+def test_capped_reads_match_by_their_head(standin, baseline):
+    baseline.learn(standin.url)
+    capped = baseline.transport.get(f"{standin.url}/deep/unknown", max_bytes=64)
+    assert capped.truncated and not baseline.matches(capped)
+    assert baseline.matches_head(capped)
+    assert not baseline.matches_head(baseline.transport.get(f"{standin.url}/robots.txt", max_bytes=64))
+
+
+def test_excludes_on_status_and_content_length(standin, baseline, fake_response):
+    _, length, _ = baseline.learn(standin.url)
+    transport = baseline.transport
+    assert baseline.excludes(transport.get(f"{standin.url}/api/missing"))
+    assert not baseline.excludes(transport.get(f"{standin.url}/unknown"))
+
+    def response(status, headers):
+        result = fake_response(status, headers)
+        result.url = f"{standin.url}/x"
+        return result
+    assert baseline.excludes(response(200, {'Content-Length': str(length + 1)}))
+    # Compressed or chunked bodies cannot be ruled out from their headers
+    assert not baseline.excludes(response(200, {'Content-Length': '10', 'Content-Encoding': 'gzip'}))
+    assert not baseline.excludes(response(200, {}))
+
+
+def test_no_baseline_for_a_catch_all_that_varies(standin, transport_factory):
+    transport = transport_factory()
+    arequest = transport.arequest
+
+    async def with_nonce(*args, **kwargs):
+        response = await arequest(*args, **kwargs)
+        response.content += secrets.token_hex(4).encode()
+        return response
+    transport.arequest = with_nonce
+    baseline = SpaBaseline(transport)
+    assert baseline.learn(standin.url) is None
+    response = transport.get(f"{standin.url}/unknown")
+    assert not baseline.matches(response) and baseline.excludes(response)
+
+
+def test_no_baseline_for_a_host_that_does_not_answer(transport_factory, closed_url):
+    baseline = SpaBaseline(transport_factory(), timeout=2)
+    assert baseline.learn(closed_url) is None
@@ -0,0 +1,101 @@
+"""TargetBatch on a shared transport: per-host caps, the batch-wide budget and failing targets"""
+
+import threading
+
+import pytest
+
+from scanner_core import TargetBatch, read_targets, target_slug
+from standin import Settings, StandInTarget
+
+
+@pytest.fixture(scope='module')
+def slow_hosts():
+    with StandInTarget(Settings(latency=0.05)) as first, StandInTarget(Settings(latency=0.05)) as second:
+        yield [first, second]
+
+
+class InFlight:
+    """Counts requests in flight per port, and across all ports, as the transport sends them"""
+
+    def __init__(self, transport):
+        self.current = {}
+        self.peak = {}
+        self.total = 0
+        self.peak_total = 0
+        self._lock = threading.Lock()
+        send = transport._send
+
+        async def counted(method, url, parts, *args, **kwargs):
+            self._move(parts.port, 1)
+            try:
+                return await send(method, url, parts, *args, **kwargs)
+            finally:
+                self._move(parts.port, -1)
+        transport._send = counted
+
+    def _move(self, port, step):
+        with self._lock:
+            self.current[port] = self.current.get(port, 0) + step
+            self.peak[port] = max(self.peak.get(port, 0), self.current[port])
+            self.total += step
+            self.peak_total = max(self.peak_total, self.total)
+
+
+def scanner(transport, requests=16):
+    def scan(target):
+        responses = transport.fetch_all([{'url': f"{target}/page/{n}"} for n in range(requests)])
+        return sum(response.status_code == 200 for response in responses)
+    return scan
+
+
+def test_read_targets(tmp_path):
+    path = tmp_path / 'targets.txt'
+    path.write_text('# staging\nhttps://a.example/\n\nb.example  # no scheme\nhttps://a.example\n'
+                    'http://c.example:8080/app\n', encoding='utf-8')
+    assert read_targets(str(path)) == ['https://a.example', 'https://b.example', 'http://c.example:8080/app']
+
+
+def test_target_slug():
+    assert target_slug('http://c.example:8080/app/v1') == 'c.example_8080_app_v1'
+    assert target_slug('https://a.example') == 'a.example'
+
+
+def test_each_host_is_capped_while_hosts_run_side_by_side(slow_hosts, transport_factory):
+    transport = transport_factory(per_host_limit=4, adaptive=False)
+    counter = InFlight(transport)
+    results = TargetBatch([host.url for host in slow_hosts]).run(scanner(transport))
+    assert results == {host.url: 16 for host in slow_hosts}
+    assert counter.peak == {host.port: 4 for host in slow_hosts}
+    # Neither host waited for the other: both were at their cap at the same time
+    assert counter.peak_total == 8
+
+
+def test_the_shared_global_limit_is_the_batch_budget(slow_hosts, transport_factory):
+    transport = transport_factory(max_concurrency=6, per_host_limit=4, adaptive=False)
+    counter = InFlight(transport)
+    TargetBatch([host.url for host in slow_hosts]).run(scanner(transport))
+    assert counter.peak_total == 6
+    assert all(peak <= 4 for peak in counter.peak.values())
+
+
+def test_max_targets_bounds_targets_in_progress(slow_hosts, transport_factory):
+    transport = transport_factory(per_host_limit=4, adaptive=False)
+    counter = InFlight(transport)
+    TargetBatch([host.url for host in slow_hosts], max_targets=1).run(scanner(transport))
+    assert counter.peak_total == 4
+
+
+def test_a_failing_target_does_not_stop_the_batch(slow_hosts, transport_factory):
+    transport = transport_factory()
+    scan = scanner(transport, requests=2)
+
+    def flaky(target):
+        if target == 'http://broken':
+            raise RuntimeError('unreachable')
+        return scan(target)
+    done = []
+    batch = TargetBatch(['http://broken', slow_hosts[0].url])
+    results = batch.run(flaky, on_done=lambda target, error: done.append((target, error)))
+    assert results == {slow_hosts[0].url: 2}
+    assert str(batch.errors['http://broken']) == 'unreachable'
+    assert sorted(target for target, _ in done) == sorted(['http://broken', slow_hosts[0].url])
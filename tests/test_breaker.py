@@ -0,0 +1,110 @@
+"""CircuitBreaker: failure runs, half-open trials, refused methods and the liveness check"""
+
+import pytest
+
+from scanner_core import CircuitBreaker, CircuitOpen
+
+
+def fail(breaker, endpoint='/api', method='POST', times=1, sent=None):
+    for _ in range(times):
+        breaker.observe(endpoint, method, None, sent)
+
+
+def test_trips_after_threshold_failures_for_that_method_only():
+    breaker = CircuitBreaker(threshold=3)
+    fail(breaker, times=2)
+    assert breaker.blocked('/api', 'POST') is None
+    fail(breaker)
+    assert breaker.blocked('/api', 'POST') == 'circuit open: POST failed 3 times in a row'
+    assert breaker.blocked('/api', 'GET') is None
+    assert breaker.is_open('/api', 'POST') and not breaker.is_open('/api')
+
+
+def test_gateway_errors_count_as_failures(fake_response):
+    breaker = CircuitBreaker(threshold=2)
+    breaker.observe('/api', 'GET', fake_response(502))
+    breaker.observe('/api', 'GET', fake_response(504))
+    assert breaker.is_open('/api', 'GET')
+
+
+def test_an_answer_resets_the_run(fake_response):
+    breaker = CircuitBreaker(threshold=3)
+    fail(breaker, times=2)
+    breaker.observe('/api', 'POST', fake_response(200))
+    fail(breaker, times=2)
+    assert breaker.blocked('/api', 'POST') is None
+
+
+def test_a_concurrent_batch_failing_together_counts_once():
+    breaker = CircuitBreaker(threshold=2)
+    # Five requests went out together, before any failure was seen
+    fail(breaker, times=5, sent=0.0)
+    assert not breaker.is_open('/api', 'POST')
+
+
+def test_half_open_lets_one_trial_through_after_the_cooldown(monkeypatch, fake_response):
+    clock = [100.0]
+    monkeypatch.setattr('scanner_core.breaker.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    fail(breaker)
+    assert breaker.blocked('/api', 'POST') is not None
+    clock[0] += 10
+    # The trial goes out; the probes behind it wait another cool-down
+    assert breaker.blocked('/api', 'POST') is None
+    assert breaker.blocked('/api', 'POST') is not None
+    # A failed trial keeps it open, an answered one closes it
+    fail(breaker, sent=clock[0])
+    assert breaker.is_open('/api', 'POST')
+    breaker.observe('/api', 'POST', fake_response(401))
+    assert breaker.blocked('/api', 'POST') is None
+
+
+def test_trip_blocks_every_method_until_an_answer(fake_response):
+    breaker = CircuitBreaker()
+    breaker.trip('/dead', 'no answer to OPTIONS or HEAD')
+    assert breaker.blocked('/dead', 'GET') == 'circuit open: no answer to OPTIONS or HEAD'
+    breaker.observe('/dead', 'GET', fake_response(200))
+    assert breaker.blocked('/dead', 'DELETE') is None
+
+
+def test_405_prunes_a_method_unless_it_was_also_accepted(fake_response):
+    breaker = CircuitBreaker()
+    breaker.observe('/api', 'PUT', fake_response(405, {'Allow': 'GET, POST'}))
+    assert breaker.blocked('/api', 'PUT') == 'PUT answered 405'
+    assert breaker.allow['/api'] == {'GET', 'POST'}
+    breaker.observe('/api', 'PUT', fake_response(200))
+    assert breaker.blocked('/api', 'PUT') is None
+
+
+def test_gate_raises_and_skips_are_counted():
+    breaker = CircuitBreaker(threshold=1)
+    fail(breaker)
+    with pytest.raises(CircuitOpen):
+        breaker.gate('/api', 'POST')()
+    breaker.gate('/api', 'GET')()
+    breaker.skip('/api', 'circuit open', 3)
+    assert breaker.skipped_total() == 3
+    assert breaker.take_unreported() == {('/api', 'circuit open'): 3}
+    assert breaker.take_unreported() == {}
+
+
+def test_check_trips_endpoints_that_do_not_answer(transport_factory, closed_url):
+    transport = transport_factory()
+    breaker = CircuitBreaker()
+    breaker.check(transport, closed_url, {'/api': {'POST'}}, timeout=2)
+    assert breaker.blocked('/api', 'POST') == 'circuit open: no answer to OPTIONS or HEAD'
+
+
+def test_check_learns_allowed_methods_without_sending_unsafe_ones(standin, transport_factory):
+    transport = transport_factory()
+    breaker = CircuitBreaker()
+    before = standin.requests
+    breaker.check(transport, standin.url, {'/api/contact': {'POST', 'PUT', 'GET'}})
+    assert breaker.allow['/api/contact'] == {'POST', 'OPTIONS'}
+    # OPTIONS, then GET since it is safe and left out of Allow; PUT is never sent bare
+    assert standin.requests - before == 2
+    assert breaker.blocked('/api/contact', 'GET') == 'GET answered 405'
+    assert breaker.blocked('/api/contact', 'PUT') is None
+    # An endpoint already seen is not asked again
+    breaker.check(transport, standin.url, {'/api/contact': {'POST'}})
+    assert standin.requests - before == 2
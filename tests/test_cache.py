@@ -0,0 +1,109 @@
+"""ResponseCache on its own and behind the transport"""
+
+from scanner_core import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_put_get_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    keys = [cache.make_key('GET', f'http://host/{n}', {}, b'') for n in range(3)]
+    cache.put(keys[0], 'first')
+    cache.put(keys[1], 'second')
+    # Touching the first entry makes the second the least recently used
+    assert cache.get(keys[0]) == 'first'
+    cache.put(keys[2], 'third')
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 'first'
+    assert cache.stats['evictions'] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    key = cache.make_key('GET', 'http://host/', {}, b'')
+    cache.put(key, 'page')
+    clock.now = 10
+    assert cache.get(key) == 'page'
+    clock.now = 10.5
+    assert cache.get(key) is None
+    assert cache.stats['expired'] == 1
+
+
+def test_key_covers_headers_and_body():
+    make_key = ResponseCache.make_key
+    assert make_key('get', 'http://host/', {'A': '1'}, b'') == make_key('GET', 'http://host/', {'a': '1'}, b'')
+    assert make_key('GET', 'http://host/', {'A': '1'}, b'') != make_key('GET', 'http://host/', {'A': '2'}, b'')
+    assert make_key('GET', 'http://host/', {}, b'x') != make_key('GET', 'http://host/', {}, b'y')
+
+
+def test_invalidate_drops_every_variant_of_a_url():
+    cache = ResponseCache()
+    plain = cache.make_key('GET', 'http://host/a', {}, b'')
+    varied = cache.make_key('GET', 'http://host/a', {'Accept': 'text/html'}, b'')
+    other = cache.make_key('GET', 'http://host/b', {}, b'')
+    for key in (plain, varied, other):
+        cache.put(key, 'response')
+    cache.invalidate('http://host/a')
+    assert cache.get(plain) is None and cache.get(varied) is None
+    assert cache.get(other) == 'response'
+    assert cache.stats['invalidations'] == 2
+
+
+def test_failures_are_not_stored(transport_factory, fake_response):
+    cache = ResponseCache()
+    transport = transport_factory()
+    key = cache.make_key('GET', 'http://host/', {}, b'')
+
+    async def fetch(status):
+        return await cache.fetch(key, lambda: answer(status))
+
+    async def answer(status):
+        return fake_response(status)
+    assert transport.run(fetch(503)).status_code == 503
+    assert transport.run(fetch(429)).status_code == 429
+    assert transport.run(fetch(200)).status_code == 200
+    # Only the 200 was kept, so it answers from now on
+    assert transport.run(fetch(500)).status_code == 200
+    assert (cache.stats['misses'], cache.stats['hits']) == (3, 1)
+
+
+def test_transport_hits_and_unsafe_request_invalidates(standin, transport_factory):
+    transport = transport_factory(cache=ResponseCache())
+    url = f"{standin.url}/api/contact"
+    before = standin.requests
+
+    assert transport.request('OPTIONS', url).status_code == 204
+    assert transport.request('OPTIONS', url).status_code == 204
+    assert standin.requests - before == 1
+    assert transport.cache.stats['hits'] == 1
+
+    # A POST may have changed what the URL returns, so the next read goes to the server
+    transport.post(url, json={'name': 'n', 'email': 'e', 'message': 'm'})
+    assert transport.request('OPTIONS', url).status_code == 204
+    assert standin.requests - before == 3
+    assert transport.cache.stats['invalidations'] == 1
+
+
+def test_transport_coalesces_identical_requests(standin, transport_factory):
+    transport = transport_factory(cache=ResponseCache())
+    before = standin.requests
+    responses = transport.fetch_all([{'url': f"{standin.url}/robots.txt"}] * 8)
+    assert all(response.status_code == 200 for response in responses)
+    assert standin.requests - before == 1
+    assert transport.cache.stats['coalesced'] == 7
+
+
+def test_cache_can_be_bypassed(standin, transport_factory):
+    transport = transport_factory(cache=ResponseCache())
+    before = standin.requests
+    transport.get(f"{standin.url}/robots.txt", cache=False)
+    transport.get(f"{standin.url}/robots.txt", cache=False)
+    assert standin.requests - before == 2
+    assert len(transport.cache) == 0
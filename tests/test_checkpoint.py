@@ -0,0 +1,95 @@
+"""Checkpoint journalling and resume"""
+
+import json
+
+from scanner_core import Checkpoint
+
+
+def journal(path, tool='tool', target='http://host'):
+    checkpoint = Checkpoint(str(path), tool, target)
+    checkpoint.step('a', checkpoint.record, {'title': 'from a'})
+
+    def b():
+        checkpoint.record({'title': 'from b'})
+        raise KeyboardInterrupt
+    try:
+        checkpoint.step('b', b)
+    except KeyboardInterrupt:
+        pass
+    checkpoint.close()
+
+
+def test_resume_keeps_completed_steps_and_their_findings(tmp_path):
+    path = tmp_path / 'scan.jsonl'
+    journal(path)
+    resumed = Checkpoint(str(path), 'tool', 'http://host', resume=True)
+    assert resumed.resumed
+    assert resumed.completed == {'a'}
+    # b was cut off, so its finding is dropped and b runs again
+    assert resumed.findings == [{'title': 'from a'}]
+    ran = []
+    resumed.step('a', ran.append, 'a')
+    resumed.step('b', ran.append, 'b')
+    assert ran == ['b']
+    assert resumed.skipped == 1
+    resumed.close()
+
+
+def test_resume_after_a_truncated_line(tmp_path):
+    path = tmp_path / 'scan.jsonl'
+    journal(path)
+    # Killed half-way through writing the next line
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"done": "c')
+
+    resumed = Checkpoint(str(path), 'tool', 'http://host', resume=True)
+    assert resumed.completed == {'a'}
+    resumed.step('d', resumed.record, {'title': 'from d'})
+    resumed.close()
+
+    # What was journalled after the torn line must survive the next resume
+    again = Checkpoint(str(path), 'tool', 'http://host', resume=True)
+    assert again.completed == {'a', 'd'}
+    assert again.findings == [{'title': 'from a'}, {'title': 'from d'}]
+    again.close()
+
+
+def test_other_tool_or_target_starts_over(tmp_path):
+    path = tmp_path / 'scan.jsonl'
+    journal(path)
+    other = Checkpoint(str(path), 'tool', 'http://elsewhere', resume=True)
+    assert not other.resumed
+    assert other.completed == set()
+    other.close()
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])['target'] == 'http://elsewhere'
+
+
+def test_without_resume_the_journal_is_rewritten(tmp_path):
+    path = tmp_path / 'scan.jsonl'
+    journal(path)
+    fresh = Checkpoint(str(path), 'tool', 'http://host')
+    assert not fresh.resumed and fresh.completed == set()
+    fresh.close()
+
+
+def test_nested_steps_scope_findings_to_the_innermost(tmp_path):
+    path = tmp_path / 'scan.jsonl'
+    checkpoint = Checkpoint(str(path), 'tool', 'http://host')
+
+    def outer():
+        checkpoint.step('inner', checkpoint.record, {'title': 'inner'})
+        checkpoint.record({'title': 'outer'})
+    checkpoint.step('outer', outer)
+    checkpoint.close()
+    with open(path, encoding='utf-8') as f:
+        scopes = [entry['scope'] for entry in map(json.loads, f) if 'finding' in entry]
+    assert scopes == ['inner', 'outer']
+
+
+def test_no_path_journals_nothing():
+    checkpoint = Checkpoint()
+    assert checkpoint.step('a', lambda: 1) == 1
+    assert checkpoint.is_done('a')
+    checkpoint.close()
@@ -0,0 +1,85 @@
+"""Console: what quiet, normal and verbose modes write, and the quiet-mode progress bar"""
+
+import io
+
+import pytest
+
+from scanner_core import Console
+
+
+class Transport:
+    """Just the request counter the progress bar reads"""
+
+    def __init__(self, requests):
+        self.stats = {'requests': requests}
+
+
+def drive(mode):
+    stream = io.StringIO()
+    console = Console(mode, stream=stream, interval=0.01)
+    console.add_total(2)
+    console('=== Section ===')
+    console.finding('[HIGH] SQL Injection: /api', 'payload: x')
+    console.advance('GET /api')
+    console.debug('raw response')
+    console.finding('[INFO] Server header')
+    console.advance('GET /')
+    console.close()
+    return console, stream.getvalue()
+
+
+def test_normal_prints_banners_and_findings():
+    console, text = drive('normal')
+    assert text == '=== Section ===\n[HIGH] SQL Injection: /api\npayload: x\n[INFO] Server header\n'
+    assert console.findings == 2 and console.done == 2
+
+
+def test_verbose_adds_a_line_per_probe():
+    _, text = drive('verbose')
+    assert text.splitlines() == ['=== Section ===', '[HIGH] SQL Injection: /api', 'payload: x', '  ✓ GET /api',
+                                 'raw response', '[INFO] Server header', '  ✓ GET /']
+
+
+def test_quiet_shows_only_the_progress_bar():
+    console, text = drive('quiet')
+    assert 'SQL Injection' not in text and 'Section' not in text
+    last = text.rsplit('\r', 1)[1]
+    assert last.startswith('[' + '#' * Console.BAR_WIDTH + ']')
+    assert '2/2 probes' in last and 'findings 2' in last
+    assert text.endswith('\n')
+
+
+def test_progress_bar_rate_and_eta():
+    console = Console('quiet', stream=io.StringIO(), unit='tests')
+    console.close()
+    console.watch(Transport(500))
+    console.add_total(4)
+    console.advance()
+    bar = console._bar()
+    assert bar.startswith('\r[' + '#' * (Console.BAR_WIDTH // 4) + '.')
+    assert '1/4 tests' in bar and 'ETA 0:0' in bar and 'req/s' in bar
+    # Only the first transport is watched
+    console.watch(Transport(0))
+    assert console._transport.stats['requests'] == 500
+
+
+def test_output_after_close_goes_straight_through():
+    stream = io.StringIO()
+    console = Console(stream=stream)
+    console.close()
+    console.info('final report')
+    assert stream.getvalue() == 'final report\n'
+
+
+def test_flush_waits_for_queued_output():
+    stream = io.StringIO()
+    console = Console(stream=stream, interval=5)
+    console.info('queued')
+    console.flush()
+    assert stream.getvalue() == 'queued\n'
+    console.close()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        Console('loud')
@@ -0,0 +1,103 @@
+"""FindingsStore: storage, queries and folding of repeats"""
+
+from scanner_core import FindingsStore
+from scanner_core.findings import MAX_SAMPLES, classify
+
+
+def finding(title, details=None):
+    return {'message': title, 'details': details}
+
+
+def test_classify():
+    assert classify('SQL Injection detected: /api/contact') == ('SQL Injection detected', '/api/contact')
+    assert classify('Missing header') == ('Missing header', None)
+    assert classify('Exposed', 'found at /backup.zip') == ('Exposed', '/backup.zip')
+
+
+def test_repeats_fold_into_the_first_row_with_samples():
+    store = FindingsStore(tool='tool')
+    title = 'SQL Injection detected: /api/contact'
+    assert store.add('high', finding(title, {'payload': "' OR 1=1", 'error': 'mysql'}))
+    assert not store.add('high', finding(title, {'payload': "' OR 2=2", 'error': 'mysql'}))
+    assert not store.add('high', finding(title, {'payload': "' OR 2=2", 'error': 'mysql'}))
+
+    [row] = store.query()
+    assert row['occurrences'] == 3
+    assert row['samples'] == [{'payload': "' OR 1=1"}, {'payload': "' OR 2=2"}]
+    # The row keeps the first finding's details
+    assert row['details'] == {'payload': "' OR 1=1", 'error': 'mysql'}
+    assert store.count() == 1 and store.folded == 2
+
+
+def test_first_fold_records_samples_even_when_the_payload_repeats():
+    store = FindingsStore()
+    store.add('medium', finding('CSRF: /api', {'payload': 'x'}))
+    store.add('medium', finding('CSRF: /api', {'payload': 'x'}))
+    [row] = store.query()
+    assert row['occurrences'] == 2
+    assert row['samples'] == [{'payload': 'x'}]
+
+
+def test_samples_are_capped():
+    store = FindingsStore()
+    for n in range(MAX_SAMPLES + 3):
+        store.add('high', finding('XSS: /search', {'payload': f'<script>{n}</script>'}))
+    [row] = store.query()
+    assert row['occurrences'] == MAX_SAMPLES + 3
+    assert len(row['samples']) == MAX_SAMPLES
+
+
+def test_different_signal_severity_or_endpoint_is_not_folded():
+    store = FindingsStore()
+    store.add('high', finding('SQLi: /a', {'payload': '1', 'error': 'mysql'}))
+    store.add('high', finding('SQLi: /a', {'payload': '1', 'error': 'sqlite'}))
+    store.add('medium', finding('SQLi: /a', {'payload': '1', 'error': 'mysql'}))
+    store.add('high', finding('SQLi: /b', {'payload': '1', 'error': 'mysql'}))
+    assert store.count() == 4
+
+
+def test_free_text_details_fold_as_samples():
+    store = FindingsStore()
+    store.add('info', finding('Banner', 'nginx/1.18'))
+    store.add('info', finding('Banner', 'nginx/1.19'))
+    [row] = store.query()
+    assert row['occurrences'] == 2
+    assert row['samples'] == ['nginx/1.18', 'nginx/1.19']
+    assert row['details'] == 'nginx/1.18'
+
+
+def test_without_aggregation_every_finding_is_a_row():
+    store = FindingsStore(aggregate=False)
+    store.add('high', finding('XSS: /search', {'payload': 'a'}))
+    store.add('high', finding('XSS: /search', {'payload': 'b'}))
+    assert store.count() == 2
+
+
+def test_scoped_targets_fold_separately():
+    store = FindingsStore(tool='tool', target='batch')
+    one, two = store.scoped('http://one/'), store.scoped('http://two')
+    for scoped in (one, two, one):
+        scoped.add('high', finding('XSS: /search', {'payload': 'a'}))
+    assert one.count() == 1 and two.count() == 1
+    assert next(one.query())['occurrences'] == 2
+    assert store.targets() == ['http://one', 'http://two']
+    assert store.severity_counts() == {'high': 2}
+
+
+def test_queries_and_views(tmp_path):
+    store = FindingsStore(str(tmp_path / 'findings.db'), 'tool')
+    store.add('high', finding('SQLi: /a', {'payload': '1'}))
+    store.add('low', finding('Header missing: /'))
+    store.add('high', finding('XSS: /b', {'payload': '2'}))
+    assert [f['message'] for f in store.query(severity='high')] == ['SQLi: /a', 'XSS: /b']
+    assert store.count(severity=('high', 'low')) == 3
+    assert store.count(endpoint='/b') == 1
+    assert store.count(title_contains='SQLi') == 1
+    view = store.view(severity='critical')
+    assert len(view) == 0 and not view
+    assert list(store.view(category='Header missing'))[0]['message'] == 'Header missing: /'
+    store.close()
+
+    reopened = FindingsStore(str(tmp_path / 'findings.db'), run_id=store.run_id)
+    assert reopened.count() == 3
+    reopened.close()
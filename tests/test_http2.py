@@ -0,0 +1,206 @@
+"""HTTP/2 sessions: multiplexing, the host limit, falling back to HTTP/1.1 and retrying after GOAWAY"""
+
+import asyncio
+import shutil
+import ssl
+import threading
+
+import pytest
+
+h2 = pytest.importorskip('h2')
+
+import h2.config  # noqa: E402
+import h2.connection  # noqa: E402
+import h2.events  # noqa: E402
+import h2.settings  # noqa: E402
+
+from bench_http2 import make_certificate  # noqa: E402
+from scanner_core.transport import MAX_H2_STREAMS  # noqa: E402
+
+BODY = b'<!doctype html><html><body>ok</body></html>'
+
+
+class H2Server:
+    """Local server on its own loop thread: h2 (prior knowledge or via ALPN) or keep-alive HTTP/1.1
+
+    With goaway_after set, the first connection waits for that many requests,
+    answers the first one and sends GOAWAY for the rest.
+    """
+
+    def __init__(self, delay=0.05, max_streams=100, goaway_after=None, context=None):
+        self.delay = delay
+        self.max_streams = max_streams
+        self.goaway_after = goaway_after
+        self.context = context
+        self.connections = {'http/1.1': 0, 'h2': 0}
+        self.authorities = []
+        self._writers = set()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        start = asyncio.start_server(self._handle, '127.0.0.1', 0, ssl=self.context)
+        self.server = asyncio.run_coroutine_threadsafe(start, self.loop).result(10)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.url = f"{'https' if self.context else 'http'}://127.0.0.1:{self.port}"
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        for writer in self._writers:
+            writer.close()
+        await asyncio.sleep(0.05)
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        ssl_object = writer.get_extra_info('ssl_object')
+        protocol = ssl_object.selected_alpn_protocol() if ssl_object else 'h2'
+        protocol = protocol or 'http/1.1'
+        self.connections[protocol] += 1
+        try:
+            if protocol == 'h2':
+                await self._serve_h2(reader, writer, first=self.connections['h2'] == 1)
+            else:
+                await self._serve_h1(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h1(self, reader, writer):
+        while True:
+            await reader.readuntil(b'\r\n\r\n')
+            await asyncio.sleep(self.delay)
+            writer.write(f'HTTP/1.1 200 OK\r\nContent-Length: {len(BODY)}\r\n\r\n'.encode() + BODY)
+            await writer.drain()
+
+    async def _serve_h2(self, reader, writer, first):
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.max_streams})
+        writer.write(conn.data_to_send())
+        received = []
+
+        def answer(stream_id):
+            conn.send_headers(stream_id, [(':status', '200'), ('content-length', str(len(BODY)))])
+            conn.send_data(stream_id, BODY, end_stream=True)
+
+        async def respond(stream_id):
+            await asyncio.sleep(self.delay)
+            answer(stream_id)
+            if not writer.is_closing():
+                writer.write(conn.data_to_send())
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    self.authorities.append(dict(event.headers)[b':authority'].decode())
+                    received.append(event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    if first and self.goaway_after:
+                        if len(received) == self.goaway_after:
+                            answer(received[0])
+                            conn.close_connection(last_stream_id=received[0])
+                            writer.write(conn.data_to_send())
+                            await writer.drain()
+                            return
+                    else:
+                        asyncio.ensure_future(respond(event.stream_id))
+            writer.write(conn.data_to_send())
+
+
+@pytest.fixture(scope='module')
+def certificate(tmp_path_factory):
+    if shutil.which('openssl') is None:
+        pytest.skip('needs the openssl CLI')
+    return make_certificate(str(tmp_path_factory.mktemp('tls')))
+
+
+def tls_context(certificate, protocols):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(*certificate)
+    context.set_alpn_protocols(protocols)
+    return context
+
+
+def fetch(transport, url, count):
+    async def all_requests():
+        return await asyncio.gather(*(transport.arequest('GET', f"{url}/probe/{n}", cache=False)
+                                      for n in range(count)))
+    return transport.run(all_requests())
+
+
+def test_requests_share_one_multiplexed_connection(transport_factory):
+    with H2Server(delay=0.2) as server:
+        transport = transport_factory(http2=True, adaptive=False)
+        responses = fetch(transport, server.url, 40)
+    assert [response.status_code for response in responses] == [200] * 40
+    assert responses[0].content == BODY
+    assert server.connections['h2'] == 1 and transport.stats['connections_opened'] == 1
+    session, = transport._h2_sessions
+    # Far more in flight on the one connection than the default per-host limit of 16
+    assert session.opened == 40 and session.peak == 40
+    assert transport._host_limits[('http', '127.0.0.1', server.port)] == 100
+    assert transport.http2_summary().startswith('HTTP/2: 40 streams over 1 connections')
+
+
+def test_host_limit_is_capped_and_never_lowered(transport_factory):
+    with H2Server(delay=0, max_streams=1000) as server:
+        transport = transport_factory(http2=True)
+        fetch(transport, server.url, 1)
+        assert transport._host_limits[('http', '127.0.0.1', server.port)] == MAX_H2_STREAMS
+    with H2Server(delay=0.1, max_streams=4) as server:
+        transport = transport_factory(http2=True, adaptive=False)
+        fetch(transport, server.url, 12)
+    assert ('http', '127.0.0.1', server.port) not in transport._host_limits
+    # The server's stream limit still holds: requests past it wait for a stream to finish
+    assert transport._h2_sessions[0].peak == 4
+
+
+def test_https_host_without_h2_in_alpn_stays_on_http1(transport_factory, certificate):
+    with H2Server(delay=0, context=tls_context(certificate, ['http/1.1'])) as server:
+        transport = transport_factory(http2=True, cafile=certificate[0])
+        for _ in range(3):
+            assert transport.get(f"{server.url}/").content == BODY
+    assert server.connections == {'http/1.1': 1, 'h2': 0}
+    # The connection ALPN was settled on went back to the pool and carried every request
+    assert transport.stats['connections_opened'] == 1
+    assert transport._sessions[('https', '127.0.0.1', server.port)] is False
+    assert transport.http2_summary().endswith('1 hosts without HTTP/2 stayed on HTTP/1.1')
+
+
+def test_https_host_offering_h2_is_multiplexed(transport_factory, certificate):
+    with H2Server(delay=0.1, context=tls_context(certificate, ['h2', 'http/1.1'])) as server:
+        transport = transport_factory(http2=True, adaptive=False, cafile=certificate[0])
+        responses = fetch(transport, server.url, 20)
+    assert {response.status_code for response in responses} == {200}
+    assert server.connections == {'http/1.1': 0, 'h2': 1}
+    assert transport._h2_sessions[0].peak == 20
+
+
+def test_cleartext_host_without_h2c_stays_on_http1(standin, transport_factory):
+    transport = transport_factory(http2=True)
+    assert transport.get(f"{standin.url}/robots.txt").status_code == 200
+    assert transport._sessions[('http', '127.0.0.1', standin.port)] is False
+    assert transport._h2_sessions == []
+
+
+def test_streams_refused_by_goaway_are_retried_on_a_new_connection(transport_factory):
+    with H2Server(delay=0, goaway_after=3) as server:
+        transport = transport_factory(http2=True)
+        responses = fetch(transport, server.url, 3)
+    assert [response.status_code for response in responses] == [200] * 3
+    assert server.connections['h2'] == 2 and len(transport._h2_sessions) == 2
+    # One answered before the GOAWAY, two retried; every attempt kept the port in :authority
+    assert len(server.authorities) == 5
+    assert set(server.authorities) == {f"127.0.0.1:{server.port}"}
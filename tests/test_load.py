@@ -0,0 +1,73 @@
+"""OpenLoopBurst: the rate it achieves against a slow server, where limiting starts, and its statistics"""
+
+import email.utils
+import time
+
+import pytest
+
+from scanner_core import OpenLoopBurst
+from scanner_core.load import BurstResult, parse_retry_after
+from standin import Settings, StandInTarget
+
+
+@pytest.fixture(scope='module')
+def slow():
+    with StandInTarget(Settings(latency=0.1)) as target:
+        yield target
+
+
+@pytest.fixture(scope='module')
+def limited():
+    with StandInTarget(Settings(rate_limit=10)) as target:
+        yield target
+
+
+def test_burst_holds_its_rate_against_a_slow_server(slow, transport_factory):
+    # One request at a time would manage about 10 a second against 100ms answers
+    burst = OpenLoopBurst(transport_factory(per_host_limit=64), rps=100, requests=40, concurrency=32)
+    result = burst.run('GET', f"{slow.url}/")
+    assert result.sent == result.completed == 40 and result.errors == 0
+    assert 80 <= result.achieved_rps <= 110
+    assert result.statuses == {200: 40}
+    # Latency is measured from the scheduled send, so it includes the server's think time
+    assert min(result.latencies) >= 0.1
+    assert result.summary()['target_rps'] == 100 and not result.limited
+
+
+def test_concurrency_caps_requests_in_flight(slow, transport_factory):
+    burst = OpenLoopBurst(transport_factory(per_host_limit=64), rps=200, requests=20, concurrency=2)
+    result = burst.run('GET', f"{slow.url}/")
+    # Two at a time against 100ms answers: the schedule slips and the queueing shows in the latencies
+    assert result.achieved_rps < 25
+    assert result.percentile(0.95) > 0.5
+
+
+def test_burst_finds_where_limiting_starts_and_stops(limited, transport_factory):
+    burst = OpenLoopBurst(transport_factory(per_host_limit=64), rps=100, requests=60)
+    result = burst.run('POST', f"{limited.url}/api/contact",
+                       lambda n: {'json': {'name': 'n', 'email': 'e', 'message': str(n)}})
+    assert result.limited
+    assert 8 <= result.first_limited <= 14
+    assert result.retry_after == 1
+    # Sending stops once the first 429 is in
+    assert result.sent < 60
+    summary = result.summary()
+    assert summary['first_429_index'] == result.first_limited and summary['statuses'][429] >= 1
+
+
+def test_retry_after_as_seconds_or_a_date():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    when = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= parse_retry_after(when) <= 30
+    assert parse_retry_after(email.utils.formatdate(time.time() - 60, usegmt=True)) == 0
+
+
+def test_percentiles_and_histogram():
+    result = BurstResult('http://host/', 10, 5)
+    result.latencies = [0.004, 0.02, 0.02, 0.3, 7.0]
+    assert result.percentile(0.5) == 0.02
+    assert result.percentile(0.95) == 7.0
+    assert result.histogram() == {'<=5ms': 1, '<=25ms': 2, '<=500ms': 1, '>5000ms': 1}
+    assert BurstResult('http://host/', 10, 0).percentile(0.5) is None
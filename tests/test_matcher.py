@@ -0,0 +1,127 @@
+"""IndicatorMatcher: both backends, one-shot and streamed"""
+
+import random
+
+import pytest
+
+from scanner_core import IndicatorMatcher
+from scanner_core.matcher import ahocorasick, trie_pattern
+
+SETS = {
+    'sensitive': ['api_key', 'secret', 'password', 'key', 'token'],
+    'sql_error': ['sql syntax', 'mysql', 'syntax error', 'column', 'table'],
+    'overlap': ['abcd', 'bc', 'cde', 'c'],
+}
+
+BACKENDS = ['substring', 'regex'] + (['ahocorasick'] if ahocorasick is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def matcher(request):
+    return IndicatorMatcher(SETS, backend=request.param)
+
+
+def naive(text, ignore_case=True):
+    folded = text.lower() if ignore_case else text
+    return {p for patterns in SETS.values() for p in patterns if (p.lower() if ignore_case else p) in folded}
+
+
+def test_finds_every_pattern_the_naive_search_finds(matcher):
+    text = "Error: You have an error in your SQL syntax near 'API_KEY' in TABLE users"
+    assert matcher.find(text) == naive(text)
+
+
+def test_overlapping_and_nested_patterns(matcher):
+    # 'abcd' contains 'bc' and 'c'; 'cde' starts inside 'abcd' and must still be found
+    assert matcher.find('xabcdex') == {'abcd', 'bc', 'c', 'cde'}
+    assert matcher.find('xbcx') == {'bc', 'c'}
+
+
+def test_hits_by_set(matcher):
+    hits = matcher.scan('the secret token')
+    assert hits.hit('sensitive')
+    assert not hits.hit('sql_error')
+    assert set(hits.matched('sensitive')) == {'secret', 'token'}
+    assert 'sensitive' in hits
+
+
+def test_case_sensitive_matcher(matcher):
+    exact = IndicatorMatcher({'out': ['root:x:', 'uid=']}, ignore_case=False, backend=matcher.backend)
+    assert exact.find('ROOT:X: uid=0') == {'uid='}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        IndicatorMatcher(SETS, backend='bloom')
+
+
+def test_empty_matcher(matcher):
+    assert IndicatorMatcher({}, backend=matcher.backend).find('anything') == set()
+
+
+def test_backends_agree_on_random_text():
+    matchers = [IndicatorMatcher(SETS, backend=backend) for backend in BACKENDS]
+    rng = random.Random(1)
+    alphabet = 'abcdekmnoprstuy _SQL'
+    for _ in range(300):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        text += rng.choice(sum(SETS.values(), [])) if rng.random() < 0.5 else ''
+        expected = naive(text)
+        for matcher in matchers:
+            assert matcher.find(text) == expected, matcher.backend
+            hits = matcher.scan(text)
+            for name, patterns in SETS.items():
+                assert hits.matched(name) == [p for p in patterns if p in expected], matcher.backend
+
+
+def test_default_backend_needs_no_extension():
+    assert IndicatorMatcher(SETS).backend == ('ahocorasick' if ahocorasick is not None else 'substring')
+
+
+def test_substring_hits_search_only_the_sets_asked_about():
+    searched = []
+
+    class Text(str):
+        def __contains__(self, pattern):
+            searched.append(pattern)
+            return str.__contains__(self, pattern)
+
+    matcher = IndicatorMatcher(SETS, backend='substring')
+    hits = matcher._hits('')
+    hits._text = Text('a secret in the sql syntax')
+    assert hits.first('sensitive') == 'secret'
+    # api_key is searched before secret, and the set stops at its first hit
+    assert searched == ['api_key', 'secret']
+    assert hits.hit('sql_error') and hits.hit('sensitive')
+    # A pattern is never searched twice
+    assert len(searched) == len(set(searched))
+    assert hits.found == matcher.find('a secret in the sql syntax')
+
+
+def test_trie_pattern_prefers_the_longest_match():
+    import re
+    pattern = re.compile(trie_pattern(['key', 'keys', 'ke']))
+    assert pattern.match('keys').group() == 'keys'
+    assert pattern.match('kex').group() == 'ke'
+
+
+def test_stream_sees_patterns_across_chunk_boundaries(matcher):
+    text = 'prefix ' * 50 + 'your SQL syntax is wrong; the api_key leaked' + ' suffix' * 50
+    stream = matcher.stream()
+    for start in range(0, len(text), 3):
+        stream.feed(text[start:start + 3])
+    assert stream.found == matcher.find(text)
+    assert stream.chars == len(text)
+    assert stream.hit('sql_error') and stream.hit('sensitive')
+
+
+def test_stream_until_stops_on_verdict(matcher):
+    stream = matcher.stream(until=lambda s: s.hit('sensitive'))
+
+    class Response:
+        encoding = 'utf-8'
+    assert not stream(Response(), b'nothing here ')
+    # 'password' straddles the two pieces
+    assert not stream(Response(), b'but a pass')
+    assert stream(Response(), b'word follows')
+    assert stream.matched('sensitive') == ['password']
@@ -0,0 +1,133 @@
+"""Probe metrics: histogram buckets and quantiles, per-module attribution and the Prometheus export"""
+
+import json
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scanner_core import MetricsServer, ProbeMetrics, RequestTiming, module_scope, serve_metrics
+from scanner_core.metrics import BUCKETS, OTHER_ENDPOINTS, Histogram
+
+
+def timing(ttfb, connected=False, sent=100, received=1000):
+    result = RequestTiming()
+    result.ttfb = ttfb
+    result.connect = 0.002 if connected else 0.0
+    result.connected = connected
+    result.bytes_sent, result.bytes_received = sent, received
+    return result
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = Histogram()
+    for value in (0.001, 0.0011, 0.04, 0.05, 30.0):
+        histogram.observe(value)
+    # A value on a bound lands in that bucket; past the last bound is +Inf
+    assert histogram.buckets[BUCKETS.index(0.001)] == 1
+    assert histogram.buckets[BUCKETS.index(0.005)] == 1
+    assert histogram.buckets[BUCKETS.index(0.05)] == 2
+    assert histogram.buckets[-1] == 1
+    assert histogram.count == 5 and histogram.sum == pytest.approx(30.0921)
+    assert histogram.cumulative()[-1] == ('+Inf', 5)
+    assert dict(histogram.cumulative())['0.01'] == 2
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    for value in [0.02] * 90 + [0.3] * 9 + [20.0]:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.025
+    assert histogram.quantile(0.95) == 0.5
+    assert histogram.quantile(1.0) == float('inf')
+    assert histogram.as_dict()['p95'] == 0.5
+    for _ in range(10):
+        histogram.observe(20.0)
+    # JSON has no infinity, so a quantile past the last bound is written like its bucket
+    assert histogram.as_dict()['p95'] == '+Inf'
+
+
+def test_requests_are_credited_to_their_module_and_endpoint():
+    metrics = ProbeMetrics()
+    with module_scope('sqli'):
+        metrics.observe('http://target/api/users?id=1', 200, timing(0.02, connected=True))
+        metrics.observe('http://target/api/users?id=2', 500, timing(0.03))
+    metrics.observe('http://target/', 200, timing(0.01))
+    metrics.observe_error('http://target/')
+    data = metrics.as_dict()
+    sqli = data['modules']['sqli']
+    assert sqli['requests'] == 2 and sqli['statuses'] == {'200': 1, '500': 1}
+    assert sqli['connections_opened'] == 1 and sqli['bytes_received'] == 2000
+    # Connection phases are only observed on requests that opened a connection
+    assert sqli['phases']['connect']['count'] == 1 and sqli['phases']['ttfb']['count'] == 2
+    assert data['modules']['(none)']['errors'] == 1
+    assert set(data['endpoints']) == {'target/api/users', 'target/'}
+    assert json.loads(json.dumps(data)) == data
+
+
+def test_endpoints_past_the_limit_are_counted_together():
+    metrics = ProbeMetrics(max_endpoints=2)
+    for n in range(5):
+        metrics.observe(f'http://target/path/{n}', 404, timing(0.01))
+    assert list(metrics.endpoints) == ['target/path/0', 'target/path/1', OTHER_ENDPOINTS]
+    assert metrics.endpoints[OTHER_ENDPOINTS].requests == 3
+
+
+def test_prometheus_text_format():
+    metrics = ProbeMetrics()
+    with module_scope('odd "name"'):
+        metrics.observe('http://target/', 200, timing(0.02))
+    text = metrics.prometheus()
+    assert text.endswith('\n')
+    assert '# TYPE scanner_module_request_phase_seconds histogram' in text
+    labels = 'module="odd \\"name\\"",phase="ttfb"'
+    assert f'scanner_module_request_phase_seconds_bucket{{{labels},le="0.025"}} 1' in text
+    assert f'scanner_module_request_phase_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f'scanner_module_request_phase_seconds_count{{{labels}}} 1' in text
+    assert f'scanner_module_request_phase_seconds_sum{{{labels}}} 0.020000' in text
+    assert 'scanner_module_requests_total{module="odd \\"name\\""} 1' in text
+    assert 'scanner_module_responses_total{module="odd \\"name\\"",status="200"} 1' in text
+    sample = re.compile(r'^[a-z_]+(\{[^}]*\})? [0-9.e+-]+$')
+    for line in text.splitlines():
+        assert line.startswith('# ') or sample.match(line), line
+
+
+def test_transport_times_every_request(standin, transport_factory):
+    metrics = ProbeMetrics()
+    transport = transport_factory(metrics=metrics)
+    with module_scope('discovery'):
+        transport.get(f"{standin.url}/robots.txt")
+        transport.get(f"{standin.url}/robots.txt")
+    transport.get(f"{standin.url}/api/missing")
+    series = metrics.modules['discovery']
+    assert series.requests == 2 and series.connections == 1
+    assert series.phases['ttfb'].count == 2 and series.bytes_received > 0
+    assert metrics.modules['(none)'].statuses == {404: 1}
+    assert metrics.summary().startswith('Probe metrics: 3 requests timed')
+
+
+def test_metrics_server_serves_the_text_format():
+    metrics = ProbeMetrics()
+    metrics.observe('http://target/', 200, timing(0.02))
+    server = MetricsServer(metrics, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert response.read().decode() == metrics.prometheus()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url.replace('/metrics', '/other'), timeout=5)
+    finally:
+        server.close()
+
+
+def test_serve_metrics_announces_a_port_it_cannot_bind():
+    announced = []
+    first = MetricsServer(ProbeMetrics(), port=0).start()
+    try:
+        assert serve_metrics(ProbeMetrics(), first.port, announced.append) is None
+        assert serve_metrics(ProbeMetrics(), 0, announced.append) is None
+    finally:
+        first.close()
+    assert len(announced) == 1 and 'Could not serve metrics' in announced[0]
@@ -0,0 +1,140 @@
+"""ModuleRegistry scheduling and the ExclusiveGate shared between registries"""
+
+import threading
+import time
+
+import pytest
+
+from scanner_core import ExclusiveGate, ModuleRegistry
+
+
+class Tracker:
+    """Records which modules ran at the same time"""
+
+    def __init__(self):
+        self.running = set()
+        self.overlaps = []
+        self.order = []
+        self._lock = threading.Lock()
+
+    def module(self, name, seconds=0.05):
+        def run():
+            with self._lock:
+                self.overlaps.append((name, frozenset(self.running)))
+                self.running.add(name)
+            time.sleep(seconds)
+            with self._lock:
+                self.running.discard(name)
+                self.order.append(name)
+            return name
+        return run
+
+    def alongside(self, name):
+        return next(others for module, others in self.overlaps if module == name)
+
+
+def test_dependencies_finish_first_and_independent_modules_overlap():
+    tracker = Tracker()
+    registry = ModuleRegistry()
+    registry.register('base', tracker.module('base'))
+    registry.register('a', tracker.module('a'), depends=['base'])
+    registry.register('b', tracker.module('b'), depends=['base'])
+    done = []
+    results = registry.run(4, on_done=done.append)
+    assert results == {'base': 'base', 'a': 'a', 'b': 'b'}
+    assert tracker.order[0] == 'base' and sorted(done) == ['a', 'b', 'base']
+    assert tracker.alongside('a') == {'b'} or tracker.alongside('b') == {'a'}
+
+
+def test_exclusive_module_runs_alone():
+    tracker = Tracker()
+    registry = ModuleRegistry()
+    for name in ('a', 'b'):
+        registry.register(name, tracker.module(name))
+    registry.register('burst', tracker.module('burst'), exclusive=True)
+    registry.register('c', tracker.module('c'))
+    registry.run(4)
+    assert tracker.alongside('burst') == set()
+    assert 'burst' not in tracker.alongside('c')
+
+
+def test_registration_errors():
+    registry = ModuleRegistry()
+    registry.register('a', lambda: None)
+    with pytest.raises(ValueError):
+        registry.register('a', lambda: None)
+    with pytest.raises(ValueError):
+        registry.register('b', lambda: None, depends=['missing'])
+
+
+def test_first_error_stops_new_modules_and_is_raised():
+    ran = []
+    registry = ModuleRegistry()
+
+    def broken():
+        raise RuntimeError('boom')
+    registry.register('broken', broken)
+    registry.register('after', ran.append, 'after', depends=['broken'])
+    with pytest.raises(RuntimeError, match='boom'):
+        registry.run(2)
+    assert ran == []
+
+
+def test_runner_wraps_each_module():
+    calls = []
+    registry = ModuleRegistry()
+    registry.register('a', lambda x: x * 2, 21)
+    results = registry.run(1, runner=lambda name, func, *args: calls.append(name) or func(*args))
+    assert results == {'a': 42} and calls == ['a']
+
+
+def test_gate_keeps_exclusive_modules_alone_across_registries():
+    tracker = Tracker()
+    gate = ExclusiveGate()
+    burst = ModuleRegistry()
+    burst.register('burst', tracker.module('burst', 0.2), exclusive=True)
+    other = ModuleRegistry()
+    for name in ('x', 'y', 'z'):
+        other.register(name, tracker.module(name, 0.1))
+
+    threads = [threading.Thread(target=other.run, args=(1,), kwargs={'gate': gate})]
+    threads.append(threading.Thread(target=burst.run, args=(1,), kwargs={'gate': gate}))
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    assert tracker.alongside('burst') == set()
+    for name in ('x', 'y', 'z'):
+        assert 'burst' not in tracker.alongside(name)
+    # The burst waited for x, then went ahead of y and z
+    assert tracker.order[:2] == ['x', 'burst']
+
+
+def test_gate_shares_between_ordinary_modules():
+    gate = ExclusiveGate()
+    gate.acquire(False)
+    acquired = threading.Event()
+
+    def shared():
+        gate.acquire(False)
+        acquired.set()
+        gate.release(False)
+    thread = threading.Thread(target=shared)
+    thread.start()
+    assert acquired.wait(1)
+    thread.join()
+    gate.release(False)
+
+
+def test_subset_keeps_order_flags_and_inner_dependencies():
+    registry = ModuleRegistry()
+    registry.register('base', lambda: None)
+    registry.register('a', lambda: None, depends=['base'])
+    registry.register('burst', lambda: None, exclusive=True)
+    registry.register('b', lambda: None, depends=['a'])
+    subset = registry.subset(('b', 'burst', 'a'))
+    assert [module.name for module in subset] == ['a', 'burst', 'b']
+    assert subset.modules['a'].depends == ()
+    assert subset.modules['b'].depends == ('a',)
+    assert subset.modules['burst'].exclusive
@@ -0,0 +1,125 @@
+"""PlanExecutor: interleaved dispatch, plan-order reporting, checkpoints and the breaker gate"""
+
+import pytest
+
+from scanner_core import Checkpoint, CircuitBreaker, PlanExecutor, Probe, ProbePlan
+from standin import Settings, StandInTarget
+
+PATHS = ['/', '/robots.txt', '/api/contact', '/admin/login']
+
+
+class Recorder:
+    """Detector that notes the order responses arrive in and reports one finding per probe"""
+
+    def __init__(self):
+        self.arrived = []
+
+    def __call__(self, probe, response):
+        self.arrived.append(probe.context['n'])
+        yield ('info', f"{probe.method} {probe.path}: {response.status_code}", {'n': probe.context['n']})
+
+
+def grouped_plan(detector, per_path=4):
+    """Each path's probes next to each other, the way tools build their plans"""
+    plan = ProbePlan()
+    for path in PATHS:
+        plan.section(f"=== {path} ===")
+        for _ in range(per_path):
+            plan.add(Probe('GET', path, detector, context={'n': len(plan)}))
+    return plan
+
+
+def run(executor, plan, **kwargs):
+    emitted, announced = [], []
+    executor.execute(plan, lambda *finding: emitted.append(finding), announce=announced.append, **kwargs)
+    return emitted, announced
+
+
+@pytest.fixture(scope='module')
+def jittery():
+    with StandInTarget(Settings(jitter=0.02)) as target:
+        yield target
+
+
+def test_dispatch_interleaves_endpoints_but_reports_in_plan_order(standin, transport_factory):
+    recorder = Recorder()
+    plan = grouped_plan(recorder)
+    # One worker, so responses arrive in dispatch order
+    executor = PlanExecutor(transport_factory(), standin.url, workers=1)
+    emitted, announced = run(executor, plan)
+    assert recorder.arrived[:4] == [0, 4, 8, 12]
+    assert [finding[2]['n'] for finding in emitted] == list(range(16))
+    assert announced == [f"=== {path} ===" for path in PATHS]
+
+
+def test_fifo_dispatch_keeps_plan_order(standin, transport_factory):
+    recorder = Recorder()
+    executor = PlanExecutor(transport_factory(), standin.url, workers=1, schedule='fifo')
+    run(executor, grouped_plan(recorder))
+    assert recorder.arrived == list(range(16))
+
+
+def test_unknown_schedule(transport_factory):
+    with pytest.raises(ValueError):
+        PlanExecutor(transport_factory(), 'http://host', schedule='random')
+
+
+def test_reorder_buffer_under_concurrency(jittery, transport_factory):
+    recorder = Recorder()
+    executor = PlanExecutor(transport_factory(per_host_limit=16), jittery.url, workers=16)
+    emitted, _ = run(executor, grouped_plan(recorder, per_path=8))
+    # Responses come back in whatever order the jitter makes them
+    assert recorder.arrived != list(range(32)) and sorted(recorder.arrived) == list(range(32))
+    assert [finding[2]['n'] for finding in emitted] == list(range(32))
+
+
+def test_collect_returns_findings_in_the_order_given(standin, transport_factory):
+    plan = grouped_plan(Recorder())
+    results = PlanExecutor(transport_factory(), standin.url).collect(reversed(plan.probes))
+    assert [findings[0][2]['n'] for findings in results] == list(range(15, -1, -1))
+
+
+def test_chained_probes_follow_up_from_the_response(standin, transport_factory):
+    def follow(probe, response):
+        if probe.path == '/api/contact':
+            return Probe('POST', '/api/contact', report, json={'name': 'n', 'email': 'e', 'message': 'm'})
+        return None
+
+    def report(probe, response):
+        yield ('info', f"{probe.method} {probe.path}: {response.status_code}", None)
+
+    plan = ProbePlan([Probe('OPTIONS', '/api/contact', report, then=follow)])
+    emitted, _ = run(PlanExecutor(transport_factory(), standin.url), plan)
+    assert [finding[1] for finding in emitted] == ['OPTIONS /api/contact: 204', 'POST /api/contact: 200']
+
+
+def test_checkpoint_skips_probes_already_done(standin, transport_factory, tmp_path):
+    path = str(tmp_path / 'plan.jsonl')
+    executor = PlanExecutor(transport_factory(), standin.url)
+    checkpoint = Checkpoint(path, 'tool', standin.url)
+    first, _ = run(executor, grouped_plan(Recorder()), checkpoint=checkpoint)
+    checkpoint.close()
+
+    resumed = Checkpoint(path, 'tool', standin.url, resume=True)
+    before = standin.requests
+    again, announced = run(executor, grouped_plan(Recorder()), checkpoint=resumed)
+    resumed.close()
+    assert standin.requests == before
+    assert again == [] and resumed.skipped == 16
+    # Banners still go out, so a resumed report keeps its layout
+    assert len(announced) == 4
+    assert len(first) == 16
+
+
+def test_breaker_gate_skips_probes_on_a_tripped_endpoint(standin, transport_factory):
+    breaker = CircuitBreaker(threshold=1)
+    breaker.observe('/robots.txt', 'GET', None)
+    executor = PlanExecutor(transport_factory(), standin.url, breaker=breaker)
+    before = standin.requests
+    emitted, _ = run(executor, grouped_plan(Recorder()))
+    # /robots.txt is tripped; /api/contact answers a bare GET with 405, so its GET probes are pruned too
+    assert breaker.skipped == {('/robots.txt', 'circuit open: GET failed 1 times in a row'): 4,
+                               ('/api/contact', 'GET answered 405'): 4}
+    assert [finding[2]['n'] for finding in emitted] == [0, 1, 2, 3, 12, 13, 14, 15]
+    # OPTIONS to the three endpoints not yet seen, the bare GET, then only the probes that went out
+    assert standin.requests - before == 3 + 1 + 8
@@ -0,0 +1,93 @@
+"""ModuleProfiler: per-module .prof and tracemalloc files, the loop thread's share and the report"""
+
+import os
+import pstats
+import sys
+import tracemalloc
+
+import pytest
+
+from scanner_core import ModuleProfiler, ModuleRegistry
+
+KEPT = []
+
+
+def busy(n=200000):
+    return sum(i * i for i in range(n))
+
+
+def allocate():
+    KEPT.append([object() for _ in range(20000)])
+    return len(KEPT)
+
+
+async def busy_on_loop():
+    return busy()
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = ModuleProfiler(str(tmp_path / 'profiles'))
+    yield profiler
+    profiler.close()
+    KEPT.clear()
+
+
+def functions(stats):
+    return {name for _, _, name in stats.stats}
+
+
+def test_writes_a_profile_and_snapshot_per_module(profiler):
+    assert profiler.profile('sql injection/1', busy) == busy()
+    result, = profiler.results
+    assert result.profile_file == os.path.join(profiler.directory, 'sql_injection_1.prof')
+    assert result.snapshot_file == os.path.join(profiler.directory, 'sql_injection_1.tracemalloc')
+    assert 'busy' in functions(pstats.Stats(result.profile_file))
+    assert isinstance(tracemalloc.Snapshot.load(result.snapshot_file), tracemalloc.Snapshot)
+    assert result.cpu > 0 and result.wall >= result.cpu * 0.5
+
+
+def test_allocations_still_held_are_attributed_to_their_line(profiler):
+    profiler.profile('allocate', allocate)
+    module, where, size, blocks = profiler.allocators(1)[0]
+    assert module == 'allocate' and where.startswith(os.path.join('tests', 'test_profiling.py:'))
+    assert size > 20000 * 16 and blocks >= 20000
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason='one profiler already sees every thread')
+def test_the_transports_loop_thread_is_profiled_too(profiler, transport_factory):
+    transport = transport_factory()
+    profiler.transport = transport
+    profiler.profile('loop', transport.run, busy_on_loop())
+    assert {'busy_on_loop', 'busy'} <= functions(profiler.results[0].stats)
+
+
+def test_close_writes_the_merged_profile(tmp_path):
+    profiler = ModuleProfiler(str(tmp_path))
+    profiler.profile('a', busy)
+    profiler.profile('b', allocate)
+    profiler.close()
+    KEPT.clear()
+    merged = pstats.Stats(str(tmp_path / 'all.prof'))
+    assert {'busy', 'allocate'} <= functions(merged)
+    assert not tracemalloc.is_tracing()
+
+
+def test_wrap_profiles_each_module_run_by_a_registry(profiler):
+    calls = []
+    registry = ModuleRegistry()
+    registry.register('first', busy)
+    registry.register('second', allocate, depends=['first'])
+    registry.run(2, runner=profiler.wrap(lambda name, func, *args: calls.append(name) or func(*args)))
+    assert calls == ['first', 'second']
+    assert [result.name for result in profiler.results] == ['first', 'second']
+
+
+def test_report_sections_and_summary(profiler):
+    assert profiler.markdown() == '' and profiler.summary() == 'Profiling: no modules profiled'
+    profiler.profile('cpu', busy)
+    text = profiler.markdown()
+    assert '## Top Hot Spots' in text and '## Top Allocators' in text and '| `cpu` |' in text
+    assert profiler.summary().startswith('Profiling: 1 modules, most CPU in cpu')
+    with open(profiler.write_markdown()) as f:
+        assert f.read() == text
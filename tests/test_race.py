@@ -0,0 +1,41 @@
+"""RaceEngine against the stand-in, including connections that fail before the release"""
+
+from scanner_core import RaceEngine
+
+CONTACT = {'name': 'n', 'email': 'e@example.com', 'message': 'm'}
+
+
+def test_race_releases_every_request(standin, transport_factory):
+    engine = RaceEngine(transport_factory(), timeout=5)
+    result = engine.race('POST', f"{standin.url}/api/contact", 6, json=CONTACT)
+    assert result.summary()['statuses'] == {200: 6}
+    assert result.errors == 0 and result.successes() == 6
+    assert len(result.release_times) == 6
+    assert result.send_spread < 0.1
+
+
+def test_race_against_nothing_reports_errors(transport_factory, closed_url):
+    engine = RaceEngine(transport_factory(), timeout=2)
+    result = engine.race('POST', f"{closed_url}/api", 3)
+    assert result.summary() == {'requests': 0, 'errors': 3, 'statuses': {}, 'send_spread_us': 0.0}
+
+
+def test_connections_that_fail_to_stage_drop_out(standin, transport_factory):
+    transport = transport_factory()
+    opened = []
+    open_connection = transport.open_connection
+
+    async def flaky(url):
+        reader, writer = await open_connection(url)
+        opened.append(writer)
+        if len(opened) % 2:
+            # Gone before the held bytes could be written
+            writer.transport.abort()
+        return reader, writer
+    transport.open_connection = flaky
+
+    result = RaceEngine(transport, timeout=5).race('POST', f"{standin.url}/api/contact", 6, json=CONTACT)
+    assert result.summary()['statuses'] == {200: 3}
+    assert result.errors == 3
+    assert len(result.release_times) == 3
+    assert all(writer.is_closing() for writer in opened)
@@ -0,0 +1,69 @@
+"""ReportWriter: Markdown, JSON Lines and SARIF written side by side in one pass"""
+
+import json
+
+from scanner_core import ReportWriter
+from scanner_core.report import SARIF_SCHEMA
+
+
+def finding(title, details=None, **extra):
+    return dict({'title': title, 'details': details, 'timestamp': '2024-01-01T00:00:00'}, **extra)
+
+
+def write(tmp_path, findings):
+    base = str(tmp_path / 'report')
+    with ReportWriter(base, 'scanner', 'http://target/', version='2.0') as writer:
+        writer.markdown('# Report\n\n')
+        for severity, record in findings:
+            writer.finding(severity, record, f"- **{severity}** {record['title']}\n")
+        writer.markdown('\n## Summary\n')
+    return writer
+
+
+def test_markdown_keeps_blocks_in_order(tmp_path):
+    writer = write(tmp_path, [('High', finding('SQL Injection: /api/users'))])
+    with open(writer.markdown_file, encoding='utf-8') as f:
+        assert f.read() == '# Report\n\n- **High** SQL Injection: /api/users\n\n## Summary\n'
+
+
+def test_jsonl_has_one_record_per_finding(tmp_path):
+    writer = write(tmp_path, [('High', finding('SQL Injection: /api/users', {'payload': "' OR 1=1"})),
+                              ('Info', finding('Server header', occurrences=3))])
+    with open(writer.jsonl_file, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['severity'] for record in records] == ['High', 'Info']
+    assert records[0]['details'] == {'payload': "' OR 1=1"}
+    assert records[1]['occurrences'] == 3
+    assert writer.count == 2
+
+
+def test_sarif_is_one_valid_document(tmp_path):
+    writer = write(tmp_path, [('Critical', finding('SQL Injection: /api/users', {'payload': 'x'})),
+                              ('Medium', finding('Missing header', 'on /login')),
+                              ('low', finding('Cookie flags')),
+                              ('Unknown', finding('Odd one'))])
+    with open(writer.sarif_file, encoding='utf-8') as f:
+        sarif = json.load(f)
+    assert sarif['version'] == '2.1.0' and sarif['$schema'] == SARIF_SCHEMA
+    run, = sarif['runs']
+    assert run['tool']['driver'] == {'name': 'scanner', 'version': '2.0'}
+    results = run['results']
+    assert [result['level'] for result in results] == ['error', 'warning', 'note', 'none']
+    assert [result['ruleId'] for result in results] == ['SQL Injection', 'Missing header', 'Cookie flags',
+                                                        'Odd one']
+    assert results[0]['message'] == {'text': 'SQL Injection: /api/users'}
+    assert results[0]['properties']['severity'] == 'Critical'
+    # The endpoint comes from the title, or from free-text details when the title names none
+    assert results[0]['locations'][0]['physicalLocation']['artifactLocation']['uri'] == 'http://target/api/users'
+    assert results[1]['locations'][0]['physicalLocation']['artifactLocation']['uri'] == 'http://target/login'
+    assert 'locations' not in results[2]
+
+
+def test_empty_report_is_still_valid_sarif(tmp_path):
+    writer = write(tmp_path, [])
+    with open(writer.sarif_file, encoding='utf-8') as f:
+        assert json.load(f)['runs'][0]['results'] == []
+    with open(writer.jsonl_file, encoding='utf-8') as f:
+        assert f.read() == ''
+    # Closing twice is harmless
+    writer.close()
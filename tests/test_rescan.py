@@ -0,0 +1,100 @@
+"""RescanStore: validators across runs, 304 replays and carrying probe findings forward"""
+
+import json
+
+from scanner_core import PlanExecutor, Probe, ProbePlan, RescanStore
+
+
+class Counter:
+    """Detector that reports the body length and counts how often it really ran"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, probe, response):
+        self.calls += 1
+        yield ('info', f"{probe.path}: {len(response.content)} bytes", None)
+
+
+def scan(transport_factory, path, target, plan):
+    store = RescanStore(path, target)
+    emitted = []
+    PlanExecutor(transport_factory(rescan=store), target).execute(
+        plan, lambda *finding: emitted.append(finding), announce=lambda title: None, rescan=store)
+    store.save()
+    return store, emitted
+
+
+def test_validators_are_saved_and_reloaded(standin, transport_factory, tmp_path):
+    path = str(tmp_path / 'rescan.json')
+    store = RescanStore(path, standin.url)
+    response = transport_factory(rescan=store).get(f"{standin.url}/robots.txt")
+    assert store.stats['stored'] == 1
+    store.save()
+
+    reloaded = RescanStore(path, standin.url)
+    url = f"{standin.url}/robots.txt"
+    assert reloaded.conditional_headers(url, None) == {'If-None-Match': response.headers['ETag']}
+    assert RescanStore(path, 'http://other').conditional_headers(url, None) == {}
+    again = transport_factory(rescan=reloaded).get(url)
+    # The stand-in answered 304 and the stored body was put back behind it
+    assert again.revalidated and again.status_code == 200
+    assert again.content == response.content
+    assert again.headers['Content-Type'] == response.headers['Content-Type']
+    assert reloaded.stats['revalidated'] == 1
+
+
+def test_save_keeps_other_targets_and_drops_unused_bodies(tmp_path):
+    path = tmp_path / 'rescan.json'
+    path.write_text(json.dumps({'http://other': {'validators': {}, 'bodies': {}, 'probes': {}}}))
+    store = RescanStore(str(path), 'http://target')
+    store._bodies['orphan'] = 'eA=='
+    store.save()
+    data = json.loads(path.read_text())
+    assert set(data) == {'http://other', 'http://target'}
+    assert data['http://target']['bodies'] == {}
+
+
+def test_unchanged_response_carries_findings_forward(standin, transport_factory, tmp_path):
+    path = str(tmp_path / 'rescan.json')
+    first_detector, second_detector = Counter(), Counter()
+    store, first = scan(transport_factory, path, standin.url,
+                        ProbePlan([Probe('GET', '/robots.txt', first_detector)]))
+    assert first_detector.calls == 1 and store.stats['analysed'] == 1
+
+    store, second = scan(transport_factory, path, standin.url,
+                         ProbePlan([Probe('GET', '/robots.txt', second_detector)]))
+    # A 304 replays the stored body, its hash matches, so the detector never runs
+    assert second == first
+    assert second_detector.calls == 0
+    assert store.stats['revalidated'] == 1 and store.stats['carried'] == 1
+    assert '1 probes carried forward, 0 analysed' in store.summary()
+
+
+def test_changed_body_is_analysed_again(tmp_path, fake_response):
+    path = str(tmp_path / 'rescan.json')
+    before = fake_response(200)
+    before.content = b'old page'
+    store = RescanStore(path, 'http://target')
+    store.record_findings('probe:abc:1', before, [('low', 'old finding', None)])
+    store.save()
+
+    reloaded = RescanStore(path, 'http://target')
+    assert reloaded.carried_findings('probe:abc:1', before) == [('low', 'old finding', None)]
+    after = fake_response(200)
+    after.content = b'new page'
+    assert reloaded.carried_findings('probe:abc:1', after) is None
+    assert reloaded.carried_findings('probe:abc:1', fake_response(500)) is None
+    assert reloaded.carried_findings('probe:new:1', before) is None
+    assert reloaded.stats == {'revalidated': 0, 'stored': 0, 'carried': 1, 'analysed': 3}
+
+
+def test_only_complete_responses_with_validators_are_remembered(tmp_path, fake_response):
+    store = RescanStore(str(tmp_path / 'rescan.json'), 'http://target')
+    for status, headers, truncated in ((200, {}, False), (404, {'ETag': '"x"'}, False),
+                                       (200, {'ETag': '"x"'}, True)):
+        response = fake_response(status, headers)
+        response.content, response.truncated = b'body', truncated
+        store.remember('http://target/', None, response)
+    assert store.stats['stored'] == 0
+    assert store.conditional_headers('http://target/', None) == {}
@@ -0,0 +1,115 @@
+"""make_shards and the Coordinator with local worker processes"""
+
+import functools
+import os
+
+import pytest
+
+from scanner_core import AsyncTransport, Coordinator, PlanExecutor, Probe, ProbePlan, make_shards, parse_address
+
+PATHS = ['/', '/robots.txt', '/api/contact', '/admin/login', '/api/upload', '/missing']
+
+
+def report_status(probe, response):
+    yield ('info', f"{probe.method} {probe.path}: {response.status_code}", {'n': probe.context['n']})
+
+
+def build_plan():
+    plan = ProbePlan()
+    for section in range(3):
+        plan.section(f"=== SECTION {section} ===")
+        for n in range(12):
+            plan.add(Probe('GET', PATHS[n % len(PATHS)], report_status, context={'n': section * 12 + n}))
+    plan.section('=== END ===')
+    return plan
+
+
+def build(target):
+    """Worker builder: (executor, plan, close) for target"""
+    transport = AsyncTransport(per_host_limit=4)
+    return PlanExecutor(transport, target, workers=4), build_plan(), transport.close
+
+
+class DyingExecutor:
+    """Kills its worker process the first time any worker sharing marker runs a shard"""
+
+    def __init__(self, executor, marker):
+        self.executor = executor
+        self.transport = executor.transport
+        self.marker = marker
+
+    def collect(self, probes):
+        try:
+            os.close(os.open(self.marker, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return self.executor.collect(probes)
+        os._exit(1)
+
+
+def build_dying(marker, target):
+    executor, plan, close = build(target)
+    return DyingExecutor(executor, marker), plan, close
+
+
+def test_make_shards_covers_every_probe_once_and_alternates_targets():
+    shards = make_shards({'a': 60, 'b': 20, 'c': 0}, shard_size=25)
+    assert [shard.target for shard in shards] == ['a', 'b', 'a', 'a']
+    for target, size in (('a', 60), ('b', 20)):
+        indices = sorted(i for shard in shards if shard.target == target for i in shard.indices)
+        assert indices == list(range(size))
+    assert [shard.shard_id for shard in shards] == list(range(len(shards)))
+    # Strided, so one shard spans the whole plan rather than a contiguous run
+    assert shards[0].indices[:3] == [0, 3, 6]
+    assert all(len(shard.indices) <= 25 for shard in shards)
+
+
+def test_make_shards_of_nothing():
+    assert make_shards({}) == []
+    assert make_shards({'a': 0}) == []
+
+
+def test_parse_address():
+    assert parse_address('10.0.0.1:7000') == ('10.0.0.1', 7000)
+    assert parse_address(':7000') == ('0.0.0.0', 7000)
+    with pytest.raises(ValueError):
+        parse_address('host')
+
+
+def run_sharded(target, build, workers):
+    emitted, announced = [], []
+    coordinator = Coordinator({target: build_plan()}, shard_size=5)
+    coordinator.run(lambda _, *finding: emitted.append(finding), announce=announced.append, workers=workers,
+                    build=build)
+    return coordinator, emitted, announced
+
+
+def run_in_process(target):
+    emitted, announced = [], []
+    executor, plan, close = build(target)
+    try:
+        executor.execute(plan, lambda *finding: emitted.append(finding), announce=announced.append)
+    finally:
+        close()
+    return emitted, announced
+
+
+def test_sharded_run_reports_like_an_in_process_run(standin):
+    coordinator, emitted, announced = run_sharded(standin.url, build, workers=2)
+    assert (emitted, announced) == run_in_process(standin.url)
+    assert [finding[2]['n'] for finding in emitted] == list(range(36))
+    assert sum(stats.probes for stats in coordinator.workers.values()) == 36
+    assert coordinator.requeued == 0
+
+
+def test_shard_of_a_lost_worker_is_requeued(standin, tmp_path):
+    dying = functools.partial(build_dying, str(tmp_path / 'died'))
+    coordinator, emitted, announced = run_sharded(standin.url, dying, workers=2)
+    assert coordinator.requeued == 1
+    assert [stats.lost for stats in coordinator.workers.values()].count(True) == 1
+    assert (emitted, announced) == run_in_process(standin.url)
+
+
+def test_run_fails_when_every_worker_is_gone(standin, tmp_path):
+    dying = functools.partial(build_dying, str(tmp_path / 'died'))
+    with pytest.raises(RuntimeError, match='All workers exited'):
+        run_sharded(standin.url, dying, workers=1)
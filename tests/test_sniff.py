@@ -0,0 +1,68 @@
+"""Artifact sniffing: magic bytes, and the file size from a Range answer or a 200 that ignored Range"""
+
+import pytest
+
+from scanner_core import SNIFF_BYTES, range_headers, sniff_artifact, total_size
+from standin import Settings, StandInTarget
+
+
+@pytest.fixture(scope='module')
+def large_files():
+    with StandInTarget(Settings(large_file_mb=4)) as target:
+        yield target
+
+
+@pytest.mark.parametrize('head, kind', [
+    (b'PK\x03\x04\x14\x00', 'zip'),
+    (b'\x1f\x8b\x08\x00', 'gzip'),
+    (b'SQLite format 3\x00rest', 'sqlite'),
+    (b'\x00' * 257 + b'ustar\x0000', 'tar'),
+    (b'ref: refs/heads/main\n', 'git_head'),
+    (b'0123456789abcdef0123456789abcdef01234567\n', 'git_head'),
+    (b'-- MySQL dump 10.13\n', 'sql_dump'),
+    (b'\n\nCREATE TABLE users (id int);', 'sql_dump'),
+])
+def test_recognises_magic_bytes(head, kind):
+    assert sniff_artifact(head)[0] == kind
+
+
+@pytest.mark.parametrize('head', [
+    b'<!doctype html><html><body>CREATE TABLE in a tutorial</body></html>',
+    b'{"error": "Not found"}',
+    b'',
+])
+def test_ignores_pages_that_are_not_artifacts(head):
+    assert sniff_artifact(head) is None
+
+
+def test_range_headers():
+    assert range_headers() == {'Range': f'bytes=0-{SNIFF_BYTES - 1}', 'Accept-Encoding': 'identity'}
+    assert range_headers(16)['Range'] == 'bytes=0-15'
+
+
+def test_ranged_read_of_a_large_artifact(large_files, transport_factory):
+    transport = transport_factory()
+    response = transport.get(f"{large_files.url}/database.sql", headers=range_headers(), max_bytes=SNIFF_BYTES)
+    assert response.status_code == 206 and not response.truncated
+    assert len(response.content) == SNIFF_BYTES
+    # Content-Range carries the size of the whole file, not the slice
+    assert total_size(response) == 4 * 2 ** 20
+    assert sniff_artifact(response.content) == ('sql_dump', 'SQL dump')
+    assert transport.stats['bytes_received'] == SNIFF_BYTES
+
+
+def test_a_200_that_ignores_range_is_capped(standin, transport_factory):
+    transport = transport_factory()
+    # Without the artifact the catch-all answers with the whole SPA shell
+    response = transport.get(f"{standin.url}/backup.zip", headers=range_headers(64), max_bytes=64)
+    assert response.status_code == 200 and response.truncated
+    assert len(response.content) == 64
+    assert total_size(response) == int(response.headers['Content-Length']) > 64
+    assert sniff_artifact(response.content) is None
+
+
+def test_total_size_needs_the_server_to_say(fake_response):
+    assert total_size(fake_response(206, {'Content-Range': 'bytes 0-511/*'})) is None
+    assert total_size(fake_response(200, {})) is None
+    # A Content-Length on anything but a full answer is not the file's size
+    assert total_size(fake_response(404, {'Content-Length': '120'})) is None
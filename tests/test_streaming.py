@@ -0,0 +1,74 @@
+"""Streamed reads: the byte cap and on_chunk stop the read instead of downloading the whole body"""
+
+import pytest
+
+from scanner_core import ResponseCache
+from standin import Settings, StandInTarget
+
+FILE_MB = 16
+
+
+@pytest.fixture(scope='module')
+def large_files():
+    with StandInTarget(Settings(large_file_mb=FILE_MB)) as target:
+        yield target
+
+
+def test_max_bytes_stops_the_read(large_files, transport_factory):
+    transport = transport_factory()
+    response = transport.get(f"{large_files.url}/database.sql", max_bytes=1000)
+    assert response.status_code == 200 and response.truncated
+    assert len(response.content) == 1000
+    assert response.content.startswith(b'-- PostgreSQL database dump')
+    # Only a few reads' worth came off the socket, not the 16 MiB file
+    assert transport.stats['bytes_received'] < 2 ** 20
+    assert transport.stats['truncated'] == 1
+
+
+def test_a_truncated_connection_is_not_reused(large_files, transport_factory):
+    transport = transport_factory()
+    transport.get(f"{large_files.url}/backup.zip", max_bytes=100)
+    transport.get(f"{large_files.url}/robots.txt")
+    assert transport.stats['connections_opened'] == 2 and transport.stats['connections_reused'] == 0
+
+
+def test_default_cap_is_the_transports_max_body(large_files, transport_factory):
+    transport = transport_factory(max_body=2 ** 20)
+    response = transport.get(f"{large_files.url}/backup.zip")
+    assert response.truncated and len(response.content) == 2 ** 20
+    assert len(transport.get(f"{large_files.url}/backup.zip", max_bytes=10).content) == 10
+
+
+def test_on_chunk_sees_every_piece_and_can_stop_early(large_files, transport_factory):
+    transport = transport_factory()
+    seen = []
+
+    def verdict(response, piece):
+        seen.append(piece)
+        return sum(len(piece) for piece in seen) > 2 ** 18
+    response = transport.get(f"{large_files.url}/database.sql", on_chunk=verdict)
+    assert response.truncated
+    assert b''.join(seen) == response.content
+    assert 2 ** 18 < len(response.content) < 2 ** 20
+    assert transport.stats['bytes_received'] < 2 * 2 ** 20
+
+
+def test_a_verdict_on_the_last_piece_keeps_the_connection(large_files, transport_factory):
+    transport = transport_factory()
+    pieces = []
+
+    def verdict(response, piece):
+        pieces.append(piece)
+        return True
+    response = transport.get(f"{large_files.url}/robots.txt", on_chunk=verdict)
+    assert not response.truncated and pieces == [response.content]
+    transport.get(f"{large_files.url}/robots.txt")
+    assert transport.stats['connections_opened'] == 1 and transport.stats['connections_reused'] == 1
+
+
+def test_streamed_reads_bypass_the_cache(large_files, transport_factory):
+    transport = transport_factory(cache=ResponseCache())
+    before = large_files.requests
+    for _ in range(2):
+        transport.get(f"{large_files.url}/robots.txt", on_chunk=lambda response, piece: None)
+    assert large_files.requests - before == 2
@@ -0,0 +1,132 @@
+"""HostThrottle: AIMD limit, Retry-After pauses and the transport's per-host throttling"""
+
+import asyncio
+
+import pytest
+
+from scanner_core import HostThrottle
+from standin import Settings, StandInTarget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('scanner_core.throttle.time.monotonic', clock)
+    return clock
+
+
+def test_slow_start_then_additive_increase(clock):
+    throttle = HostThrottle(maximum=32, initial=4, increase_interval=1.0)
+    for _ in range(4):
+        throttle.observe(200, 0.01)
+    assert throttle.limit == 8
+    throttle.observe(429)
+    assert throttle.limit == 4 and throttle.cuts == 1
+    # After the first cut the limit grows by one per interval, however many answers arrive
+    clock.now += 0.5
+    for _ in range(10):
+        throttle.observe(200, 0.01)
+    assert throttle.limit == 4
+    clock.now += 0.6
+    throttle.observe(200, 0.01)
+    assert throttle.limit == 5
+
+
+def test_limit_stays_within_bounds(clock):
+    throttle = HostThrottle(maximum=6, initial=4, minimum=2)
+    for _ in range(10):
+        throttle.observe(200, 0.01)
+    assert throttle.limit == 6 and throttle.peak == 6
+    for _ in range(5):
+        clock.now += 1
+        throttle.observe(503)
+    assert throttle.limit == 2
+
+
+def test_a_burst_of_429s_is_one_cut(clock):
+    throttle = HostThrottle(maximum=32, initial=16)
+    for _ in range(16):
+        throttle.observe(429)
+    assert throttle.cuts == 1 and throttle.limit == 8
+    assert throttle.backoffs == 16
+
+
+def test_failures_without_an_answer_cut_too(clock):
+    throttle = HostThrottle(maximum=32, initial=8)
+    throttle.observe(None)
+    assert throttle.limit == 4 and throttle.backoffs == 0
+
+
+def test_retry_after_pauses_once_per_window(clock):
+    throttle = HostThrottle(maximum=8)
+    throttle.observe(429, retry_after='5')
+    clock.now += 1
+    # A later answer only extends the pause to its own Retry-After
+    throttle.observe(429, retry_after='5')
+    assert throttle.pauses == 1
+    assert throttle.paused == pytest.approx(6)
+    throttle.observe(429, retry_after='100000')
+    assert throttle._resume_at - clock.now == 120
+
+
+def test_latency_rise_cuts_the_limit(clock):
+    throttle = HostThrottle(maximum=64, initial=8, window=10)
+    for _ in range(10):
+        throttle.observe(200, 0.01)
+    assert throttle.healthy_p95 == pytest.approx(0.01)
+    limit = throttle.limit
+    clock.now += 1
+    for _ in range(10):
+        throttle.observe(200, 0.5)
+    assert throttle.cuts == 1 and throttle.limit < limit
+
+
+def test_in_flight_never_exceeds_the_limit():
+    async def run():
+        throttle = HostThrottle(maximum=3, initial=3)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with throttle:
+                peak = max(peak, throttle.in_flight)
+                await asyncio.sleep(0.01)
+        await asyncio.gather(*(request() for _ in range(20)))
+        return peak, throttle.in_flight
+    assert asyncio.run(run()) == (3, 0)
+
+
+def test_retry_after_holds_new_requests():
+    async def run():
+        throttle = HostThrottle(maximum=4)
+        throttle.observe(429, retry_after='1')
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with throttle:
+            return loop.time() - start
+    assert asyncio.run(run()) >= 0.9
+
+
+@pytest.fixture(scope='module')
+def rate_limited():
+    with StandInTarget(Settings(rate_limit=40)) as target:
+        yield target
+
+
+def test_transport_backs_off_a_rate_limited_host(rate_limited, transport_factory):
+    transport = transport_factory(per_host_limit=32)
+    responses = transport.fetch_all([{'url': f"{rate_limited.url}/?n={n}"} for n in range(120)])
+    [throttle] = transport._throttles.values()
+    statuses = [response.status_code for response in responses if response is not None]
+    assert 429 in statuses
+    assert throttle.cuts >= 1 and throttle.backoffs >= 1
+    assert throttle.limit < 32
+    assert transport.throttle_summary().startswith(f"Adaptive throttle: 127.0.0.1:{rate_limited.port} ")
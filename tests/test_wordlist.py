@@ -0,0 +1,118 @@
+"""Wordlist streaming, the Bloom filter, the prefix trie and PathDiscovery against the stand-in"""
+
+from scanner_core import BloomFilter, PathDiscovery, PrefixTrie, estimate_entries, stream_wordlist
+from scanner_core.wordlist import MAX_BLOOM_BITS, normalize_path
+
+
+def write_wordlist(tmp_path, lines, name='words.txt'):
+    path = tmp_path / name
+    path.write_text(''.join(f"{line}\n" for line in lines), encoding='utf-8')
+    return str(path)
+
+
+def test_normalize_path():
+    assert normalize_path('admin\n') == '/admin'
+    assert normalize_path('/api/v1?x=1') == '/api/v1?x=1'
+    assert normalize_path('a b') == '/a%20b'
+    assert normalize_path('   ') is None
+    assert normalize_path('# comment') is None
+
+
+def test_stream_wordlist_skips_blanks_and_comments(tmp_path):
+    path = write_wordlist(tmp_path, ['# header', 'admin', '', 'api/v1', 'café'])
+    assert list(stream_wordlist(path)) == ['/admin', '/api/v1', '/caf%C3%A9']
+
+
+def test_stream_wordlist_of_an_empty_file(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert list(stream_wordlist(str(path))) == []
+    assert estimate_entries([str(path)]) == 0
+
+
+def test_stream_wordlist_without_a_final_newline(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_bytes(b'one\r\ntwo')
+    assert list(stream_wordlist(str(path))) == ['/one', '/two']
+
+
+def test_bloom_filter_drops_duplicates():
+    bloom = BloomFilter(1000)
+    assert bloom.add('/admin')
+    assert not bloom.add('/admin')
+    assert '/admin' in bloom and '/other' not in bloom
+    assert len(bloom) == 1
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(5000, error_rate=0.001)
+    for n in range(5000):
+        bloom.add(f"/path/{n}")
+    assert all(f"/path/{n}" in bloom for n in range(5000))
+    false_positives = sum(f"/other/{n}" in bloom for n in range(5000))
+    assert false_positives < 25
+
+
+def test_bloom_filter_size_is_capped():
+    assert BloomFilter(10 ** 12).size == MAX_BLOOM_BITS
+
+
+def test_prefix_trie_gates_after_identical_answers():
+    trie = PrefixTrie(gate_after=3)
+    for name in ('a', 'b'):
+        trie.observe(f"/app/{name}", 'shell')
+    assert trie.pruned('/app/c') is None
+    trie.observe('/app/c', 'shell')
+    assert trie.pruned('/app/d') == '/app'
+    assert trie.pruned('/app/deep/er') == '/app'
+    assert trie.gated['/app'].skipped == 2
+    assert trie.pruned('/other/x') is None
+
+
+def test_prefix_trie_never_gates_mixed_answers_or_the_root():
+    trie = PrefixTrie(gate_after=2)
+    trie.observe('/api/a', 'one')
+    trie.observe('/api/b', 'two')
+    trie.observe('/api/c', 'one')
+    trie.observe('/api/d', 'one')
+    assert trie.pruned('/api/e') is None
+    for name in 'abc':
+        trie.observe(f"/{name}", 'shell')
+    assert trie.pruned('/d') is None and trie.gated == {}
+
+
+def test_prefix_trie_stops_tracking_past_max_nodes():
+    trie = PrefixTrie(gate_after=1, max_nodes=2)
+    trie.observe('/a/b/x', 'shell')
+    assert trie.nodes == 2
+    trie.observe('/c/x', 'shell')
+    assert trie.nodes == 2
+    assert trie.pruned('/c/y') is None
+    assert trie.pruned('/a/b/y') == '/a/b'
+
+
+def test_discovery_prunes_a_catch_all_prefix(standin, transport_factory, tmp_path):
+    # Everything under /admin is the SPA shell; /api answers 404, which never gates
+    admin = [f"admin/page{n}" for n in range(10)]
+    api = [f"api/route{n}" for n in range(10)]
+    first = write_wordlist(tmp_path, admin + api, 'first.txt')
+    second = write_wordlist(tmp_path, admin[:5] + ['robots.txt'], 'second.txt')
+
+    discovery = PathDiscovery(transport_factory(), standin.url, workers=1, capacity=100, gate_after=3)
+    before = standin.requests
+    results = dict(discovery.results(path for wordlist in (first, second)
+                                     for path in stream_wordlist(wordlist)))
+    assert [path for path in results if path.startswith('/admin/')] == [f"/admin/page{n}" for n in range(3)]
+    assert len([path for path in results if path.startswith('/api/')]) == 10
+    assert results['/robots.txt'].status_code == 200
+    assert discovery.pruned == 7 and discovery.duplicates == 5
+    assert discovery.probed == len(results) == standin.requests - before == 14
+    assert list(discovery.prefixes.gated) == ['/admin']
+    assert '7 skipped under catch-all prefixes: /admin (7)' in discovery.summary()
+
+
+def test_discovery_reports_failures(transport_factory, closed_url):
+    discovery = PathDiscovery(transport_factory(), closed_url, workers=2, timeout=2)
+    results = list(discovery.results(['/a', '/b']))
+    assert sorted(results) == [('/a', None), ('/b', None)]
+    assert discovery.failed == 2